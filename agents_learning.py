@@ -1,6 +1,7 @@
 from game.agent import Agent
 from game.direction import Direction
 from game.actions import Actions
+from game.replay_buffer import ReplayBuffer
 
 import time
 import utilities
@@ -26,10 +27,29 @@ class ValueEstimationAgent(Agent):
         utilities.raise_not_defined()
 
 
+def legal_actions(state):
+    return state.get_legal_actions()
+
+
 class ReinforcementAgent(ValueEstimationAgent):
-    def __init__(self, actionFn=None, numTraining=100, epsilon=0.5, alpha=0.5, gamma=1):
+    """
+    An agent that learns from the transitions it observes, one update for
+    each as it happens.
+
+    With a replayCapacity the agent also keeps its most recent transitions
+    in a ReplayBuffer and, at the end of each training episode, learns again
+    from replayBatches minibatches of replayBatchSize transitions sampled
+    from it, so the replayed updates are made between games rather than
+    during them. prioritizedReplay samples the transitions with the largest
+    errors (as returned by update) more often.
+    """
+    def __init__(self, actionFn=None, numTraining=100, epsilon=0.5, alpha=0.5, gamma=1, replayCapacity=0,
+                 replayBatchSize=32, replayBatches=1, prioritizedReplay=False):
+        # A function of the module rather than a lambda, so that the agent
+        # can be pickled to start an actor process (see
+        # game/parallel_training.py).
         if actionFn is None:
-            actionFn = lambda state: state.get_legal_actions()
+            actionFn = legal_actions
 
         self.actionFn = actionFn
         self.episodes_so_far = 0
@@ -40,16 +60,106 @@ class ReinforcementAgent(ValueEstimationAgent):
         self.alpha = float(alpha)
         self.discount = float(gamma)
 
+        # While this is a list the agent only records the transitions it
+        # observes, for a learner elsewhere to learn from (see
+        # game/parallel_training.py).
+        self.transition_log = None
+
+        self.replay_batch_size = int(replayBatchSize)
+        self.replay_batches = int(replayBatches)
+        self.replay = None
+
+        if int(replayCapacity) > 0:
+            self.replay = ReplayBuffer(int(replayCapacity), prioritized=bool(int(prioritizedReplay)))
+
     def update(self, state, action, next_state, reward):
+        """
+        Learns from a transition. Agents may return the error of the update,
+        which prioritized replay uses as the priority of the transition.
+        """
+        utilities.raise_not_defined()
+
+    def get_parameters(self):
+        """
+        Returns a copy of what the agent has learned, in a form that can be
+        sent to another process and handed to set_parameters there. Neither
+        method keeps the object it is given or returns, so later learning
+        on either side does not change the other.
+        """
+        utilities.raise_not_defined()
+
+    def set_parameters(self, parameters):
+        utilities.raise_not_defined()
+
+    def get_snapshot(self):
+        """
+        Returns a copy of what the agent has learned for a checkpoint (see
+        game/checkpoint.py), as a dictionary of arrays, lists and other
+        picklable values that later learning does not change. It is taken
+        in the game loop and written out elsewhere, so it should be quick to
+        take. The replay buffer is not part of it.
+        """
+        utilities.raise_not_defined()
+
+    def set_snapshot(self, snapshot):
         utilities.raise_not_defined()
 
+    def start_tracking_changes(self):
+        """
+        Starts (or restarts) recording what the agent learns, for
+        get_parameter_changes. Agents that cannot tell what changed need do
+        nothing.
+        """
+        pass
+
+    def get_parameter_changes(self):
+        """
+        Returns what the agent has learned since start_tracking_changes or
+        the last call of get_parameter_changes, for another copy of the
+        agent to apply with apply_parameter_changes. Agents that cannot tell
+        what changed return all of their parameters.
+        """
+        return self.get_parameters()
+
+    def apply_parameter_changes(self, changes):
+        self.set_parameters(changes)
+
     def get_legal_actions(self, state):
         return self.actionFn(state)
 
     def observe_transition(self, state, action, next_state, delta_reward):
         self.episode_rewards += delta_reward
+
+        if self.transition_log is not None:
+            self.transition_log.append((state, action, next_state, delta_reward))
+            return
+
         self.update(state, action, next_state, delta_reward)
 
+        if self.replay is not None and self.is_in_training():
+            self.replay.add(state, action, delta_reward, next_state)
+
+    def replay_transitions(self):
+        """
+        Learns again from minibatches sampled from the replay buffer. The
+        learning rate of each update is scaled by the weight of its sample.
+        """
+        alpha = self.alpha
+
+        for _ in range(self.replay_batches):
+            batch = self.replay.sample(self.replay_batch_size)
+            errors = []
+
+            for index, weight in batch:
+                state, action, reward, next_state = self.replay.transition(index)
+                self.alpha = alpha * weight
+                error = self.update(state, action, next_state, reward)
+                errors.append(error if error is not None else 0.0)
+
+            self.replay.update_priorities([index for index, _ in batch], errors)
+
+        self.alpha = alpha
+
     def start_episode(self):
         self.last_state = None
         self.last_action = None
@@ -57,6 +167,9 @@ class ReinforcementAgent(ValueEstimationAgent):
 
     def stop_episode(self):
         if self.episodes_so_far < self.numTraining:
+            if self.replay is not None:
+                self.replay_transitions()
+
             self.accum_train_rewards += self.episode_rewards
         else:
             self.accum_test_rewards += self.episode_rewards
@@ -68,6 +181,11 @@ class ReinforcementAgent(ValueEstimationAgent):
             self.epsilon = 0.0
             self.alpha = 0.0
 
+            # Nothing is replayed after training.
+            if self.replay is not None:
+                self.replay.close()
+                self.replay = None
+
     def is_in_training(self):
         return self.episodes_so_far < self.numTraining
 
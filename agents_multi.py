@@ -1,8 +1,10 @@
 from utilities import manhattan_distance
 from game.direction import Direction
 from game.agent import Agent
+from game.adversarial_search import AdversarialSearch, ParallelRootSearch, TranspositionTable
 
 import random
+import time
 import utilities
 
 
@@ -32,25 +34,67 @@ class ReflexAgent(Agent):
 
 
 class MultiAgentSearchAgent(Agent):
-    def __init__(self, eval_fn='score_evaluation_function', depth='2'):
+    """
+    A Pac-Man agent that searches the game tree to the given depth, where
+    one ply of depth is a move by every agent.
+
+    The search is run by an AdversarialSearch engine with a transposition
+    table of table_size entries that is kept between moves. When the game
+    provides a move timeout, each move is limited to TIME_BUDGET_FRACTION
+    of it and the deepest completed iteration is used. With deepen set, the
+    search keeps going past depth until that time budget is spent.
+    """
+    TIME_BUDGET_FRACTION = 0.8
+
+    expectimax = False
+    pruning = False
+
+    def __init__(self, eval_fn='score_evaluation_function', depth='2', deepen='False', table_size='100000'):
         self.index = 0
         self.evaluation_function = utilities.lookup(eval_fn, globals())
         self.depth = int(depth)
+        self.deepen = str(deepen).lower() in ['true', '1']
+        self.move_timeout = None
+        self.engine = AdversarialSearch(self.evaluation_function, expectimax=self.expectimax,
+                                        pruning=self.pruning, table=TranspositionTable(int(table_size)))
 
+    def set_move_timeout(self, timeout):
+        self.move_timeout = timeout
 
-class MinimaxAgent(MultiAgentSearchAgent):
     def get_action(self, game_state):
-        utilities.raise_not_defined()
+        deadline = None
+        if self.move_timeout is not None:
+            deadline = time.time() + self.move_timeout * self.TIME_BUDGET_FRACTION
+
+        return self.engine.get_action(game_state, self.depth, deadline, self.deepen)
+
+
+class MinimaxAgent(MultiAgentSearchAgent):
+    pass
 
 
 class AlphaBetaAgent(MultiAgentSearchAgent):
-    def get_action(self, game_state):
-        utilities.raise_not_defined()
+    pruning = True
 
 
 class ExpectimaxAgent(MultiAgentSearchAgent):
-    def get_action(self, game_state):
-        utilities.raise_not_defined()
+    expectimax = True
+
+
+class ParallelAlphaBetaAgent(AlphaBetaAgent):
+    """
+    An AlphaBetaAgent that splits the moves at the root of the search across
+    a pool of worker processes. It chooses the same actions as AlphaBetaAgent.
+    The pool is stopped at the end of each game and started again by the
+    next.
+    """
+    def __init__(self, workers='4', **args):
+        AlphaBetaAgent.__init__(self, **args)
+        self.engine = ParallelRootSearch(self.evaluation_function, int(workers), expectimax=self.expectimax,
+                                         pruning=self.pruning, table_size=self.engine.table.max_size)
+
+    def final(self, state):
+        self.engine.close()
 
 
 def score_evaluation_function(current_game_state):
@@ -1,34 +1,79 @@
+import random
+from array import array
+
 from agents_learning import ReinforcementAgent
 from game.feature_extractors import *
+from game.linear_q_function import LinearQFunction
+from game.q_table import QTable
 
 import utilities
 
 
 class QLearningAgent(ReinforcementAgent):
+    """
+    A tabular Q-learning agent. Q-values are kept in a QTable, which gives
+    each state a dense id and stores the values of its actions in one row
+    of a flat array.
+    """
     def __init__(self, **args):
         ReinforcementAgent.__init__(self, **args)
+        self.q_values = QTable()
+
+    def get_parameters(self):
+        return self.q_values.copy()
+
+    def set_parameters(self, parameters):
+        self.q_values = parameters.copy()
+
+    def get_snapshot(self):
+        return self.q_values.snapshot()
+
+    def set_snapshot(self, snapshot):
+        self.q_values = QTable.from_snapshot(snapshot)
+
+    def start_tracking_changes(self):
+        self.q_values.track_changes()
+
+    def get_parameter_changes(self):
+        return self.q_values.take_changes()
 
-        "*** YOUR CODE HERE ***"
+    def apply_parameter_changes(self, changes):
+        for state, action, value in changes:
+            self.q_values.set(state, action, value)
 
     def get_q_value(self, state, action):
-        utilities.raise_not_defined()
+        return self.q_values.get(state, action)
 
     def compute_value_from_q_values(self, state):
-        utilities.raise_not_defined()
+        return self.q_values.max_value(state, self.get_legal_actions(state))
 
     def compute_action_from_q_values(self, state):
-        utilities.raise_not_defined()
+        legal_actions = self.get_legal_actions(state)
+
+        if not legal_actions:
+            return None
+
+        return random.choice(self.q_values.best_actions(state, legal_actions))
 
     def get_action(self, state):
         legal_actions = self.get_legal_actions(state)
         action = None
 
-        utilities.raise_not_defined()
+        if not legal_actions:
+            return action
+
+        if utilities.flip_coin(self.epsilon):
+            action = random.choice(legal_actions)
+        else:
+            action = self.compute_action_from_q_values(state)
 
         return action
 
     def update(self, state, action, next_state, reward):
-        utilities.raise_not_defined()
+        target = reward + self.discount * self.compute_value_from_q_values(next_state)
+        error = target - self.q_values.get(state, action)
+        self.q_values.update(state, action, target, self.alpha)
+        return error
 
     def get_policy(self, state):
         return self.compute_action_from_q_values(state)
@@ -53,19 +98,66 @@ class PacmanQAgent(QLearningAgent):
 
 
 class ApproximateQAgent(PacmanQAgent):
+    """
+    A Q-learning agent that learns weights for the features of its extractor
+    rather than a value for every state and action. The Q-values of all the
+    legal actions in a state are computed together by a LinearQFunction.
+    """
     def __init__(self, extractor='IdentityExtractor', **args):
         self.feat_extractor = utilities.lookup(extractor, globals())()
         PacmanQAgent.__init__(self, **args)
-        self.weights = utilities.Counter()
+        self.q_function = LinearQFunction(self.feat_extractor)
 
     def get_weights(self):
-        return self.weights
+        return self.q_function.get_weights()
+
+    def get_parameters(self):
+        snapshot = self.q_function.snapshot()
+        return snapshot['feature_ids'], snapshot['weights']
+
+    def set_parameters(self, parameters):
+        feature_ids, weights = parameters
+        self.q_function.set_parameters((dict(feature_ids), array('d', weights)))
+
+    def get_snapshot(self):
+        return self.q_function.snapshot()
+
+    def set_snapshot(self, snapshot):
+        self.set_parameters((snapshot['feature_ids'], snapshot['weights']))
+
+    # The weights are few, so all of them are sent every time.
+    def get_parameter_changes(self):
+        return self.get_parameters()
+
+    def apply_parameter_changes(self, changes):
+        self.set_parameters(changes)
 
     def get_q_value(self, state, action):
-        utilities.raise_not_defined()
+        return self.q_function.get_q_value(state, action)
+
+    def compute_value_from_q_values(self, state):
+        legal_actions = self.get_legal_actions(state)
+
+        if not legal_actions:
+            return 0.0
+
+        return max(self.q_function.get_q_values(state, legal_actions))
+
+    def compute_action_from_q_values(self, state):
+        legal_actions = self.get_legal_actions(state)
+
+        if not legal_actions:
+            return None
+
+        q_values = self.q_function.get_q_values(state, legal_actions)
+        best = max(q_values)
+        return random.choice([action for action, value in zip(legal_actions, q_values) if value == best])
 
     def update(self, state, action, next_state, reward):
-        utilities.raise_not_defined()
+        difference = reward + self.discount * self.compute_value_from_q_values(next_state) - \
+            self.get_q_value(state, action)
+        self.q_function.update(state, action, difference, self.alpha)
+        return difference
 
     def final(self, state):
         PacmanQAgent.final(self, state)
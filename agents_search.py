@@ -4,8 +4,11 @@ import time
 import search
 import utilities
 from game.actions import Actions
+from game.adjacency import get_adjacency_table
 from game.agent import Agent
 from game.direction import Direction
+from game.grid import Grid
+from game.heuristic_cache import HeuristicCache, cached_heuristic
 
 
 ##########
@@ -67,12 +70,23 @@ class SearchAgent(Agent):
 
         self.actions = self.search_function(problem)
 
-        total_cost = problem.get_cost_of_actions(self.actions)
-        print('Path found with total cost of %d in %.1f seconds' % (total_cost, time.time() - start_time))
+        # A search returns None when there is no path; stay put in that case.
+        if self.actions is None:
+            self.actions = []
+            print('No path found in %.1f seconds' % (time.time() - start_time))
+        else:
+            total_cost = problem.get_cost_of_actions(self.actions)
+            print('Path found with total cost of %d in %.1f seconds' % (total_cost, time.time() - start_time))
 
         if '_expanded' in dir(problem):
             print('Search nodes expanded: %d' % problem._expanded)
 
+        if getattr(problem, 'search_statistics', None) is not None:
+            print('Search statistics: %s' % problem.search_statistics)
+
+        if getattr(problem, 'heuristic_cache', None) is not None:
+            print('Heuristic cache: %s' % problem.heuristic_cache)
+
     def get_action(self, state):
         """
         Returns the next action in a chosen path. Will return Directions.STOP
@@ -118,7 +132,7 @@ class AStarCornersAgent(SearchAgent):
     a specific corners heuristic."
     """
     def __init__(self):
-        self.search_function = lambda prob: search.astar_search(prob, corners_heuristic)
+        self.search_function = lambda prob: search.astar_search(prob, cached_heuristic(corners_heuristic))
         self.search_type = CornersProblem
 
 
@@ -128,7 +142,7 @@ class AStarFoodSearchAgent(SearchAgent):
     and a specific food heuristic.
     """
     def __init__(self):
-        self.search_function = lambda prob: search.astar_search(prob, food_heuristic)
+        self.search_function = lambda prob: search.astar_search(prob, cached_heuristic(food_heuristic))
         self.search_type = FoodSearchProblem
 
 
@@ -175,7 +189,7 @@ class ClosestDotSearchAgent(SearchAgent):
 ##############
 
 
-def manhattan_heuristic(position, problem, info={}):
+def manhattan_heuristic(position, problem):
     """
     A heuristic that returns the Manhattan distance. The Manhattan distance
     refers to the distance between two points on a grid based on a strictly
@@ -187,7 +201,7 @@ def manhattan_heuristic(position, problem, info={}):
     return abs(xy1[0] - xy2[0]) + abs(xy1[1] - xy2[1])
 
 
-def euclidean_heuristic(position, problem, info={}):
+def euclidean_heuristic(position, problem):
     """
     A heuristic that returns the Euclidean distance. The Euclidean distance
     refers to the the straight-line distance between two points in a grid.
@@ -222,6 +236,11 @@ def food_heuristic(state, problem):
     """
     position, food_grid = state
 
+    # food_grid is a Grid, so food_grid.as_list() gives the cells that still
+    # hold food. problem.heuristic_cache keeps maze distances and spanning
+    # tree weights between calls, e.g.
+    # problem.heuristic_cache.spanning_tree(cells, key=food_grid.bits).
+
     "*** YOUR CODE HERE ***"
 
     return 0
@@ -275,6 +294,7 @@ class PositionSearchProblem(SearchProblem):
     """
     def __init__(self, game_state, cost_function=lambda x: 1, goal=(1, 1), start=None, warn=True, visualize=True):
         self.walls = game_state.get_walls()
+        self.adjacency = get_adjacency_table(self.walls)
         self.start_state = game_state.get_pacman_position()
 
         if start is not None:
@@ -307,15 +327,9 @@ class PositionSearchProblem(SearchProblem):
     def get_successors(self, state):
         successors = []
 
-        for action in [Direction.NORTH, Direction.SOUTH, Direction.EAST, Direction.WEST]:
-            x, y = state
-            dx, dy = Actions.direction_to_vector(action)
-            next_x, next_y = int(x + dx), int(y + dy)
-
-            if not self.walls[next_x][next_y]:
-                next_state = (next_x, next_y)
-                cost = self.cost_function(next_state)
-                successors.append((next_state, action, cost))
+        for action, next_state in self.adjacency.get_moves(state):
+            cost = self.cost_function(next_state)
+            successors.append((next_state, action, cost))
 
         self._expanded += 1
         if state not in self._visited:
@@ -358,6 +372,7 @@ class CornersProblem(SearchProblem):
                 print('Warning: no food in corner ' + str(corner))
 
         self._expanded = 0
+        self.heuristic_cache = HeuristicCache(self.walls)
 
         "*** YOUR CODE HERE ***"
 
@@ -395,39 +410,66 @@ class FoodSearchProblem:
     """
     A search problem associated with finding the a path that collects all of
     the food dots in a pacman game.
+
+    A state is a (position, food) pair in which food is a Grid of the food
+    left. Grids keep their cells in one int, so a successor's food is a
+    new Grid around the int with one bit cleared, using a mask worked out
+    ahead for every move; nothing is copied cell by cell, and the state
+    hashes as that int. The Grids in states are shared by the search and
+    must not be modified.
     """
     def __init__(self, starting_game_state):
-        self.start = (starting_game_state.get_pacman_position(), starting_game_state.get_food())
+        food = starting_game_state.get_food()
+        self.start = (starting_game_state.get_pacman_position(), food.copy())
         self.walls = starting_game_state.get_walls()
+        self.adjacency = get_adjacency_table(self.walls)
         self.starting_game_state = starting_game_state
+        self.width, self.height = food.width, food.height
+
+        # The moves out of every cell, each with the mask that clears the
+        # food bit of the cell it leads to.
+        self.moves = {}
+        for cell, moves in self.adjacency.moves.items():
+            self.moves[cell] = tuple((direction, (x, y), ~(1 << (x * self.height + y)))
+                                     for direction, (x, y) in moves)
 
         self._expanded = 0
 
         self.heuristic_info = {}
+        self.heuristic_cache = HeuristicCache(self.walls)
+
+    def food_grid(self, bits):
+        """
+        Returns a Grid holding the given food bits.
+        """
+        grid = Grid(self.width, self.height)
+        grid.bits = bits
+        return grid
 
     def get_start_state(self):
         return self.start
 
     def is_goal_state(self, state):
-        return state[1].count() == 0
+        return state[1].bits == 0
 
     def get_successors(self, state):
-        successors = []
         self._expanded += 1
+        position, food = state
+        bits = food.bits
+        successors = []
 
-        for direction in [Direction.NORTH, Direction.SOUTH, Direction.EAST, Direction.WEST]:
-            x,y = state[0]
-            dx, dy = Actions.direction_to_vector(direction)
-            next_x, next_y = int(x + dx), int(y + dy)
-
-            if not self.walls[next_x][next_y]:
-                next_food = state[1].copy()
-                next_food[next_x][next_y] = False
-                successors.append((((next_x, next_y), next_food), direction, 1))
+        for direction, next_position, mask in self.moves[position]:
+            # Moving onto a cell without food leaves the food as it is.
+            next_bits = bits & mask
+            successors.append(((next_position, food if next_bits == bits else self.food_grid(next_bits)),
+                               direction, 1))
 
         return successors
 
     def get_cost_of_actions(self, actions):
+        if actions is None:
+            return 999999
+
         x, y = self.get_start_state()[0]
         cost = 0
 
@@ -449,6 +491,7 @@ class AnyFoodSearchProblem(PositionSearchProblem):
     def __init__(self, game_state):
         self.food = game_state.get_food()
         self.walls = game_state.get_walls()
+        self.adjacency = get_adjacency_table(self.walls)
         self.start_state = game_state.get_pacman_position()
         self.cost_function = lambda x: 1
         self._visited, self._visited_list, self._expanded = {}, [], 0
@@ -464,7 +507,8 @@ class AnyFoodSearchProblem(PositionSearchProblem):
 def maze_distance(point1, point2, game_state):
     """
     Returns the maze distance between any two points, which can be used by
-    any generic search function.
+    any generic search function. The distance is looked up in the all-pairs
+    distance table of the layout, which is computed on first use.
     """
     x1, y1 = point1
     x2, y2 = point2
@@ -473,6 +517,4 @@ def maze_distance(point1, point2, game_state):
     assert not walls[x1][y1], 'point1 is a wall: ' + str(point1)
     assert not walls[x2][y2], 'point2 is a wall: ' + str(point2)
 
-    prob = PositionSearchProblem(game_state, start=point1, goal=point2, warn=False, visualize=False)
-
-    return len(search.bfs(prob))
+    return game_state.data.layout.get_maze_distances().get_distance(point1, point2)
@@ -0,0 +1,144 @@
+"""
+Measures the cost per move of training ApproximateQAgent with the feature
+pipeline of LinearQFunction against the Counter based version it replaced,
+in which every call of the extractor builds a Counter of named features and
+every Q-value is a dictionary dot product with a Counter of weights.
+
+Both agents train on the same seeded games, with SimpleExtractor against
+RandomGhost, and their final weights are printed.
+
+    python -m benchmarks.approximate_q
+    python -m benchmarks.approximate_q --games 50 --layout small_classic
+"""
+from __future__ import print_function
+
+import argparse
+import random
+import time
+
+import utilities
+from agents_ghosts import RandomGhost
+from agents_q_learning import ApproximateQAgent
+from displays import textual
+from game import layout
+from game.actions import Actions
+from game.feature_extractors import FeatureExtractor, SimpleExtractor, closest_food
+from rules.game_rules import GameRules
+
+
+class LegacySimpleExtractor(FeatureExtractor):
+    def get_features(self, state, action):
+        food = state.get_food()
+        walls = state.get_walls()
+        ghosts = state.get_ghost_positions()
+        adjacency = state.data.layout.adjacency
+
+        features = utilities.Counter()
+        features["bias"] = 1.0
+
+        x, y = state.get_pacman_position()
+        dx, dy = Actions.direction_to_vector(action)
+        next_x, next_y = int(x + dx), int(y + dy)
+
+        features["#-of-ghosts-1-step-away"] = sum((next_x, next_y) in adjacency.get_legal_neighbors(g) for g in ghosts)
+
+        if not features["#-of-ghosts-1-step-away"] and food[next_x][next_y]:
+            features["eats-food"] = 1.0
+
+        dist = closest_food((next_x, next_y), food, walls)
+
+        if dist is not None:
+            features["closest-food"] = float(dist) / (walls.width * walls.height)
+
+        features.divide_all(10.0)
+
+        return features
+
+
+class LegacyApproximateQAgent(ApproximateQAgent):
+    def __init__(self, **args):
+        ApproximateQAgent.__init__(self, **args)
+        self.feat_extractor = LegacySimpleExtractor()
+        self.weights = utilities.Counter()
+
+    def get_weights(self):
+        return self.weights
+
+    def get_q_value(self, state, action):
+        return self.weights * self.feat_extractor.get_features(state, action)
+
+    def compute_value_from_q_values(self, state):
+        legal_actions = self.get_legal_actions(state)
+
+        if not legal_actions:
+            return 0.0
+
+        return max(self.get_q_value(state, action) for action in legal_actions)
+
+    def compute_action_from_q_values(self, state):
+        legal_actions = self.get_legal_actions(state)
+
+        if not legal_actions:
+            return None
+
+        q_values = [self.get_q_value(state, action) for action in legal_actions]
+        best = max(q_values)
+        return random.choice([action for action, value in zip(legal_actions, q_values) if value == best])
+
+    def update(self, state, action, next_state, reward):
+        difference = reward + self.discount * self.compute_value_from_q_values(next_state) - \
+            self.get_q_value(state, action)
+
+        for feature, value in self.feat_extractor.get_features(state, action).items():
+            self.weights[feature] += self.alpha * difference * value
+
+
+def train(board, pacman, num_games, seed):
+    """
+    Plays quiet training games and returns the number of moves made and
+    the time taken.
+    """
+    random.seed(seed)
+    rules = GameRules()
+    ghosts = [RandomGhost(i + 1) for i in range(board.get_ghost_count())]
+    moves = 0
+
+    start_time = time.time()
+
+    for _ in range(num_games):
+        game = rules.new_game(board, pacman, ghosts, textual.NullGraphics(), True, trusted_agents=True)
+        game.run()
+        moves += len(game.move_history)
+
+    return moves, time.time() - start_time
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Approximate Q-learning feature pipeline benchmark")
+
+    parser.add_argument("--layout", default="medium_classic",
+                        help="the layout to train on (default %(default)s)")
+
+    parser.add_argument("--games", type=int, default=20,
+                        help="number of training games for each agent (default %(default)s)")
+
+    parser.add_argument("--seed", type=int, default=0,
+                        help="random seed (default %(default)s)")
+
+    options = parser.parse_args(argv)
+
+    board = layout.get_layout(options.layout)
+    agents = [("counters", lambda: LegacyApproximateQAgent(numTraining=options.games)),
+              ("feature matrix", lambda: ApproximateQAgent(extractor='SimpleExtractor', numTraining=options.games))]
+
+    for label, make_agent in agents:
+        agent = make_agent()
+        moves, elapsed = train(board, agent, options.games, options.seed)
+        print("%-16s %8d moves in %6.2fs  %8.1f us/move" % (label, moves, elapsed, elapsed / moves * 1e6))
+
+        weights = agent.get_weights()
+        print("%16s %s" % ("", ', '.join('%s=%.4f' % (name, weights[name]) for name in SimpleExtractor.schema)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""
+Measures checkpoints of a QLearningAgent (see game/checkpoint.py) with a
+table of many entries: how long the game loop is held up taking the
+snapshot, how long writing and loading the checkpoint take, and the size
+of the file, against pickling the agent's QTable and counters.
+
+With --keys tuples the table has one row for every cell of a square grid,
+with four actions, as gridworld agents learn; states are (x, y) tuples.
+With --keys game-states it is filled by a PacmanQAgent that moves at
+random in quiet training games, so states are GameStates, each with its
+own copy of the layout, as an agent keeps them when it is not trusted.
+
+    python -m benchmarks.checkpoint
+    python -m benchmarks.checkpoint --entries 4000000
+    python -m benchmarks.checkpoint --keys game-states --entries 100000 --layout medium_classic
+"""
+from __future__ import print_function
+
+import argparse
+import os
+import pickle
+import random
+import sys
+import tempfile
+import time
+
+from agents_ghosts import RandomGhost
+from agents_q_learning import PacmanQAgent, QLearningAgent
+from displays import textual
+from game import layout
+from game.checkpoint import load_checkpoint, take_snapshot, write_snapshot
+from rules.game_rules import GameRules
+
+
+def timed(function, *args):
+    start_time = time.time()
+    result = function(*args)
+    return result, time.time() - start_time
+
+
+def pickle_agent(agent, path):
+    f = open(path, 'wb')
+
+    try:
+        pickle.dump((agent.q_values, agent.episodes_so_far, agent.epsilon, agent.alpha), f, pickle.HIGHEST_PROTOCOL)
+    finally:
+        f.close()
+
+
+def unpickle_agent(path):
+    f = open(path, 'rb')
+
+    try:
+        return pickle.load(f)
+    finally:
+        f.close()
+
+
+def grid_agent(entries):
+    """
+    Returns a QLearningAgent whose table has (x, y) tuple states.
+    """
+    actions = ['north', 'south', 'east', 'west']
+    side = int((entries // len(actions)) ** 0.5)
+    agent = QLearningAgent(numTraining=1000)
+
+    for x in range(side):
+        for y in range(side):
+            for action in actions:
+                agent.q_values.set((x, y), action, random.random())
+
+    return agent
+
+
+def game_state_agent(entries, board_name):
+    """
+    Returns a PacmanQAgent whose table has GameState states, from random
+    training games on a board.
+    """
+    board = layout.get_layout(board_name)
+    ghosts = [RandomGhost(i + 1) for i in range(board.get_ghost_count())]
+    agent = PacmanQAgent(numTraining=1000000, epsilon=1.0)
+    rules = GameRules()
+    rules.quiet = True
+
+    # The agent reports on its training every 100 games.
+    stdout, sys.stdout = sys.stdout, open(os.devnull, 'w')
+
+    try:
+        while len(agent.q_values) * 5 < entries:
+            game = rules.new_game(board, agent, ghosts, textual.NullGraphics(), True)
+            game.run()
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+    return agent
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Agent checkpoint benchmark")
+
+    parser.add_argument("--entries", type=int, default=1000000,
+                        help="number of entries in the Q-table (default %(default)s)")
+
+    parser.add_argument("--keys", choices=["tuples", "game-states"], default="tuples",
+                        help="the kind of state in the Q-table (default %(default)s)")
+
+    parser.add_argument("--layout", default="small_classic",
+                        help="the layout played for game-states keys (default %(default)s)")
+
+    parser.add_argument("--seed", type=int, default=0,
+                        help="random seed (default %(default)s)")
+
+    options = parser.parse_args(argv)
+
+    random.seed(options.seed)
+
+    if options.keys == 'tuples':
+        agent = grid_agent(options.entries)
+    else:
+        agent = game_state_agent(options.entries, options.layout)
+
+    agent.episodes_so_far = 500
+    agent_type = agent.__class__
+    print("%d states, %d entries" % (len(agent.q_values), len(agent.q_values) * len(agent.q_values.actions)))
+
+    directory = tempfile.mkdtemp()
+    checkpoint_path = os.path.join(directory, 'agent.ckpt')
+    pickle_path = os.path.join(directory, 'agent.pickle')
+
+    snapshot, snapshot_time = timed(take_snapshot, agent)
+    _, write_time = timed(write_snapshot, snapshot, checkpoint_path)
+    loaded, load_time = timed(load_checkpoint, agent_type(numTraining=1000), checkpoint_path)
+
+    for state in random.sample(agent.q_values.states, 100):
+        for action in agent.q_values.actions:
+            assert loaded.get_q_value(state, action) == agent.get_q_value(state, action)
+
+    assert loaded.episodes_so_far == agent.episodes_so_far
+
+    _, pickle_time = timed(pickle_agent, agent, pickle_path)
+    _, unpickle_time = timed(unpickle_agent, pickle_path)
+
+    print("%-12s %10s %10s %10s %10s" % ("format", "snapshot", "save", "load", "size"))
+    print("%-12s %9.1fms %9.1fms %9.1fms %9.1fMB" % ("checkpoint", snapshot_time * 1e3, write_time * 1e3,
+                                                   load_time * 1e3, os.path.getsize(checkpoint_path) / 1e6))
+    print("%-12s %10s %9.1fms %9.1fms %9.1fMB" % ("pickle", "-", pickle_time * 1e3, unpickle_time * 1e3,
+                                                os.path.getsize(pickle_path) / 1e6))
+
+    os.remove(checkpoint_path)
+    os.remove(pickle_path)
+    os.rmdir(directory)
+
+
+if __name__ == '__main__':
+    main()
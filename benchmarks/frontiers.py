@@ -0,0 +1,121 @@
+"""
+Compares the search frontier containers in utilities with the list and
+heapq versions they replaced. The old PriorityQueue.update is a linear
+scan and a heapify, so the decrease-key case grows quadratically with the
+number of items for that class.
+
+    python -m benchmarks.frontiers
+    python -m benchmarks.frontiers --items 2000
+"""
+from __future__ import print_function
+
+import argparse
+import heapq
+import random
+import time
+
+import utilities
+
+
+class LegacyQueue:
+    def __init__(self):
+        self.list = []
+
+    def push(self, item):
+        self.list.insert(0, item)
+
+    def pop(self):
+        return self.list.pop()
+
+    def is_empty(self):
+        return len(self.list) == 0
+
+
+class LegacyPriorityQueue:
+    def __init__(self):
+        self.heap = []
+        self.count = 0
+
+    def push(self, item, priority):
+        heapq.heappush(self.heap, (priority, self.count, item))
+        self.count += 1
+
+    def pop(self):
+        return heapq.heappop(self.heap)[2]
+
+    def is_empty(self):
+        return len(self.heap) == 0
+
+    def update(self, item, priority):
+        for index, (p, c, i) in enumerate(self.heap):
+            if i == item:
+                if p <= priority:
+                    break
+                del self.heap[index]
+                self.heap.append((priority, c, item))
+                heapq.heapify(self.heap)
+                break
+        else:
+            self.push(item, priority)
+
+
+def fifo(queue_type, items, rng):
+    queue = queue_type()
+    for i in range(items):
+        queue.push(i)
+    while not queue.is_empty():
+        queue.pop()
+
+
+def push_pop(queue_type, items, rng):
+    queue = queue_type()
+    for i in range(items):
+        queue.push(i, rng.randrange(100))
+    while not queue.is_empty():
+        queue.pop()
+
+
+def decrease_key(queue_type, items, rng):
+    # Every item is pushed once and then has its priority lowered a few
+    # times, as in a uniform cost search that keeps finding cheaper paths.
+    queue = queue_type()
+    for i in range(items):
+        queue.push(i, 100 + rng.randrange(100))
+    for _ in range(items):
+        queue.update(rng.randrange(items), rng.randrange(100))
+    while not queue.is_empty():
+        queue.pop()
+
+
+CASES = [
+    ('fifo', fifo, [('Queue (list)', LegacyQueue), ('Queue (deque)', utilities.Queue)]),
+    ('push/pop', push_pop, [('PriorityQueue (heapq)', LegacyPriorityQueue),
+                            ('PriorityQueue (indexed)', utilities.PriorityQueue),
+                            ('BucketQueue', utilities.BucketQueue)]),
+    ('decrease-key', decrease_key, [('PriorityQueue (heapq)', LegacyPriorityQueue),
+                                    ('PriorityQueue (indexed)', utilities.PriorityQueue),
+                                    ('BucketQueue', utilities.BucketQueue)]),
+]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search frontier micro-benchmarks")
+
+    parser.add_argument("--items", type=int, default=10000,
+                        help="number of items pushed in each case (default %(default)s)")
+
+    parser.add_argument("--seed", type=int, default=0,
+                        help="random seed (default %(default)s)")
+
+    options = parser.parse_args(argv)
+
+    for case, run, containers in CASES:
+        for name, container in containers:
+            start_time = time.time()
+            run(container, options.items, random.Random(options.seed))
+            elapsed = time.time() - start_time
+            print("%-14s %-26s %8.3fs  %10.0f items/sec" % (case, name, elapsed, options.items / elapsed))
+
+
+if __name__ == '__main__':
+    main()
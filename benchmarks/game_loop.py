@@ -0,0 +1,74 @@
+"""
+Measures how many moves per second the game loop plays, with and without
+trusted agents (see Game.trusted_agents).
+
+Games are quiet and played in this process, GreedyAgent against
+DirectionalGhost by default. Both modes play the same seeded games.
+
+    python -m benchmarks.game_loop
+    python -m benchmarks.game_loop --games 100 --layout small_classic
+"""
+from __future__ import print_function
+
+import argparse
+import random
+import time
+
+from game import layout
+from displays import textual
+from rules.game_rules import GameRules
+from pacumen import load_agent
+
+
+def play_games(board, pacman_type, ghost_type, num_games, trusted_agents, seed=0):
+    """
+    Plays quiet games and returns the number of moves made and the time
+    taken.
+    """
+    random.seed(seed)
+    rules = GameRules()
+    pacman = pacman_type()
+    ghosts = [ghost_type(i + 1) for i in range(board.get_ghost_count())]
+    moves = 0
+
+    start_time = time.time()
+
+    for _ in range(num_games):
+        game = rules.new_game(board, pacman, ghosts, textual.NullGraphics(), True, trusted_agents=trusted_agents)
+        game.run()
+        moves += len(game.move_history)
+
+    return moves, time.time() - start_time
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Game loop benchmark")
+
+    parser.add_argument("--layout", default="medium_classic",
+                        help="the layout to play on (default %(default)s)")
+
+    parser.add_argument("--pacman", default="GreedyAgent",
+                        help="the Pac-Man agent (default %(default)s)")
+
+    parser.add_argument("--ghosts", default="DirectionalGhost",
+                        help="the ghost agent (default %(default)s)")
+
+    parser.add_argument("--games", type=int, default=1000,
+                        help="number of games to play in each mode (default %(default)s)")
+
+    parser.add_argument("--seed", type=int, default=0,
+                        help="random seed (default %(default)s)")
+
+    options = parser.parse_args(argv)
+
+    board = layout.get_layout(options.layout)
+    pacman_type = load_agent(options.pacman, True)
+    ghost_type = load_agent(options.ghosts, True)
+
+    for label, trusted_agents in [("deep copies", False), ("trusted agents", True)]:
+        moves, elapsed = play_games(board, pacman_type, ghost_type, options.games, trusted_agents, options.seed)
+        print("%-16s %8d moves in %6.2fs  %10.0f moves/sec" % (label, moves, elapsed, moves / elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Compares the searches for point-to-point paths on the maze layouts: the
+nodes each expands, the time it takes and the length of the path found,
+which has to equal that of breadth_first_search.
+
+    python -m benchmarks.grid_search
+    python -m benchmarks.grid_search --layouts big_maze open_maze --repeat 10
+"""
+from __future__ import print_function
+
+import argparse
+import time
+
+import search
+from agents_search import PositionSearchProblem, manhattan_heuristic
+from game.game_state import GameState
+from game.layout import get_layout
+
+MAZES = ['tiny_maze', 'small_maze', 'medium_maze', 'big_maze', 'open_maze', 'contours_maze',
+         'medium_dotted_maze', 'medium_scary_maze']
+
+SEARCHES = [
+    ('bfs', search.breadth_first_search),
+    ('astar', lambda problem: search.astar_search(problem, manhattan_heuristic)),
+    ('bibfs', search.bidirectional_breadth_first_search),
+    ('biastar', search.bidirectional_astar_search),
+    ('jps', search.jump_point_search),
+]
+
+
+def initial_state(name):
+    board = get_layout(name)
+    state = GameState()
+    state.initialize(board, board.get_ghost_count())
+    return state
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Point-to-point search benchmark")
+
+    parser.add_argument("--layouts", nargs="+", default=MAZES,
+                        help="layouts to search, from Pac-Man to (1, 1) (default %(default)s)")
+
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="searches timed per layout, the best is reported (default %(default)s)")
+
+    options = parser.parse_args(argv)
+
+    print("%-20s %-8s %6s %10s %12s" % ("layout", "search", "cost", "expanded", "milliseconds"))
+
+    for name in options.layouts:
+        state = initial_state(name)
+        expected = None
+
+        for search_name, search_function in SEARCHES:
+            best = None
+
+            for _ in range(options.repeat):
+                problem = PositionSearchProblem(state, warn=False, visualize=False)
+                start_time = time.time()
+                actions = search_function(problem)
+                elapsed = time.time() - start_time
+                best = elapsed if best is None else min(best, elapsed)
+
+            cost = problem.get_cost_of_actions(actions)
+
+            if expected is None:
+                expected = cost
+            elif cost != expected:
+                raise AssertionError("%s found a path of cost %d on %s, breadth first search %d" %
+                                     (search_name, cost, name, expected))
+
+            print("%-20s %-8s %6d %10d %12.2f" %
+                  (name, search_name, cost, problem.search_statistics.expanded, best * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Measures hash collisions over game states sampled from real games.
+
+Games are played with a GreedyAgent against random ghosts. Every state
+along each game, and every one-ply successor of those states, is sampled.
+States are compared exactly (agents, food, capsules and score) and each
+hash function is scored by how many distinct states share a hash value
+with some other state.
+
+    python -m benchmarks.hash_collisions
+    python -m benchmarks.hash_collisions --layouts original_classic --games 50
+"""
+from __future__ import print_function
+
+import argparse
+import random
+
+import agents_ghosts
+import agents_pacman
+from displays import textual
+from game import layout
+from rules.game_rules import GameRules
+
+
+def legacy_hash(state):
+    """
+    The GameStateData hash used before Zobrist hashing was introduced.
+    """
+    data = state.data
+    return int((hash(tuple(data.agent_states)) + 13 *
+                hash(data.food) + 113 *
+                hash(tuple(data.capsules)) + 7 *
+                hash(data.score)) % 1048575)
+
+
+def exact_key(state):
+    data = state.data
+    agents = tuple((a.configuration.pos, a.configuration.direction, a.scared_timer) for a in data.agent_states)
+    return agents, data.food.bits, tuple(data.capsules), data.score
+
+
+def sample_states(board, games, seed):
+    random.seed(seed)
+    rules = GameRules()
+    states = {}
+
+    for _ in range(games):
+        ghosts = [agents_ghosts.RandomGhost(i + 1) for i in range(board.get_ghost_count())]
+        game = rules.new_game(board, agents_pacman.GreedyAgent(), ghosts, textual.NullGraphics(), quiet=True)
+        game.run()
+
+        state = rules.initial_state
+        for agent_index, action in game.move_history:
+            states[exact_key(state)] = state
+
+            for other in state.get_legal_actions(agent_index):
+                successor = state.generate_successor(agent_index, other)
+                states[exact_key(successor)] = successor
+
+            state = state.generate_successor(agent_index, action)
+
+    return list(states.values())
+
+
+def count_collisions(states, hash_function):
+    buckets = {}
+
+    for state in states:
+        h = hash_function(state)
+        buckets[h] = buckets.get(h, 0) + 1
+
+    colliding = sum(count for count in buckets.values() if count > 1)
+    return len(buckets), colliding
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="GameState hash collision benchmark")
+
+    parser.add_argument("--layouts", nargs="+", default=["medium_classic", "original_classic"],
+                        help="the layouts to sample states from (default %(default)s)")
+
+    parser.add_argument("--games", type=int, default=10,
+                        help="number of games to sample per layout (default %(default)s)")
+
+    parser.add_argument("--seed", type=int, default=0,
+                        help="random seed for the sampled games (default %(default)s)")
+
+    options = parser.parse_args(argv)
+
+    hash_functions = [
+        ("legacy % 1048575", legacy_hash),
+        ("hash(state)", hash),
+        # The Zobrist hash leaves out the score, so states reached by paths
+        # of different cost share it by design.
+        ("zobrist, no score", lambda state: state.data.zobrist_hash()),
+    ]
+
+    for name in options.layouts:
+        states = sample_states(layout.get_layout(name), options.games, options.seed)
+        print("%s: %d distinct states" % (name, len(states)))
+
+        for label, hash_function in hash_functions:
+            buckets, colliding = count_collisions(states, hash_function)
+            print("  %-18s %8d distinct hashes %8d colliding states (%.4f%%)" %
+                  (label, buckets, colliding, 100.0 * colliding / len(states)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Measures the speedup of ParallelAlphaBetaAgent over its worker count.
+
+For each depth, the same set of states is searched by agents with 1, 2, 4
+and 8 worker processes. The states are taken from a random walk through
+the layout with a fixed seed. A fresh agent is used for every run so that
+no transposition table is shared between runs.
+
+    python -m benchmarks.parallel_search
+    python -m benchmarks.parallel_search --depths 3 4 --workers 1 2 4 --states 2
+"""
+from __future__ import print_function
+
+import argparse
+import multiprocessing
+import random
+import time
+
+from agents_multi import ParallelAlphaBetaAgent
+from game import layout
+from game.game_state import GameState
+
+
+def sample_states(board, count, seed):
+    rng = random.Random(seed)
+    state = GameState()
+    state.initialize(board, board.get_ghost_count())
+    states = [state]
+
+    agent_index = 0
+    while len(states) < count:
+        state = state.generate_successor(agent_index, rng.choice(state.get_legal_actions(agent_index)))
+        agent_index = (agent_index + 1) % state.get_num_agents()
+
+        if state.is_win() or state.is_lose():
+            break
+
+        # Search positions where it is Pac-Man's turn a few moves apart.
+        if agent_index == 0 and rng.random() < 0.2:
+            states.append(state)
+
+    return states
+
+
+def time_search(states, depth, workers):
+    agent = ParallelAlphaBetaAgent(depth=str(depth), workers=str(workers))
+
+    # Start the pool before timing so process start-up is not counted.
+    agent.engine._start_pool()
+
+    start_time = time.time()
+    actions = [agent.get_action(state) for state in states]
+    elapsed = time.time() - start_time
+
+    agent.engine.close()
+    return elapsed, actions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parallel alpha-beta speedup benchmark")
+
+    parser.add_argument("--layout", default="medium_classic",
+                        help="the layout to search (default %(default)s)")
+
+    parser.add_argument("--depths", type=int, nargs="+", default=[3, 4, 5],
+                        help="search depths to measure (default %(default)s)")
+
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8],
+                        help="worker counts to measure (default %(default)s)")
+
+    parser.add_argument("--states", type=int, default=3,
+                        help="number of states searched per run (default %(default)s)")
+
+    parser.add_argument("--seed", type=int, default=0,
+                        help="random seed for choosing the states (default %(default)s)")
+
+    options = parser.parse_args(argv)
+
+    states = sample_states(layout.get_layout(options.layout), options.states, options.seed)
+    print("%s: %d states, %d cpus" % (options.layout, len(states), multiprocessing.cpu_count()))
+
+    for depth in options.depths:
+        baseline, baseline_actions = None, None
+
+        for workers in options.workers:
+            elapsed, actions = time_search(states, depth, workers)
+
+            if baseline is None:
+                baseline, baseline_actions = elapsed, actions
+
+            same = "same actions" if actions == baseline_actions else "DIFFERENT ACTIONS"
+            print("  depth %d  %d workers  %8.2fs  speedup %5.2fx  %s" %
+                  (depth, workers, elapsed, baseline / elapsed, same))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Compares training a learning agent in the game loop with training it in
+actor processes (see game/parallel_training.py): the episodes and
+transitions learned per second, how stale the actors' parameters were,
+and how well the trained agent then plays.
+
+Each run trains a fresh agent and then plays quiet test games with it,
+against RandomGhost, from the same random seed.
+
+    python -m benchmarks.parallel_training
+    python -m benchmarks.parallel_training --pacman PacmanQAgent --layout small_grid --episodes 2000
+"""
+from __future__ import print_function
+
+import argparse
+import os
+import random
+import time
+
+from agents_ghosts import RandomGhost
+from displays import textual
+from game import layout
+from game.parallel_training import train_in_parallel
+from pacumen import load_agent, parse_agent_args
+from rules.game_rules import GameRules
+
+
+def play(board, agent, ghosts, num_games):
+    """
+    Plays quiet games and returns their scores and wins.
+    """
+    rules = GameRules()
+    scores, wins = [], []
+
+    for _ in range(num_games):
+        game = rules.new_game(board, agent, ghosts, textual.NullGraphics(), True, trusted_agents=True)
+        game.run()
+        scores.append(game.state.get_score())
+        wins.append(game.state.is_win())
+
+    return scores, wins
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parallel training benchmark")
+
+    parser.add_argument("--pacman", default="ApproximateQAgent",
+                        help="the learning agent (default %(default)s)")
+
+    parser.add_argument("-a", "--agentArgs", default="extractor=SimpleExtractor",
+                        help="comma separated arguments for the agent (default %(default)s)")
+
+    parser.add_argument("--layout", default="medium_classic",
+                        help="the layout to train on (default %(default)s)")
+
+    parser.add_argument("--episodes", type=int, default=100,
+                        help="number of training episodes (default %(default)s)")
+
+    parser.add_argument("--tests", type=int, default=20,
+                        help="number of test games played after training (default %(default)s)")
+
+    parser.add_argument("--actors", nargs="+", type=int, default=[1, 2, 4],
+                        help="numbers of actor processes to train with (default %(default)s)")
+
+    parser.add_argument("--syncPeriod", type=int, default=10,
+                        help="episodes learned between broadcasts (default %(default)s)")
+
+    parser.add_argument("--seed", type=int, default=0,
+                        help="random seed (default %(default)s)")
+
+    options = parser.parse_args(argv)
+
+    board = layout.get_layout(options.layout)
+    agent_type = load_agent(options.pacman, True)
+    agent_opts = parse_agent_args(options.agentArgs)
+    agent_opts['numTraining'] = options.episodes
+
+    print("%-10s %10s %14s %10s %10s %10s" % ("actors", "episodes/s", "transitions/s", "staleness", "score",
+                                              "win rate"))
+
+    for num_actors in [0] + options.actors:
+        random.seed(options.seed)
+        agent = agent_type(**agent_opts)
+        ghosts = [RandomGhost(i + 1) for i in range(board.get_ghost_count())]
+
+        if num_actors == 0:
+            start_time = time.time()
+            rules = GameRules()
+            transitions = 0
+
+            for _ in range(options.episodes):
+                game = rules.new_game(board, agent, ghosts, textual.NullGraphics(), True, trusted_agents=True)
+                game.run()
+                transitions += sum(1 for index, _ in game.move_history if index == 0)
+
+            elapsed = time.time() - start_time
+            label, rates, staleness = "game loop", (options.episodes / elapsed, transitions / elapsed), 0.0
+        else:
+            statistics = train_in_parallel(agent, board, ghosts, options.episodes, num_actors, options.syncPeriod,
+                                           seed=options.seed, output=open(os.devnull, 'w'))
+            label = "%d" % num_actors
+            rates = (statistics.episodes_per_second(), statistics.transitions_per_second())
+            staleness = statistics.mean_staleness()
+
+        random.seed(options.seed)
+        scores, wins = play(board, agent, ghosts, options.tests)
+
+        print("%-10s %10.1f %14.0f %10.2f %10.1f %10.2f" % (label, rates[0], rates[1], staleness,
+                                                           sum(scores) / float(len(scores)),
+                                                           wins.count(True) / float(len(wins))))
+
+
+if __name__ == '__main__':
+    main()
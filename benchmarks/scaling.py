@@ -0,0 +1,197 @@
+"""
+Measures how the engine scales with the size of the board.
+
+For each size a square layout is generated (see game/layout_generator.py)
+and the following are measured, in time and in peak memory allocated:
+
+    parse        building the Layout from its text
+    position     expanding every state of a PositionSearchProblem, breadth first
+    food         expanding the first states of a FoodSearchProblem, breadth first
+    distances    computing the maze distance table
+    closest_food closest_food from random cells, with the table built
+    game         Game.run, GreedyAgent against RandomGhost, up to a move limit
+
+Memory is measured with tracemalloc in a second run of each step, so that
+tracing does not slow down the timed run.
+
+    python -m benchmarks.scaling
+    python -m benchmarks.scaling --sizes 100 250 500 --walls 0.2
+"""
+from __future__ import print_function
+
+import argparse
+import random
+import time
+import tracemalloc
+
+from agents_ghosts import RandomGhost
+from agents_pacman import GreedyAgent
+from agents_search import PositionSearchProblem, FoodSearchProblem
+from displays import textual
+from game import maze_distances
+from game.feature_extractors import closest_food
+from game.game_state import GameState
+from game.layout import Layout
+from game.layout_generator import generate_layout_text
+from rules.game_rules import GameRules
+
+
+class MoveLimitRules(GameRules):
+    """
+    Ends a game once a number of moves have been made, so that games on
+    large boards take a bounded time.
+    """
+    def __init__(self, max_moves):
+        GameRules.__init__(self)
+        self.max_moves = max_moves
+
+    def process(self, state, game):
+        GameRules.process(self, state, game)
+
+        if len(game.move_history) >= self.max_moves:
+            game.game_over = True
+
+
+def expand(problem, max_states=None):
+    """
+    Expands the states of a search problem breadth first, stopping after
+    max_states expansions. Returns the number of states expanded.
+    """
+    start = problem.get_start_state()
+    seen = set([start])
+    frontier = [start]
+    expanded = 0
+
+    while frontier:
+        next_frontier = []
+
+        for state in frontier:
+            if max_states is not None and expanded >= max_states:
+                return expanded
+
+            expanded += 1
+
+            for successor, _, _ in problem.get_successors(state):
+                if successor not in seen:
+                    seen.add(successor)
+                    next_frontier.append(successor)
+
+        frontier = next_frontier
+
+    return expanded
+
+
+def initial_state(board):
+    state = GameState()
+    state.initialize(board, board.get_ghost_count())
+    return state
+
+
+def benchmark_steps(layout_text, options):
+    """
+    Returns (name, step) pairs. Each step runs one measurement and returns
+    a count of the work it did.
+    """
+    board = Layout(layout_text)
+    state = initial_state(board)
+    rng = random.Random(options.seed)
+    cells = board.walls.as_list(False)
+    sources = [rng.choice(cells) for _ in range(options.queries)]
+
+    def parse():
+        Layout(layout_text)
+        return 1
+
+    def position():
+        return expand(PositionSearchProblem(state, goal=None, warn=False, visualize=False))
+
+    def food():
+        return expand(FoodSearchProblem(state), options.food_states)
+
+    def distances():
+        if len(cells) > maze_distances.MAX_ALL_PAIRS_CELLS:
+            maze_distances.LandmarkDistances(board.walls).compute()
+        else:
+            maze_distances.MazeDistances(board.walls).compute()
+        return 1
+
+    # closest_food uses the shared table, which is built here rather than
+    # in the first timed query.
+    maze_distances.get_maze_distances(board.walls)
+
+    def closest():
+        for source in sources:
+            closest_food(source, board.food, board.walls)
+        return len(sources)
+
+    def game():
+        rules = MoveLimitRules(options.moves)
+        ghosts = [RandomGhost(i + 1) for i in range(board.get_ghost_count())]
+        run = rules.new_game(board, GreedyAgent(), ghosts, textual.NullGraphics(), True, trusted_agents=True)
+        run.run()
+        return len(run.move_history)
+
+    return [('parse', parse), ('position', position), ('food', food), ('distances', distances),
+            ('closest_food', closest), ('game', game)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Board size scaling benchmark")
+
+    parser.add_argument("--sizes", nargs="+", type=int, default=[25, 50, 100, 200],
+                        help="widths (and heights) of the generated layouts (default %(default)s)")
+
+    parser.add_argument("--walls", type=float, default=0.3,
+                        help="wall density of the generated layouts (default %(default)s)")
+
+    parser.add_argument("--food", type=float, default=0.5,
+                        help="food density of the generated layouts (default %(default)s)")
+
+    parser.add_argument("--ghosts", type=int, default=2,
+                        help="number of ghosts (default %(default)s)")
+
+    parser.add_argument("--food-states", dest="food_states", type=int, default=2000,
+                        help="FoodSearchProblem states to expand (default %(default)s)")
+
+    parser.add_argument("--queries", type=int, default=100,
+                        help="closest_food queries (default %(default)s)")
+
+    parser.add_argument("--moves", type=int, default=2000,
+                        help="move limit of the game (default %(default)s)")
+
+    parser.add_argument("--no-memory", dest="memory", default=True, action="store_false",
+                        help="skip the memory measurements")
+
+    parser.add_argument("--seed", type=int, default=0,
+                        help="random seed (default %(default)s)")
+
+    options = parser.parse_args(argv)
+
+    print("%6s %8s  %-12s %10s %10s %12s %12s" % ("size", "cells", "step", "count", "seconds", "per second",
+                                                 "peak KB"))
+
+    for size in options.sizes:
+        layout_text = generate_layout_text(size, size, options.walls, options.food, 4, options.ghosts,
+                                           options.seed)
+        num_cells = sum(len(row) - row.count('%') for row in layout_text)
+
+        for name, step in benchmark_steps(layout_text, options):
+            random.seed(options.seed)
+            start_time = time.time()
+            count = step()
+            elapsed = time.time() - start_time
+
+            peak = float('nan')
+            if options.memory:
+                random.seed(options.seed)
+                tracemalloc.start()
+                step()
+                peak = tracemalloc.get_traced_memory()[1] / 1024.0
+                tracemalloc.stop()
+
+            print("%6d %8d  %-12s %10d %10.3f %12.0f %12.0f" %
+                  (size, num_cells, name, count, elapsed, count / elapsed if elapsed else 0, peak))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Measures the memory held per GameState in a large search tree.
+
+A tree is built breadth first from the initial state of a layout, keeping
+every generated successor alive, until it holds the requested number of
+nodes. The memory allocated while building it (as reported by tracemalloc)
+is divided by the number of nodes.
+
+    python -m benchmarks.state_memory
+    python -m benchmarks.state_memory --layout original_classic --nodes 1000000
+"""
+from __future__ import print_function
+
+import argparse
+import time
+import tracemalloc
+
+from game import layout
+from game.game_state import GameState
+
+
+def build_tree(board, nodes):
+    root = GameState()
+    root.initialize(board, board.get_ghost_count())
+    num_agents = root.get_num_agents()
+
+    tree = [root]
+    frontier = [(root, 0)]
+
+    while frontier and len(tree) < nodes:
+        next_frontier = []
+
+        for state, agent_index in frontier:
+            for action in state.get_legal_actions(agent_index):
+                successor = state.generate_successor(agent_index, action)
+                tree.append(successor)
+                next_frontier.append((successor, (agent_index + 1) % num_agents))
+
+                if len(tree) >= nodes:
+                    return tree
+
+        frontier = next_frontier
+
+    return tree
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="GameState memory footprint benchmark")
+
+    parser.add_argument("--layout", default="medium_classic",
+                        help="the layout to build the tree on (default %(default)s)")
+
+    parser.add_argument("--nodes", type=int, default=100000,
+                        help="number of states to keep in the tree (default %(default)s)")
+
+    options = parser.parse_args(argv)
+    board = layout.get_layout(options.layout)
+
+    tracemalloc.start()
+    start_time = time.time()
+    baseline, _ = tracemalloc.get_traced_memory()
+
+    tree = build_tree(board, options.nodes)
+
+    current, peak = tracemalloc.get_traced_memory()
+    elapsed = time.time() - start_time
+    tracemalloc.stop()
+
+    per_state = float(current - baseline) / len(tree)
+    print("%s: %d states in %.1fs" % (options.layout, len(tree), elapsed))
+    print("  %.0f bytes per state, %.1f MB for a tree of 1,000,000 states" %
+          (per_state, per_state * 1000000 / (1024 * 1024)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Measures how many GameState successors can be generated per second.
+
+The benchmark expands game trees the way a multi-agent search would: from
+every visited state it generates the successor for each legal action of
+the agent to move, then follows one of them at random. Games that end are
+restarted from the initial state of the layout.
+
+    python -m benchmarks.successors
+    python -m benchmarks.successors --layouts medium_classic --seconds 10
+"""
+from __future__ import print_function
+
+import argparse
+import random
+import time
+
+from game import layout
+from game.game_state import GameState
+
+
+def count_successors(board, seconds, seed=0):
+    """
+    Expands successors on the given layout for roughly the given number of
+    seconds. Returns the number of successors generated and the time taken.
+    """
+    rng = random.Random(seed)
+    initial_state = GameState()
+    initial_state.initialize(board, board.get_ghost_count())
+    num_agents = initial_state.get_num_agents()
+
+    state = initial_state
+    agent_index = 0
+    generated = 0
+
+    start_time = time.time()
+    deadline = start_time + seconds
+
+    while time.time() < deadline:
+        for _ in range(100):
+            if state.is_win() or state.is_lose():
+                state, agent_index = initial_state, 0
+
+            successors = [state.generate_successor(agent_index, action)
+                          for action in state.get_legal_actions(agent_index)]
+            generated += len(successors)
+
+            state = rng.choice(successors)
+            agent_index = (agent_index + 1) % num_agents
+
+    return generated, time.time() - start_time
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="GameState successor generation benchmark")
+
+    parser.add_argument("--layouts", nargs="+", default=["medium_classic", "original_classic"],
+                        help="the layouts to benchmark (default %(default)s)")
+
+    parser.add_argument("--seconds", type=float, default=5.0,
+                        help="time to spend on each layout (default %(default)s)")
+
+    parser.add_argument("--seed", type=int, default=0,
+                        help="random seed used to walk the game tree (default %(default)s)")
+
+    options = parser.parse_args(argv)
+
+    for name in options.layouts:
+        board = layout.get_layout(name)
+        generated, elapsed = count_successors(board, options.seconds, options.seed)
+        print("%-20s %10d successors in %5.2fs  %10.0f successors/sec" %
+              (name, generated, elapsed, generated / elapsed))
+
+
+if __name__ == '__main__':
+    main()
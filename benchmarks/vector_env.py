@@ -0,0 +1,69 @@
+"""
+Measures how many environment steps per second a VectorPacmanEnv runs.
+
+Pac-Man takes a random legal action in every game; the ghosts follow the
+chosen policy. One env-step is one move by Pac-Man and every ghost in one
+game.
+
+    python -m benchmarks.vector_env
+    python -m benchmarks.vector_env --envs 256 --ghosts directional
+"""
+from __future__ import print_function
+
+import argparse
+import random
+import time
+
+from game import layout
+from game.vector_env import VectorPacmanEnv, RANDOM_GHOSTS, DIRECTIONAL_GHOSTS
+
+
+def count_env_steps(board, num_envs, ghost_policy, seconds, seed=0):
+    """
+    Steps the environments for roughly the given number of seconds. Returns
+    the number of env-steps taken, games finished, and the time taken.
+    """
+    rng = random.Random(seed)
+    env = VectorPacmanEnv(board, num_envs, ghost_policy=ghost_policy, seed=seed)
+    steps = 0
+
+    start_time = time.time()
+    deadline = start_time + seconds
+
+    while time.time() < deadline:
+        actions = [rng.choice(env.get_legal_actions(i)) for i in range(num_envs)]
+        env.step(actions)
+        steps += num_envs
+
+    return steps, len(env.finished_games), time.time() - start_time
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Vectorized environment benchmark")
+
+    parser.add_argument("--layouts", nargs="+", default=["small_classic", "medium_classic"],
+                        help="the layouts to benchmark (default %(default)s)")
+
+    parser.add_argument("--envs", type=int, default=64,
+                        help="number of games stepped together (default %(default)s)")
+
+    parser.add_argument("--ghosts", choices=[RANDOM_GHOSTS, DIRECTIONAL_GHOSTS], default=RANDOM_GHOSTS,
+                        help="ghost policy (default %(default)s)")
+
+    parser.add_argument("--seconds", type=float, default=5.0,
+                        help="time to spend on each layout (default %(default)s)")
+
+    parser.add_argument("--seed", type=int, default=0,
+                        help="random seed (default %(default)s)")
+
+    options = parser.parse_args(argv)
+
+    for name in options.layouts:
+        board = layout.get_layout(name)
+        steps, games, elapsed = count_env_steps(board, options.envs, options.ghosts, options.seconds, options.seed)
+        print("%-20s %10d env-steps (%d games) in %5.2fs  %10.0f env-steps/sec" %
+              (name, steps, games, elapsed, steps / elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+from .actions import Actions
+from .direction import Direction
+
+ADJACENCY_TABLE_CACHE = {}
+
+
+class AdjacencyTable:
+    """
+    A one-time table of the legal moves on a board. For every open cell it
+    holds the directions that can be taken from that cell and the cells
+    those directions lead to, so legal moves do not have to be worked out
+    from the walls on every call.
+
+    The directions are listed in the same order used by Actions so that
+    anything built on the table behaves the same as the Actions helpers.
+    """
+    def __init__(self, walls):
+        self.walls = walls
+        self.actions = {}
+        self.neighbors = {}
+        self.moves = {}
+
+        for x, y in walls.as_list(False):
+            actions = []
+            neighbors = []
+            moves = []
+
+            for direction, (dx, dy) in Actions.directions_as_list:
+                next_x, next_y = x + dx, y + dy
+
+                if next_x < 0 or next_x >= walls.width or next_y < 0 or next_y >= walls.height:
+                    continue
+                if walls[next_x][next_y]:
+                    continue
+
+                actions.append(direction)
+                neighbors.append((next_x, next_y))
+
+                if direction != Direction.STOP:
+                    moves.append((direction, (next_x, next_y)))
+
+            self.actions[(x, y)] = tuple(actions)
+            self.neighbors[(x, y)] = tuple(neighbors)
+            self.moves[(x, y)] = tuple(moves)
+
+    def get_possible_actions(self, config):
+        """
+        Returns the same list as Actions.get_possible_actions. Positions that
+        are between cells are not in the table and are handed off to Actions.
+        """
+        actions = self.actions.get(config.pos)
+
+        if actions is None:
+            return Actions.get_possible_actions(config, self.walls)
+
+        return list(actions)
+
+    def get_legal_neighbors(self, position):
+        """
+        Returns the same list as Actions.get_legal_neighbors.
+        """
+        x, y = position
+        neighbors = self.neighbors.get((int(x + 0.5), int(y + 0.5)))
+
+        if neighbors is None:
+            return Actions.get_legal_neighbors(position, self.walls)
+
+        return list(neighbors)
+
+    def get_moves(self, position):
+        """
+        Returns (direction, next_position) pairs for every move other than
+        stopping that can be made from an open cell. This is the form used
+        by the successor functions of search problems.
+        """
+        moves = self.moves.get(position)
+
+        if moves is None:
+            x, y = position
+            moves = tuple((direction, (x + dx, y + dy))
+                          for direction, (dx, dy) in Actions.directions_as_list
+                          if direction != Direction.STOP and not self.walls[x + dx][y + dy])
+
+        return moves
+
+
+def get_adjacency_table(walls):
+    """
+    Returns the adjacency table for a wall grid. Boards with the same walls,
+    such as copies of one layout, share a single table.
+    """
+    key = (walls.width, walls.height, walls.bits)
+
+    if key not in ADJACENCY_TABLE_CACHE:
+        ADJACENCY_TABLE_CACHE[key] = AdjacencyTable(walls)
+
+    return ADJACENCY_TABLE_CACHE[key]
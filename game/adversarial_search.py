@@ -0,0 +1,383 @@
+import multiprocessing
+import time
+from collections import OrderedDict
+
+# Kinds of value a transposition table entry can hold. Alpha-beta pruning
+# means a value is sometimes only known to be a bound on the true value.
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+# Limit on the number of plies iterative deepening will go to when it is
+# told to keep deepening until it runs out of time.
+MAX_DEEPENING_DEPTH = 50
+
+# How many nodes are searched between checks of the clock.
+NODES_PER_CLOCK_CHECK = 256
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class TableEntry:
+    __slots__ = ('depth', 'value', 'flag', 'best_action')
+
+    def __init__(self, depth, value, flag, best_action):
+        self.depth = depth
+        self.value = value
+        self.flag = flag
+        self.best_action = best_action
+
+
+class TranspositionTable:
+    """
+    A bounded table of search results keyed on game state hashes.
+
+    When the table is full the least recently used entry is evicted. An
+    entry is not replaced by a result from a shallower search of the same
+    state, since the deeper result is worth more.
+    """
+    def __init__(self, max_size=100000):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, key):
+        entry = self.entries.get(key)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def store(self, key, depth, value, flag, best_action):
+        entry = self.entries.get(key)
+
+        if entry is not None:
+            self.entries.move_to_end(key)
+            if entry.depth > depth:
+                return
+
+        self.entries[key] = TableEntry(depth, value, flag, best_action)
+
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        self.entries.clear()
+
+
+class AdversarialSearch:
+    """
+    A depth-limited game tree search for Pac-Man against the ghosts.
+
+    Pac-Man (agent 0) maximizes the evaluation function. The ghosts either
+    minimize it (minimax, optionally with alpha-beta pruning) or choose
+    uniformly at random among their legal actions (expectimax). A depth of
+    one ply means that every agent moves once.
+
+    Searches are run by iterative deepening. Results are kept in a
+    transposition table, which also provides the move to try first when a
+    state is searched again.
+    """
+    def __init__(self, evaluation_function, expectimax=False, pruning=False, table=None):
+        self.evaluation_function = evaluation_function
+        self.expectimax = expectimax
+        self.pruning = pruning and not expectimax
+        self.table = table if table is not None else TranspositionTable()
+        self.deadline = None
+        self.nodes = 0
+        self.completed_depth = 0
+
+    def get_action(self, game_state, depth, deadline=None, deepen=False):
+        """
+        Returns the best action for Pac-Man. Iterations of increasing depth
+        are run up to the given depth, or beyond it when deepen is set,
+        until the deadline (a time.time() value) is reached. The action of
+        the deepest completed iteration is returned.
+        """
+        self.deadline = deadline
+        self.nodes = 0
+        self.completed_depth = 0
+
+        legal_actions = game_state.get_legal_actions(0)
+        best_action = legal_actions[0] if legal_actions else None
+        max_depth = MAX_DEEPENING_DEPTH if deepen else depth
+
+        for current_depth in range(1, max_depth + 1):
+            try:
+                best_action = self._search_root(game_state, current_depth, legal_actions, best_action)
+            except SearchTimeout:
+                break
+
+            self.completed_depth = current_depth
+
+            if deadline is not None and time.time() >= deadline:
+                break
+
+        return best_action
+
+    def _search_root(self, game_state, depth, legal_actions, previous_best):
+        num_agents = game_state.get_num_agents()
+        remaining = depth * num_agents
+
+        # Try the previous iteration's choice first; it gives alpha-beta
+        # the tightest bound to search the other moves with.
+        ordered = list(legal_actions)
+        if previous_best in ordered:
+            ordered.remove(previous_best)
+            ordered.insert(0, previous_best)
+
+        best_value, best_index = None, None
+        alpha = float('-inf')
+
+        for action in ordered:
+            successor = game_state.generate_successor(0, action)
+            value = self._value(successor, 1 % num_agents, remaining - 1, alpha, float('inf'))
+            index = legal_actions.index(action)
+
+            # Ties go to the action that comes first in the legal order, so
+            # move ordering never changes which action is chosen.
+            if best_value is None or value > best_value or (value == best_value and index < best_index):
+                best_value, best_index = value, index
+
+            if self.pruning:
+                alpha = max(alpha, best_value)
+
+        return legal_actions[best_index]
+
+    def search_root_move(self, game_state, action, depth, shared_alpha=None):
+        """
+        Returns the value of a single root move searched to the given depth.
+        This is what a worker process runs when the root moves are split
+        across processes.
+
+        With alpha-beta pruning, shared_alpha is a shared memory value
+        holding the best root value found by any worker so far. It is read
+        again before each reply of the first ghost, so a worker can prune
+        with bounds found by the others. A move whose value comes back below
+        that bound cannot be the best move; any other value is exact.
+        """
+        num_agents = game_state.get_num_agents()
+        remaining = depth * num_agents - 1
+        successor = game_state.generate_successor(0, action)
+
+        if shared_alpha is None or not self.pruning or num_agents == 1 or remaining == 0 \
+                or successor.is_win() or successor.is_lose():
+            alpha = shared_alpha.value if shared_alpha is not None and self.pruning else float('-inf')
+            return self._value(successor, 1 % num_agents, remaining, alpha, float('inf'))
+
+        best = float('inf')
+        for ghost_action in successor.get_legal_actions(1):
+            alpha = shared_alpha.value
+            if best < alpha:
+                break
+
+            value = self._value(successor.generate_successor(1, ghost_action), 2 % num_agents, remaining - 1,
+                                alpha, best)
+            best = min(best, value)
+
+        return best
+
+    def _value(self, state, agent_index, remaining, alpha, beta):
+        self.nodes += 1
+        if self.deadline is not None and self.nodes % NODES_PER_CLOCK_CHECK == 0:
+            if time.time() >= self.deadline:
+                raise SearchTimeout()
+
+        if remaining == 0 or state.is_win() or state.is_lose():
+            return self.evaluation_function(state)
+
+        key = (state.data.zobrist_hash(), state.data.score, agent_index)
+        entry = self.table.lookup(key)
+
+        if entry is not None and entry.depth >= remaining:
+            if entry.flag == EXACT:
+                return entry.value
+            if self.pruning:
+                if entry.flag == LOWER_BOUND:
+                    alpha = max(alpha, entry.value)
+                else:
+                    beta = min(beta, entry.value)
+                if alpha >= beta:
+                    return entry.value
+
+        actions = state.get_legal_actions(agent_index)
+        if entry is not None and entry.best_action in actions:
+            actions.remove(entry.best_action)
+            actions.insert(0, entry.best_action)
+
+        next_agent = (agent_index + 1) % state.get_num_agents()
+        original_alpha, original_beta = alpha, beta
+        best_action = None
+
+        if agent_index == 0:
+            best = float('-inf')
+            for action in actions:
+                value = self._value(state.generate_successor(agent_index, action), next_agent, remaining - 1,
+                                    alpha, beta)
+                if value > best:
+                    best, best_action = value, action
+                if self.pruning:
+                    if best > beta:
+                        break
+                    alpha = max(alpha, best)
+        elif self.expectimax:
+            best = 0.0
+            for action in actions:
+                best += self._value(state.generate_successor(agent_index, action), next_agent, remaining - 1,
+                                    alpha, beta)
+            best /= len(actions)
+        else:
+            best = float('inf')
+            for action in actions:
+                value = self._value(state.generate_successor(agent_index, action), next_agent, remaining - 1,
+                                    alpha, beta)
+                if value < best:
+                    best, best_action = value, action
+                if self.pruning:
+                    if best < alpha:
+                        break
+                    beta = min(beta, best)
+
+        if not self.pruning:
+            flag = EXACT
+        elif best <= original_alpha:
+            flag = UPPER_BOUND
+        elif best >= original_beta:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+
+        self.table.store(key, remaining, best, flag, best_action)
+        return best
+
+
+# The engine and shared bound of a worker process in a ParallelRootSearch.
+_worker_engine = None
+_worker_alpha = None
+
+
+def _initialize_worker(evaluation_function, expectimax, pruning, table_size, shared_alpha):
+    global _worker_engine, _worker_alpha
+    _worker_engine = AdversarialSearch(evaluation_function, expectimax, pruning, TranspositionTable(table_size))
+    _worker_alpha = shared_alpha
+
+
+def _search_root_move(task):
+    game_state, action, depth, deadline = task
+    _worker_engine.deadline = deadline
+
+    try:
+        value = _worker_engine.search_root_move(game_state, action, depth, _worker_alpha)
+    except SearchTimeout:
+        return None
+
+    with _worker_alpha.get_lock():
+        if value > _worker_alpha.value:
+            _worker_alpha.value = value
+
+    return value
+
+
+class ParallelRootSearch:
+    """
+    Runs an AdversarialSearch with the moves at the root of each iteration
+    split across a pool of worker processes. Each worker keeps its own
+    transposition table between moves.
+
+    The chosen action does not depend on how the work is scheduled: values
+    that could have been cut short by another worker's bound are always
+    lower than the best value, and ties still go to the first legal action.
+
+    The pool is started on first use and stopped by close, or on leaving a
+    with block. Daemon processes, such as the workers of a batch runner,
+    may not start processes of their own, so in one of those the search
+    runs serially in this process instead.
+    """
+    def __init__(self, evaluation_function, workers, expectimax=False, pruning=False, table_size=100000):
+        self.evaluation_function = evaluation_function
+        self.workers = workers
+        self.expectimax = expectimax
+        self.pruning = pruning and not expectimax
+        self.table_size = table_size
+        self.shared_alpha = None
+        self.pool = None
+        self.serial = None
+        self.completed_depth = 0
+
+    def _start_pool(self):
+        self.shared_alpha = multiprocessing.Value('d', float('-inf'))
+        self.pool = multiprocessing.Pool(self.workers, _initialize_worker,
+                                         (self.evaluation_function, self.expectimax, self.pruning,
+                                          self.table_size, self.shared_alpha))
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def get_action(self, game_state, depth, deadline=None, deepen=False):
+        """
+        Works like AdversarialSearch.get_action.
+        """
+        if multiprocessing.current_process().daemon:
+            if self.serial is None:
+                self.serial = AdversarialSearch(self.evaluation_function, self.expectimax, self.pruning,
+                                                TranspositionTable(self.table_size))
+
+            action = self.serial.get_action(game_state, depth, deadline, deepen)
+            self.completed_depth = self.serial.completed_depth
+            return action
+
+        if self.pool is None:
+            self._start_pool()
+
+        self.completed_depth = 0
+        legal_actions = game_state.get_legal_actions(0)
+        best_action = legal_actions[0] if legal_actions else None
+        max_depth = MAX_DEEPENING_DEPTH if deepen else depth
+
+        for current_depth in range(1, max_depth + 1):
+            ordered = list(legal_actions)
+            if best_action in ordered:
+                ordered.remove(best_action)
+                ordered.insert(0, best_action)
+
+            self.shared_alpha.value = float('-inf')
+            tasks = [(game_state, action, current_depth, deadline) for action in ordered]
+            values = self.pool.map(_search_root_move, tasks, chunksize=1)
+
+            if None in values:
+                break
+
+            best_value, best_index = None, None
+            for action, value in zip(ordered, values):
+                index = legal_actions.index(action)
+                if best_value is None or value > best_value or (value == best_value and index < best_index):
+                    best_value, best_index = value, index
+
+            best_action = legal_actions[best_index]
+            self.completed_depth = current_depth
+
+            if deadline is not None and time.time() >= deadline:
+                break
+
+        return best_action
@@ -1,4 +1,6 @@
 class AgentState:
+    __slots__ = ('start', 'configuration', 'is_pacman', 'scared_timer', 'num_carrying', 'num_returned')
+
     def __init__(self, start_configuration, is_pacman):
         self.start = start_configuration
         self.configuration = start_configuration
@@ -19,12 +21,29 @@ class AgentState:
 
         return self.configuration == other.configuration and self.scared_timer == other.scared_timer
 
+    def __ne__(self, other):
+        return not self == other
+
     def __hash__(self):
+        # The configuration caches its own hash, so this stays cheap even
+        # though an agent state can change and cannot cache one itself.
         return hash(hash(self.configuration) + 13 * hash(self.scared_timer))
 
+    # Every state kept by a learning agent holds agent states, so these are
+    # spelled out rather than looping over the slots.
+    def __getstate__(self):
+        return (self.start, self.configuration, self.is_pacman, self.scared_timer, self.num_carrying,
+                self.num_returned)
+
+    def __setstate__(self, state):
+        (self.start, self.configuration, self.is_pacman, self.scared_timer, self.num_carrying,
+         self.num_returned) = state
+
     def copy(self):
-        state = AgentState(self.start, self.is_pacman)
+        state = AgentState.__new__(AgentState)
+        state.start = self.start
         state.configuration = self.configuration
+        state.is_pacman = self.is_pacman
         state.scared_timer = self.scared_timer
         state.num_carrying = self.num_carrying
         state.num_returned = self.num_returned
@@ -0,0 +1,311 @@
+import copyreg
+import io
+import os
+import pickle
+import struct
+import sys
+import threading
+from array import array
+
+from .layout import Layout
+
+_FILE_MAGIC = b'PCKP'
+_FILE_VERSION = 1
+_FILE_HEADER = struct.Struct('<4sHI')
+
+# Each section is named and is either an array of numbers, stored as
+# little-endian bytes, a single pickle, or a list pickled in chunks. The
+# layouts of the states in the pickles are written once, in the first
+# section, and the pickles refer to them by index.
+_SECTION_HEADER = struct.Struct('<32sccQ')
+_CHUNK_LENGTH = struct.Struct('<Q')
+_ARRAY, _PICKLE, _LIST = b'a', b'p', b'l'
+_LAYOUTS = 'layouts'
+
+# Lists are pickled this many items at a time, so that a checkpoint written
+# in the background lets the game loop run between chunks.
+LIST_CHUNK_SIZE = 1024
+
+# The attributes of a ReinforcementAgent that a checkpoint keeps besides
+# what it has learned.
+AGENT_FIELDS = ['episodes_so_far', 'accum_train_rewards', 'accum_test_rewards', 'epsilon', 'alpha', 'discount']
+
+
+def _little_endian_bytes(values):
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+
+    return values.tobytes()
+
+
+def _layout(index):
+    # Stands for a layout in the pickles of a checkpoint; LayoutUnpickler
+    # looks the index up instead of calling this.
+    raise pickle.UnpicklingError("layout %d is only known to a checkpoint" % index)
+
+
+class LayoutPickler:
+    """
+    Pickles values, writing each layout met as an index into a table of
+    layout texts rather than as its text. Every state a learning agent
+    keeps has its own copy of the layout, which would otherwise be pickled
+    and then parsed again on loading once for each state.
+    """
+    def __init__(self):
+        self.layout_ids = {}
+        self.dispatch_table = copyreg.dispatch_table.copy()
+        self.dispatch_table[Layout] = self._reduce_layout
+
+    def _reduce_layout(self, layout):
+        text = tuple(layout.layout_text)
+        layout_id = self.layout_ids.get(text)
+
+        if layout_id is None:
+            layout_id = self.layout_ids[text] = len(self.layout_ids)
+
+        return _layout, (layout_id,)
+
+    def dumps(self, value):
+        buffer = io.BytesIO()
+        pickler = pickle.Pickler(buffer, pickle.HIGHEST_PROTOCOL)
+        pickler.dispatch_table = self.dispatch_table
+        pickler.dump(value)
+        return buffer.getvalue()
+
+    def layout_texts(self):
+        texts = [None] * len(self.layout_ids)
+
+        for text, layout_id in self.layout_ids.items():
+            texts[layout_id] = list(text)
+
+        return texts
+
+
+class LayoutUnpickler(pickle.Unpickler):
+    """
+    Unpickles what a LayoutPickler pickled, giving every state that had a
+    copy of the same layout one shared Layout, parsed once.
+    """
+    def __init__(self, data, layouts):
+        pickle.Unpickler.__init__(self, io.BytesIO(data))
+        self.layouts = layouts
+
+    def find_class(self, module, name):
+        if module == __name__ and name == '_layout':
+            return self.layouts.__getitem__
+
+        return pickle.Unpickler.find_class(self, module, name)
+
+
+def _sections(snapshot):
+    """
+    Yields the header and body of every section of a snapshot, pickling
+    lists one chunk at a time, and last the layouts the pickles refer to.
+    """
+    pickler = LayoutPickler()
+
+    for name in sorted(snapshot):
+        value = snapshot[name]
+        key = name.encode('ascii')
+
+        if isinstance(value, array):
+            body = _little_endian_bytes(value)
+            yield _SECTION_HEADER.pack(key, _ARRAY, value.typecode.encode('ascii'), len(body)), [body]
+        elif isinstance(value, list):
+            chunks = []
+
+            for start in range(0, len(value), LIST_CHUNK_SIZE):
+                chunk = pickler.dumps(value[start:start + LIST_CHUNK_SIZE])
+                chunks.append(_CHUNK_LENGTH.pack(len(chunk)))
+                chunks.append(chunk)
+
+            yield _SECTION_HEADER.pack(key, _LIST, b' ', sum(len(chunk) for chunk in chunks)), chunks
+        else:
+            body = pickler.dumps(value)
+            yield _SECTION_HEADER.pack(key, _PICKLE, b' ', len(body)), [body]
+
+    body = pickle.dumps(pickler.layout_texts(), pickle.HIGHEST_PROTOCOL)
+    yield _SECTION_HEADER.pack(_LAYOUTS.encode('ascii'), _PICKLE, b' ', len(body)), [body]
+
+
+def _read_exactly(f, length, source):
+    data = f.read(length)
+
+    if len(data) != length:
+        raise ValueError("%s is not a complete agent checkpoint" % source)
+
+    return data
+
+
+def _read_sections(f, source):
+    magic, version, count = _FILE_HEADER.unpack(_read_exactly(f, _FILE_HEADER.size, source))
+
+    if magic != _FILE_MAGIC or version != _FILE_VERSION:
+        raise ValueError("%s is not an agent checkpoint" % source)
+
+    snapshot = {}
+    layouts = []
+
+    for _ in range(count):
+        key, kind, typecode, length = _SECTION_HEADER.unpack(_read_exactly(f, _SECTION_HEADER.size, source))
+
+        if kind == _ARRAY:
+            # Arrays are read straight from the file, without a copy.
+            value = array(typecode.decode('ascii'))
+
+            try:
+                value.fromfile(f, length // value.itemsize)
+            except EOFError:
+                raise ValueError("%s is not a complete agent checkpoint" % source)
+
+            if sys.byteorder != 'little':
+                value.byteswap()
+        elif kind == _LIST:
+            body = _read_exactly(f, length, source)
+            value = []
+            position = 0
+
+            while position < length:
+                chunk_length, = _CHUNK_LENGTH.unpack_from(body, position)
+                position += _CHUNK_LENGTH.size
+                value.extend(LayoutUnpickler(body[position:position + chunk_length], layouts).load())
+                position += chunk_length
+        else:
+            value = LayoutUnpickler(_read_exactly(f, length, source), layouts).load()
+
+        name = key.rstrip(b'\0').decode('ascii')
+
+        if name == _LAYOUTS:
+            layouts = [Layout(text) for text in value]
+        else:
+            snapshot[name] = value
+
+    return snapshot
+
+
+def take_snapshot(agent):
+    """
+    Returns a copy of everything a checkpoint of a ReinforcementAgent holds:
+    the agent's own snapshot of what it has learned (see
+    ReinforcementAgent.get_snapshot) and the fields in AGENT_FIELDS.
+    """
+    snapshot = agent.get_snapshot()
+    snapshot['agent'] = dict((field, getattr(agent, field)) for field in AGENT_FIELDS)
+    snapshot['agent']['class'] = agent.__class__.__name__
+    snapshot['agent']['in_training'] = agent.is_in_training()
+    return snapshot
+
+
+def write_snapshot(snapshot, path):
+    """
+    Writes a snapshot to a temporary file and renames it into place, so the
+    file at path is always a complete checkpoint.
+    """
+    temporary = '%s.%d.tmp' % (path, os.getpid())
+    sections = list(_sections(snapshot))
+
+    # The layouts come last from _sections but are needed first.
+    sections.insert(0, sections.pop())
+    f = open(temporary, 'wb')
+
+    try:
+        f.write(_FILE_HEADER.pack(_FILE_MAGIC, _FILE_VERSION, len(sections)))
+
+        for header, chunks in sections:
+            f.write(header)
+
+            for chunk in chunks:
+                f.write(chunk)
+    finally:
+        f.close()
+
+    os.replace(temporary, path)
+
+
+def save_checkpoint(agent, path):
+    write_snapshot(take_snapshot(agent), path)
+
+
+def load_checkpoint(agent, path):
+    """
+    Restores an agent of the class that saved a checkpoint to the state it
+    was saved in. An agent still in training keeps the epsilon and alpha it
+    was made with if the checkpoint was saved after training was done, so
+    that training can be resumed with more episodes than before.
+    """
+    f = open(path, 'rb')
+
+    try:
+        snapshot = _read_sections(f, path)
+    finally:
+        f.close()
+
+    fields = snapshot.pop('agent')
+
+    if fields['class'] != agent.__class__.__name__:
+        raise ValueError("%s is a checkpoint of a %s, not a %s" % (path, fields['class'], agent.__class__.__name__))
+
+    agent.set_snapshot(snapshot)
+
+    for field in AGENT_FIELDS:
+        if field not in ('epsilon', 'alpha') or fields['in_training'] or not agent.is_in_training():
+            setattr(agent, field, fields[field])
+
+    return agent
+
+
+class Checkpointer:
+    """
+    Saves checkpoints of a ReinforcementAgent while it trains.
+
+    after_episode is called when each training episode ends. Every period
+    episodes it takes a snapshot of the agent, which copies the arrays it
+    has learned but not the states and other objects it keeps, which are
+    never changed once stored, and leaves a thread to pickle and write it,
+    so the game loop carries on as the checkpoint is written. A checkpoint
+    that falls due while the last is still being written is skipped. Once
+    training is done a final checkpoint is written before after_episode
+    returns.
+    """
+    def __init__(self, agent, path, period=100):
+        self.agent = agent
+        self.path = path
+        self.period = max(1, int(period))
+        self.thread = None
+        self.saved = 0
+        self.skipped = 0
+
+    def after_episode(self):
+        if not self.agent.is_in_training():
+            self.save()
+        elif self.agent.episodes_so_far % self.period == 0:
+            self.save_in_background()
+
+    def save_in_background(self):
+        """
+        Starts writing a checkpoint, unless one is being written, and
+        returns whether it did.
+        """
+        if self.thread is not None and self.thread.is_alive():
+            self.skipped += 1
+            return False
+
+        self.thread = threading.Thread(target=write_snapshot, args=(take_snapshot(self.agent), self.path))
+        self.thread.daemon = True
+        self.thread.start()
+        self.saved += 1
+        return True
+
+    def wait(self):
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def save(self):
+        self.wait()
+        save_checkpoint(self.agent, self.path)
+        self.saved += 1
+
+    def restore(self):
+        return load_checkpoint(self.agent, self.path)
@@ -1,11 +1,24 @@
 from .direction import Direction
 from .actions import Actions
 
+# Configurations at whole-cell positions are shared rather than rebuilt,
+# since a board only has a handful of cells and directions.
+INTERNED_CONFIGURATIONS = {}
+
 
 class Configuration:
+    """
+    The position and direction of an agent. Configurations are treated as
+    immutable values: a move produces a new configuration rather than
+    changing an existing one. That is what allows them to be shared between
+    game states and their hash to be computed only once.
+    """
+    __slots__ = ('pos', 'direction', '_hash')
+
     def __init__(self, pos, direction):
         self.pos = pos
         self.direction = direction
+        self._hash = None
 
     def get_position(self):
         return self.pos
@@ -23,10 +36,23 @@ class Configuration:
 
         return self.pos == other.pos and self.direction == other.direction
 
+    def __ne__(self, other):
+        return not self == other
+
     def __hash__(self):
-        x = hash(self.pos)
-        y = hash(self.direction)
-        return hash(x + 13 * y)
+        if self._hash is None:
+            x = hash(self.pos)
+            y = hash(self.direction)
+            self._hash = hash(x + 13 * y)
+
+        return self._hash
+
+    def __getstate__(self):
+        return self.pos, self.direction
+
+    def __setstate__(self, state):
+        self.pos, self.direction = state
+        self._hash = None
 
     def __str__(self):
         return "(x,y)=" + str(self.pos) + ", " + str(self.direction)
@@ -39,4 +65,25 @@ class Configuration:
         if direction == Direction.STOP:
             direction = self.direction
 
-        return Configuration((x + dx, y+dy), direction)
+        return intern_configuration((x + dx, y + dy), direction)
+
+
+def intern_configuration(pos, direction):
+    """
+    Returns a configuration for the given position and direction. Whole-cell
+    positions return a shared instance; positions between cells return a
+    new one.
+    """
+    x, y = pos
+
+    if x != int(x) or y != int(y):
+        return Configuration(pos, direction)
+
+    pos = (int(x), int(y))
+    key = (pos, direction)
+    configuration = INTERNED_CONFIGURATIONS.get(key)
+
+    if configuration is None:
+        configuration = INTERNED_CONFIGURATIONS[key] = Configuration(pos, direction)
+
+    return configuration
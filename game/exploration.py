@@ -0,0 +1,51 @@
+from collections import OrderedDict
+
+
+class ExplorationTracker:
+    """
+    Records which game states have been generated. Rather than keeping the
+    states themselves alive, only a fingerprint (the state hash) is stored.
+
+    A tracker is unbounded by default. Given a max_size, it keeps only the
+    most recently seen fingerprints and counts how many older ones were
+    evicted to stay within that size.
+    """
+    def __init__(self, max_size=None):
+        self.max_size = max_size
+        self.fingerprints = OrderedDict() if max_size is not None else set()
+        self.recorded = 0
+        self.evicted = 0
+
+    def record(self, state):
+        self.recorded += 1
+        fingerprint = hash(state)
+
+        if self.max_size is None:
+            self.fingerprints.add(fingerprint)
+            return
+
+        if fingerprint in self.fingerprints:
+            self.fingerprints.move_to_end(fingerprint)
+            return
+
+        self.fingerprints[fingerprint] = True
+
+        if len(self.fingerprints) > self.max_size:
+            self.fingerprints.popitem(last=False)
+            self.evicted += 1
+
+    def __contains__(self, state):
+        return hash(state) in self.fingerprints
+
+    def __len__(self):
+        return len(self.fingerprints)
+
+    def get_and_reset(self):
+        explored = set(self.fingerprints)
+        self.reset()
+        return explored
+
+    def reset(self):
+        self.fingerprints = OrderedDict() if self.max_size is not None else set()
+        self.recorded = 0
+        self.evicted = 0
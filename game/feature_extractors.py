@@ -1,10 +1,20 @@
+from array import array
+
 import utilities
 
 from .direction import Direction
 from .actions import Actions
+from .adjacency import get_adjacency_table
+from .maze_distances import get_maze_distances
 
 
 class FeatureExtractor:
+    # The names of the features an extractor gives for every state and
+    # action, in a fixed order, or None if the features it gives depend on
+    # the state and action. Extractors with a schema also fill matrices of
+    # feature values; see get_feature_matrix.
+    schema = None
+
     def get_features(self, state, action):
         """
         Returns a dictionary from features to counts. Usually, the count
@@ -12,6 +22,16 @@ class FeatureExtractor:
         """
         utilities.raise_not_defined()
 
+    def get_feature_matrix(self, state, actions):
+        """
+        Returns the features of each of the actions in a state as an array
+        of floats with one row of len(schema) values per action, in the
+        order of the schema. The array is a buffer owned by the extractor:
+        it may be longer than the rows asked for and is overwritten by the
+        next call.
+        """
+        utilities.raise_not_defined()
+
 
 class IdentityExtractor(FeatureExtractor):
     def get_features(self, state, action):
@@ -31,6 +51,12 @@ class CoordinateExtractor(FeatureExtractor):
 
 
 def closest_food(pos, food, walls):
+    distances = get_maze_distances(walls)
+
+    if pos in distances.cell_ids:
+        return distances.get_closest_distance(pos, food)
+
+    adjacency = get_adjacency_table(walls)
     fringe = [(pos[0], pos[1], 0)]
     expanded = set()
 
@@ -47,7 +73,7 @@ def closest_food(pos, food, walls):
             return dist
 
         # Otherwise spread out from this location to its neighbors.
-        neighbors = Actions.get_legal_neighbors((pos_x, pos_y), walls)
+        neighbors = adjacency.get_legal_neighbors((pos_x, pos_y))
 
         for nbr_x, nbr_y in neighbors:
             fringe.append((nbr_x, nbr_y, dist+1))
@@ -65,36 +91,63 @@ class SimpleExtractor(FeatureExtractor):
     - whether a ghost collision is imminent
     - whether a ghost is one step away
     """
+    schema = ('bias', '#-of-ghosts-1-step-away', 'eats-food', 'closest-food')
+
+    def __init__(self):
+        self.matrix = array('d')
+
     def get_features(self, state, action):
+        matrix = self.get_feature_matrix(state, [action])
+        features = utilities.Counter()
+
+        for i, name in enumerate(self.schema):
+            features[name] = matrix[i]
+
+        return features
+
+    def get_feature_matrix(self, state, actions):
         # Extract the grid of food and wall locations and get the ghost
         # locations.
         food = state.get_food()
         walls = state.get_walls()
-        ghosts = state.get_ghost_positions()
+        adjacency = state.data.layout.adjacency
+        x, y = state.get_pacman_position()
 
-        features = utilities.Counter()
+        # Count the ghosts that can reach each cell in one step. This is
+        # the same for every action, so it is worked out once per state.
+        ghost_steps = {}
 
-        features["bias"] = 1.0
+        for ghost in state.get_ghost_positions():
+            for cell in adjacency.get_legal_neighbors(ghost):
+                ghost_steps[cell] = ghost_steps.get(cell, 0) + 1
 
-        # Compute the location of pacman after he takes the action.
-        x, y = state.get_pacman_position()
-        dx, dy = Actions.direction_to_vector(action)
-        next_x, next_y = int(x + dx), int(y + dy)
+        width = len(self.schema)
 
-        # Count the number of ghosts that are one step away.
-        features["#-of-ghosts-1-step-away"] = sum((next_x, next_y) in Actions.get_legal_neighbors(g, walls) for g in ghosts)
+        if len(self.matrix) < len(actions) * width:
+            self.matrix = array('d', [0.0]) * (len(actions) * width)
 
-        # If there is no danger of ghosts then add the food feature.
-        if not features["#-of-ghosts-1-step-away"] and food[next_x][next_y]:
-            features["eats-food"] = 1.0
+        matrix = self.matrix
 
-        dist = closest_food((next_x, next_y), food, walls)
+        # Every feature is divided by 10 to keep the weight updates small.
+        for row, action in enumerate(actions):
+            # Compute the location of pacman after he takes the action.
+            dx, dy = Actions.direction_to_vector(action)
+            next_x, next_y = int(x + dx), int(y + dy)
+            base = row * width
+
+            matrix[base] = 1.0 / 10.0
+
+            # Count the number of ghosts that are one step away.
+            ghosts = ghost_steps.get((next_x, next_y), 0)
+            matrix[base + 1] = ghosts / 10.0
+
+            # If there is no danger of ghosts then add the food feature.
+            matrix[base + 2] = 1.0 / 10.0 if not ghosts and food[next_x][next_y] else 0.0
+
+            dist = closest_food((next_x, next_y), food, walls)
 
-        if dist is not None:
             # Make the distance a number less than one otherwise the update
             # will diverge wildly.
-            features["closest-food"] = float(dist) / (walls.width * walls.height)
-
-        features.divide_all(10.0)
+            matrix[base + 3] = float(dist) / (walls.width * walls.height) / 10.0 if dist is not None else 0.0
 
-        return features
+        return matrix
@@ -13,7 +13,8 @@ except ImportError:
 
 
 class Game:
-    def __init__(self, agents, display, rules, starting_index=0, mute_agents=False, catch_exceptions=False):
+    def __init__(self, agents, display, rules, starting_index=0, mute_agents=False, catch_exceptions=False,
+                 trusted_agents=False):
         self.agentCrashed = False
         self.agents = agents
         self.display = display
@@ -22,6 +23,7 @@ class Game:
         self.game_over = False
         self.mute_agents = mute_agents
         self.catch_exceptions = catch_exceptions
+        self.trusted_agents = trusted_agents
         self.move_history = []
         self.total_agent_times = [0 for _ in agents]
         self.total_agent_time_warnings = [0 for _ in agents]
@@ -65,10 +67,24 @@ class Game:
         sys.stdout = OLD_STDOUT
         sys.stderr = OLD_STDERR
 
+    def observe(self):
+        """
+        Returns the state to hand to an agent. Trusted agents, which promise
+        not to modify what they are given, get a view that shares its data
+        with the game's state; other agents get a deep copy.
+        """
+        if self.trusted_agents:
+            return self.state.view()
+
+        return self.state.deep_copy()
+
     def run(self):
         self.display.initialize(self.state.data)
         self.num_moves = 0
 
+        # Look up the optional agent hooks once rather than on every move.
+        observation_functions = [getattr(agent, 'observation_function', None) for agent in self.agents]
+
         # self.display.initialize(self.state.makeObservation(1).data)
 
         # Inform learning agents of the game start.
@@ -81,7 +97,10 @@ class Game:
                 self._agent_crash(i, quiet=True)
                 return
 
-            if "register_initial_state" in dir(agent):
+            if hasattr(agent, "set_move_timeout"):
+                agent.set_move_timeout(self.rules.get_move_timeout(i))
+
+            if hasattr(agent, "register_initial_state"):
                 self.mute(i)
                 if self.catch_exceptions:
                     try:
@@ -91,7 +110,7 @@ class Game:
                         )
                         try:
                             start_time = time.time()
-                            timed_func(self.state.deep_copy())
+                            timed_func(self.observe())
                             time_taken = time.time() - start_time
                             self.total_agent_times[i] += time_taken
                         except TimeoutFunctionException:
@@ -105,7 +124,7 @@ class Game:
                         self.unmute()
                         return
                 else:
-                    agent.register_initial_state(self.state.deep_copy())
+                    agent.register_initial_state(self.observe())
 
                 self.unmute()
 
@@ -115,18 +134,19 @@ class Game:
         while not self.game_over:
             # Fetch the next agent.
             agent = self.agents[agent_index]
+            observation_function = observation_functions[agent_index]
             move_time = 0
             skip_action = False
 
             # Generate an observation of the state.
-            if 'observation_function' in dir(agent):
+            if observation_function is not None:
                 self.mute(agent_index)
                 if self.catch_exceptions:
                     try:
-                        timed_func = TimeoutFunction(agent.observation_function, int(self.rules.get_move_timeout(agent_index)))
+                        timed_func = TimeoutFunction(observation_function, int(self.rules.get_move_timeout(agent_index)))
                         try:
                             start_time = time.time()
-                            observation = timed_func(self.state.deep_copy())
+                            observation = timed_func(self.observe())
                         except TimeoutFunctionException:
                             skip_action = True
                         move_time += time.time() - start_time
@@ -136,10 +156,10 @@ class Game:
                         self.unmute()
                         return
                 else:
-                    observation = agent.observation_function(self.state.deep_copy())
+                    observation = observation_function(self.observe())
                 self.unmute()
             else:
-                observation = self.state.deep_copy()
+                observation = self.observe()
 
             # Solicit an action.
             action = None
@@ -194,7 +214,9 @@ class Game:
                     self.unmute()
                     return
             else:
+                start_time = time.time()
                 action = agent.get_action(observation)
+                self.total_agent_times[agent_index] += time.time() - start_time
 
             self.unmute()
 
@@ -233,7 +255,7 @@ class Game:
 
         # Inform a learning agent of the game result.
         for agent_index, agent in enumerate(self.agents):
-            if "final" in dir(agent):
+            if hasattr(agent, "final"):
                 try:
                     self.mute(agent_index)
                     agent.final(self.state)
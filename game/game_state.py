@@ -8,17 +8,23 @@ class GameState:
     # Number of points lost each round.
     TIME_PENALTY = 1
 
-    # Static variable keeps track of which states have had
-    # get_legal_actions called.
-    explored = set()
+    # Exploration tracking is off unless an ExplorationTracker is attached.
+    # A tracker set here is picked up by every new game state; a tracker set
+    # with set_explorer() on a single state is inherited by its successors,
+    # which allows tracking to be enabled for one game or one agent.
+    explored = None
 
     def get_and_reset_explored():
-        tmp = GameState.explored.copy()
-        GameState.explored = set()
-        return tmp
+        if GameState.explored is None:
+            return set()
+
+        return GameState.explored.get_and_reset()
 
     get_and_reset_explored = staticmethod(get_and_reset_explored)
 
+    def set_explorer(self, explorer):
+        self.explorer = explorer
+
     def get_legal_actions(self, agent_index=0):
         # GameState.explored.add(self)
         if self.is_win() or self.is_lose():
@@ -48,7 +54,7 @@ class GameState:
         if agent_index == 0:
             state.data.score_change += -GameState.TIME_PENALTY
         else:
-            GhostRules.decrement_timer(state.data.agent_states[agent_index])
+            GhostRules.decrement_timer(state.data.writable_agent_state(agent_index))
 
         # Resolve multi-agent effects.
         GhostRules.check_death(state, agent_index)
@@ -56,8 +62,11 @@ class GameState:
         # General state bookkeeping.
         state.data._agent_moved = agent_index
         state.data.score += state.data.score_change
-        GameState.explored.add(self)
-        GameState.explored.add(state)
+        state.data.update_hash(self.data)
+
+        if self.explorer is not None:
+            self.explorer.record(self)
+            self.explorer.record(state)
 
         return state
 
@@ -124,14 +133,36 @@ class GameState:
     def __init__(self, previous_state=None):
         if previous_state is not None:
             self.data = GameStateData(previous_state.data)
+            self.explorer = previous_state.explorer
         else:
             self.data = GameStateData()
+            self.explorer = GameState.explored
 
     def deep_copy(self):
         state = GameState(self)
         state.data = self.data.deep_copy()
         return state
 
+    def view(self):
+        """
+        Returns a copy of this state that shares the layout, food, capsules
+        and agent states with it, the same way a successor does. This costs
+        about as much as generating a successor, so it is what the game hands
+        to agents that are trusted not to modify the states they are given.
+        What the last move did is kept, as deep_copy keeps it, so that the
+        agents see the same state either way.
+        """
+        state = GameState(self)
+        data, source = state.data, self.data
+        data._win = source._win
+        data._lose = source._lose
+        data._hash = source._hash
+        data._agent_moved = source._agent_moved
+        data._food_eaten = source._food_eaten
+        data._food_added = source._food_added
+        data._capsule_eaten = source._capsule_eaten
+        return state
+
     def __eq__(self, other):
         return hasattr(other, 'data') and self.data == other.data
 
@@ -1,20 +1,27 @@
-from .configuration import Configuration
+from .configuration import intern_configuration
 from .agent_state import AgentState
-from .grid import reconstitute_grid, Grid
+from .grid import reconstitute_grid
 from .direction import Direction
 from utilities import nearest_point
 
 
 class GameStateData:
     def __init__(self, previous_state=None):
+        # A successor shares the food, the capsules and every agent state
+        # with its predecessor. Anything that changes one of those must ask
+        # for a writable copy first (see writable_agent_state and
+        # writable_capsules) so the predecessor is never modified.
         if previous_state is not None:
             self.food = previous_state.food.shallow_copy()
-            self.capsules = previous_state.capsules[:]
-            self.agent_states = self.copy_agent_states(previous_state.agent_states)
+            self.capsules = previous_state.capsules
+            self.agent_states = previous_state.agent_states[:]
             self.layout = previous_state.layout
             self._eaten = previous_state._eaten
             self.score = previous_state.score
 
+        self._owned_agent_states = set()
+        self._owns_capsules = False
+
         self._food_eaten = None
         self._food_added = None
         self._capsule_eaten = None
@@ -22,17 +29,44 @@ class GameStateData:
         self._lose = False
         self._win = False
         self.score_change = 0
+        self._hash = None
 
     def deep_copy(self):
         state = GameStateData(self)
         state.food = self.food.deep_copy()
+        state.capsules = self.capsules[:]
+        state.agent_states = self.copy_agent_states(self.agent_states)
+        state._eaten = self._eaten[:]
         state.layout = self.layout.deep_copy()
         state._agent_moved = self._agent_moved
         state._food_eaten = self._food_eaten
         state._food_added = self._food_added
         state._capsule_eaten = self._capsule_eaten
+        state._hash = self._hash
         return state
 
+    def writable_agent_state(self, agent_index):
+        """
+        Returns the agent state at the given index, first replacing it with
+        a private copy if it is still shared with the predecessor state.
+        """
+        if agent_index not in self._owned_agent_states:
+            self.agent_states[agent_index] = self.agent_states[agent_index].copy()
+            self._owned_agent_states.add(agent_index)
+
+        return self.agent_states[agent_index]
+
+    def writable_capsules(self):
+        """
+        Returns the capsule list, first replacing it with a private copy if
+        it is still shared with the predecessor state.
+        """
+        if not self._owns_capsules:
+            self.capsules = self.capsules[:]
+            self._owns_capsules = True
+
+        return self.capsules
+
     @staticmethod
     def copy_agent_states(agent_states):
         copied_states = []
@@ -58,20 +92,55 @@ class GameStateData:
         return True
 
     def __hash__(self):
-        for i, state in enumerate(self.agent_states):
-            try:
-                int(hash(state))
-            except TypeError as e:
-                print(e)
-
-        return int((hash(tuple(self.agent_states)) + 13 *
-                    hash(self.food) + 113 *
-                    hash(tuple(self.capsules)) + 7 *
-                    hash(self.score)) % 1048575)
+        return hash(self.zobrist_hash() ^ hash(self.score))
+
+    def zobrist_hash(self):
+        """
+        Returns the 64-bit Zobrist hash of the agents, food and capsules.
+        This is computed in full the first time it is needed and is then
+        carried over to successors incrementally (see update_hash).
+        """
+        if self._hash is None:
+            keys = self.layout.zobrist
+            h = 0
+
+            for index, agent_state in enumerate(self.agent_states):
+                h ^= keys.agent_key(index, agent_state)
+            for position in self.food.as_list():
+                h ^= keys.food_key(position)
+            for position in self.capsules:
+                h ^= keys.capsule_key(position)
+
+            self._hash = h
+
+        return self._hash
+
+    def update_hash(self, previous_state):
+        """
+        Derives the hash of this successor from the hash of its predecessor
+        by XORing out the keys of the parts that changed and XORing in their
+        replacements. Nothing is done if the predecessor was never hashed.
+        """
+        h = previous_state._hash
+        if h is None:
+            return
+
+        keys = self.layout.zobrist
+
+        for index in self._owned_agent_states:
+            h ^= keys.agent_key(index, previous_state.agent_states[index])
+            h ^= keys.agent_key(index, self.agent_states[index])
+
+        if self._food_eaten is not None:
+            h ^= keys.food_key(self._food_eaten)
+        if self._capsule_eaten is not None:
+            h ^= keys.capsule_key(self._capsule_eaten)
+
+        self._hash = h
 
     def __str__(self):
         width, height = self.layout.width, self.layout.height
-        grid_map = Grid(width, height)
+        grid_map = [[None for _ in range(height)] for _ in range(width)]
 
         if type(self.food) == type((1, 2)):
             self.food = reconstitute_grid(self.food)
@@ -98,7 +167,10 @@ class GameStateData:
         for x, y in self.capsules:
             grid_map[x][y] = 'o'
 
-        return str(grid_map) + ("\nScore: %d\n" % self.score)
+        rows = [''.join([grid_map[x][y] for x in range(width)]) for y in range(height)]
+        rows.reverse()
+
+        return '\n'.join(rows) + ("\nScore: %d\n" % self.score)
 
     @staticmethod
     def _food_wall_str(has_food, has_wall):
@@ -129,6 +201,7 @@ class GameStateData:
         self.layout = layout
         self.score = 0
         self.score_change = 0
+        self._hash = None
 
         self.agent_states = []
         num_ghosts = 0
@@ -140,6 +213,6 @@ class GameStateData:
                     continue
                 else:
                     num_ghosts += 1
-            self.agent_states.append(AgentState(Configuration(pos, Direction.STOP), is_pacman))
+            self.agent_states.append(AgentState(intern_configuration(pos, Direction.STOP), is_pacman))
 
         self._eaten = [False for _ in self.agent_states]
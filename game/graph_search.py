@@ -0,0 +1,184 @@
+from utilities import Stack, Queue, PriorityQueue
+
+# The searches here only need a problem's get_start_state, is_goal_state and
+# get_successors. Successors are used as they are iterated, so a problem may
+# produce them lazily from a generator. After a search the problem's
+# search_statistics attribute holds its SearchStatistics.
+
+
+class SearchStatistics:
+    """
+    Counters kept by a search: the nodes expanded (whose successors were
+    asked for), the nodes generated (successors seen, including ones that
+    were already closed) and the largest size the frontier reached.
+    """
+    __slots__ = ('expanded', 'generated', 'max_frontier')
+
+    def __init__(self):
+        self.expanded = 0
+        self.generated = 0
+        self.max_frontier = 0
+
+    def __str__(self):
+        return 'expanded %d, generated %d, peak frontier %d' % (self.expanded, self.generated, self.max_frontier)
+
+
+class SearchNode:
+    """
+    A state reached by a search. Each node points back to the node it was
+    reached from, so a path is only built (by walking those pointers) once
+    a goal is found rather than being copied into every node.
+    """
+    __slots__ = ('state', 'parent', 'action', 'cost')
+
+    def __init__(self, state, parent=None, action=None, cost=0):
+        self.state = state
+        self.parent = parent
+        self.action = action
+        self.cost = cost
+
+    def path(self):
+        actions = []
+        node = self
+
+        while node.parent is not None:
+            actions.append(node.action)
+            node = node.parent
+
+        actions.reverse()
+        return actions
+
+
+def _finish(problem, statistics, node):
+    problem.search_statistics = statistics
+    return node.path() if node is not None else None
+
+
+def depth_first_search(problem):
+    """
+    Returns the actions of a path to a goal found by expanding the deepest
+    node first, or None if no goal can be reached. Successors are pushed in
+    the order the problem gives them, so the last one is explored first.
+    """
+    statistics = SearchStatistics()
+    frontier = Stack()
+    frontier.push(SearchNode(problem.get_start_state()))
+    frontier_size = 1
+    closed = set()
+
+    while not frontier.is_empty():
+        node = frontier.pop()
+        frontier_size -= 1
+
+        if node.state in closed:
+            continue
+
+        if problem.is_goal_state(node.state):
+            return _finish(problem, statistics, node)
+
+        closed.add(node.state)
+        statistics.expanded += 1
+
+        for state, action, cost in problem.get_successors(node.state):
+            statistics.generated += 1
+
+            if state not in closed:
+                frontier.push(SearchNode(state, node, action, node.cost + cost))
+                frontier_size += 1
+
+        if frontier_size > statistics.max_frontier:
+            statistics.max_frontier = frontier_size
+
+    return _finish(problem, statistics, None)
+
+
+def breadth_first_search(problem):
+    """
+    Returns the actions of a path to a goal with the fewest actions, or
+    None if no goal can be reached. Each state joins the frontier at most
+    once, the first time it is reached.
+    """
+    statistics = SearchStatistics()
+    start = problem.get_start_state()
+    frontier = Queue()
+    frontier.push(SearchNode(start))
+    frontier_size = 1
+    reached = set([start])
+
+    while not frontier.is_empty():
+        node = frontier.pop()
+        frontier_size -= 1
+
+        if problem.is_goal_state(node.state):
+            return _finish(problem, statistics, node)
+
+        statistics.expanded += 1
+
+        for state, action, cost in problem.get_successors(node.state):
+            statistics.generated += 1
+
+            if state not in reached:
+                reached.add(state)
+                frontier.push(SearchNode(state, node, action, node.cost + cost))
+                frontier_size += 1
+
+        if frontier_size > statistics.max_frontier:
+            statistics.max_frontier = frontier_size
+
+    return _finish(problem, statistics, None)
+
+
+def best_first_search(problem, heuristic=None):
+    """
+    Returns the actions of the cheapest path to a goal, or None if no goal
+    can be reached. Nodes are expanded in order of path cost, plus the
+    heuristic's estimate of the remaining cost when one is given (A*).
+
+    The frontier holds each state once. When a cheaper path to a state on
+    the frontier is found, its priority is lowered in place. A state is not
+    expanded a second time once it has been closed, so A* finds the
+    cheapest path when the heuristic is consistent.
+    """
+    statistics = SearchStatistics()
+    start = problem.get_start_state()
+    frontier = PriorityQueue()
+    frontier.push(start, heuristic(start, problem) if heuristic is not None else 0)
+    open_nodes = {start: SearchNode(start)}
+    closed = set()
+
+    while not frontier.is_empty():
+        state = frontier.pop()
+        node = open_nodes.pop(state)
+
+        if problem.is_goal_state(state):
+            return _finish(problem, statistics, node)
+
+        closed.add(state)
+        statistics.expanded += 1
+
+        for successor, action, cost in problem.get_successors(state):
+            statistics.generated += 1
+
+            if successor in closed:
+                continue
+
+            path_cost = node.cost + cost
+            current = open_nodes.get(successor)
+
+            if current is None or path_cost < current.cost:
+                open_nodes[successor] = SearchNode(successor, node, action, path_cost)
+                priority = path_cost + heuristic(successor, problem) if heuristic is not None else path_cost
+                frontier.update(successor, priority)
+
+        if len(open_nodes) > statistics.max_frontier:
+            statistics.max_frontier = len(open_nodes)
+
+    return _finish(problem, statistics, None)
+
+
+def uniform_cost_search(problem):
+    return best_first_search(problem)
+
+
+def astar_search(problem, heuristic):
+    return best_first_search(problem, heuristic)
@@ -1,4 +1,73 @@
+def popcount(bits):
+    """
+    Returns the number of set bits in a non-negative integer.
+    """
+    try:
+        return bits.bit_count()
+    except AttributeError:
+        return bin(bits).count('1')
+
+
+class GridColumn:
+    """
+    A view onto a single column (a fixed x) of a Grid. This is what allows
+    the grid[x][y] notation to keep working for both reading and writing
+    even though the cells of a Grid are stored in a single integer.
+    """
+    __slots__ = ('grid', 'offset')
+
+    def __init__(self, grid, x):
+        self.grid = grid
+        self.offset = x * grid.height
+
+    def _bit(self, y):
+        height = self.grid.height
+
+        if y < 0:
+            y += height
+
+        # Past either end of the column are the cells of the neighboring
+        # columns, or bits outside the grid.
+        if not 0 <= y < height:
+            raise IndexError("grid row index out of range")
+
+        return self.offset + y
+
+    def __getitem__(self, y):
+        return (self.grid.bits >> self._bit(y)) & 1 == 1
+
+    def __setitem__(self, y, value):
+        self.grid.set_bit(self._bit(y), value)
+
+    def __len__(self):
+        return self.grid.height
+
+    def __iter__(self):
+        bits = self.grid.bits >> self.offset
+
+        for _ in range(self.grid.height):
+            yield bits & 1 == 1
+            bits >>= 1
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def count(self, item=True):
+        mask = (1 << self.grid.height) - 1
+        found = popcount((self.grid.bits >> self.offset) & mask)
+        return found if item else self.grid.height - found
+
+
 class Grid:
+    """
+    A two-dimensional grid of boolean values stored as a bitboard. Cell (x, y)
+    lives at bit x * height + y of a single arbitrary-precision integer, so
+    copying a grid is O(1) and the integer itself can be hashed, counted
+    and compared without visiting every cell.
+    """
     def __init__(self, width, height, initial_value=False, bit_representation=None):
         if initial_value not in [False, True]:
             raise Exception("Grids can only contain boolean values.")
@@ -7,19 +76,45 @@ class Grid:
 
         self.width = width
         self.height = height
-        self.data = [[initial_value for _ in range(height)] for _ in range(width)]
+        self.bits = self.full_mask() if initial_value else 0
+        self._hash = None
 
         if bit_representation:
             self.unpack_bits(bit_representation)
 
-    def __getitem__(self, i):
-        return self.data[i]
+    def full_mask(self):
+        return (1 << (self.width * self.height)) - 1
+
+    def set_bit(self, index, value):
+        if value:
+            self.bits |= 1 << index
+        else:
+            self.bits &= ~(1 << index)
+
+        self._hash = None
+
+    def __getitem__(self, x):
+        if x < 0:
+            x += self.width
+
+        if x < 0 or x >= self.width:
+            raise IndexError("Grid column index out of range")
+
+        return GridColumn(self, x)
+
+    def __setitem__(self, x, column):
+        for y, value in enumerate(column):
+            self[x][y] = value
 
-    def __setitem__(self, key, item):
-        self.data[key] = item
+    def __len__(self):
+        return self.width
+
+    def __iter__(self):
+        for x in range(self.width):
+            yield GridColumn(self, x)
 
     def __str__(self):
-        out = [[str(self.data[x][y])[0] for x in range(self.width)] for y in range(self.height)]
+        out = [[str(self[x][y])[0] for x in range(self.width)] for y in range(self.height)]
         out.reverse()
         return '\n'.join([''.join(x) for x in out])
 
@@ -27,41 +122,42 @@ class Grid:
         if other is None:
             return False
 
-        return self.data == other.data
+        return self.width == other.width and self.height == other.height and self.bits == other.bits
+
+    def __ne__(self, other):
+        return not self == other
 
     def __hash__(self):
-        base = 1
-        h = 0
-        for l in self.data:
-            for i in l:
-                if i:
-                    h += base
-                base *= 2
-        return hash(h)
+        if self._hash is None:
+            self._hash = hash(self.bits)
+
+        return self._hash
 
     def copy(self):
         g = Grid(self.width, self.height)
-        g.data = [x[:] for x in self.data]
+        g.bits = self.bits
+        g._hash = self._hash
         return g
 
     def deep_copy(self):
         return self.copy()
 
     def shallow_copy(self):
-        g = Grid(self.width, self.height)
-        g.data = self.data
-        return g
+        return self.copy()
 
     def count(self, item=True):
-        return sum([x.count(item) for x in self.data])
+        found = popcount(self.bits)
+        return found if item else self.width * self.height - found
 
     def as_list(self, key=True):
+        bits = self.bits if key else self.bits ^ self.full_mask()
         grid_list = []
 
-        for x in range(self.width):
-            for y in range(self.height):
-                if self[x][y] == key:
-                    grid_list.append((x, y))
+        while bits:
+            low_bit = bits & -bits
+            index = low_bit.bit_length() - 1
+            grid_list.append(self._cell_index_to_position(index))
+            bits ^= low_bit
 
         return grid_list
 
@@ -71,9 +167,8 @@ class Grid:
 
         for i in range(self.height * self.width):
             bit = self.CELLS_PER_INT - (i % self.CELLS_PER_INT) - 1
-            x, y = self._cell_index_to_position(i)
 
-            if self[x][y]:
+            if (self.bits >> i) & 1:
                 current_int += 2 ** bit
             if (i + 1) % self.CELLS_PER_INT == 0:
                 bits.append(current_int)
@@ -83,7 +178,7 @@ class Grid:
         return tuple(bits)
 
     def _cell_index_to_position(self, index):
-        x = index / self.height
+        x = index // self.height
         y = index % self.height
         return x, y
 
@@ -93,8 +188,7 @@ class Grid:
             for bit in self.unpack_int(packed, self.CELLS_PER_INT):
                 if cell == self.width * self.height:
                     break
-                x, y = self._cell_index_to_position(cell)
-                self[x][y] = bit
+                self.set_bit(cell, bit)
                 cell += 1
 
     def unpack_int(self, packed, size):
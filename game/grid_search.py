@@ -0,0 +1,397 @@
+import heapq
+
+from game.adjacency import get_adjacency_table
+from game.direction import Direction
+from game.graph_search import SearchStatistics, breadth_first_search
+
+# Searches specialised for point-to-point problems on a grid, such as
+# PositionSearchProblem: the states are (x, y) cells, the problem has walls
+# and a goal cell, every move costs 1 and every move can be undone by the
+# reverse move. Under those assumptions they return paths as short as those
+# of breadth_first_search while expanding far fewer nodes on open boards.
+#
+# The searches walk the grid themselves rather than calling get_successors,
+# so they add the cells they expand to the problem's _expanded counter and
+# _visited_list (for the display) on the problem's behalf. A problem without
+# walls and a goal cell is searched with breadth_first_search instead.
+
+VECTORS = [(Direction.NORTH, 0, 1), (Direction.SOUTH, 0, -1), (Direction.EAST, 1, 0), (Direction.WEST, -1, 0)]
+
+
+def _is_grid_problem(problem):
+    goal = getattr(problem, 'goal', None)
+    return getattr(problem, 'walls', None) is not None and isinstance(goal, tuple) and len(goal) == 2
+
+
+def _moves(problem):
+    adjacency = getattr(problem, 'adjacency', None)
+
+    if adjacency is not None:
+        return adjacency.get_moves
+
+    walls = problem.walls
+
+    def get_moves(position):
+        x, y = position
+        return [(action, (x + dx, y + dy)) for action, dx, dy in VECTORS if not walls[x + dx][y + dy]]
+
+    return get_moves
+
+
+def _finish(problem, statistics, expanded_cells, actions):
+    problem.search_statistics = statistics
+
+    if hasattr(problem, '_expanded'):
+        problem._expanded += statistics.expanded
+
+    if getattr(problem, '_visited_list', None) is not None:
+        for cell in expanded_cells:
+            if cell not in problem._visited:
+                problem._visited[cell] = True
+                problem._visited_list.append(cell)
+
+    # Reaching the goal is what makes a problem draw the cells expanded.
+    if actions is not None:
+        problem.is_goal_state(problem.goal)
+
+    return actions
+
+
+def _join(forward, backward, meeting):
+    """
+    Returns the actions from the start to the goal through the meeting
+    cell. forward maps a cell to the cell and action it was reached from,
+    backward maps a cell to the cell it leads to and the action taken.
+    """
+    actions = []
+    cell = meeting
+
+    while forward[cell] is not None:
+        cell, action = forward[cell]
+        actions.append(action)
+
+    actions.reverse()
+    cell = meeting
+
+    while backward[cell] is not None:
+        cell, action = backward[cell]
+        actions.append(action)
+
+    return actions
+
+
+def bidirectional_breadth_first_search(problem):
+    """
+    Returns the actions of a shortest path from the start to the goal, or
+    None if there is none, by searching breadth first from both ends.
+
+    Each round expands a whole layer of the smaller of the two frontiers.
+    Once a layer reaches a cell the other search has reached, the shortest
+    path through any of the cells met in that layer is a shortest path.
+    """
+    if not _is_grid_problem(problem):
+        return breadth_first_search(problem)
+
+    start, goal = problem.get_start_state(), problem.goal
+    get_moves = _moves(problem)
+    statistics = SearchStatistics()
+    expanded_cells = []
+
+    forward, backward = {start: None}, {goal: None}
+    forward_depth, backward_depth = {start: 0}, {goal: 0}
+    forward_frontier, backward_frontier = [start], [goal]
+
+    if start == goal:
+        return _finish(problem, statistics, expanded_cells, [])
+
+    while forward_frontier and backward_frontier:
+        is_forward = len(forward_frontier) <= len(backward_frontier)
+
+        if is_forward:
+            frontier, parents, depths, others = forward_frontier, forward, forward_depth, backward_depth
+        else:
+            frontier, parents, depths, others = backward_frontier, backward, backward_depth, forward_depth
+
+        next_frontier = []
+        best, meeting = None, None
+
+        for cell in frontier:
+            statistics.expanded += 1
+            expanded_cells.append(cell)
+            depth = depths[cell] + 1
+
+            for action, neighbour in get_moves(cell):
+                statistics.generated += 1
+
+                if neighbour in parents:
+                    continue
+
+                # The backward search records the move from the neighbour
+                # into this cell, which is the reverse of the move found.
+                parents[neighbour] = (cell, action) if is_forward else (cell, Direction.REVERSE[action])
+                depths[neighbour] = depth
+                next_frontier.append(neighbour)
+
+                if neighbour in others and (best is None or depth + others[neighbour] < best):
+                    best, meeting = depth + others[neighbour], neighbour
+
+        if is_forward:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
+
+        statistics.max_frontier = max(statistics.max_frontier, len(forward_frontier) + len(backward_frontier))
+
+        if meeting is not None:
+            return _finish(problem, statistics, expanded_cells, _join(forward, backward, meeting))
+
+    return _finish(problem, statistics, expanded_cells, None)
+
+
+def bidirectional_astar_search(problem):
+    """
+    Returns the actions of a shortest path from the start to the goal, or
+    None if there is none, by A* searches from both ends. The forward search
+    is guided by the Manhattan distance to the goal and the backward search
+    by the Manhattan distance to the start.
+
+    The side with the smaller frontier is expanded each step. Every time a
+    cell reached by one search has been reached by the other, the path
+    through it is a candidate; the search stops once the smallest estimate
+    on either frontier is no less than the best candidate, since every path
+    left to find passes through both frontiers.
+    """
+    if not _is_grid_problem(problem):
+        return breadth_first_search(problem)
+
+    start, goal = problem.get_start_state(), problem.goal
+    get_moves = _moves(problem)
+    statistics = SearchStatistics()
+    expanded_cells = []
+
+    if start == goal:
+        return _finish(problem, statistics, expanded_cells, [])
+
+    def estimate(cell, target):
+        return abs(cell[0] - target[0]) + abs(cell[1] - target[1])
+
+    forward, backward = {start: None}, {goal: None}
+    forward_cost, backward_cost = {start: 0}, {goal: 0}
+    forward_closed, backward_closed = set(), set()
+    forward_heap = [(estimate(start, goal), 0, start)]
+    backward_heap = [(estimate(goal, start), 0, goal)]
+    best, meeting = None, None
+
+    while forward_heap and backward_heap:
+        # Drop the entries of cells already closed or since reached more
+        # cheaply; they were left in the heaps rather than removed.
+        for heap, costs, closed in ((forward_heap, forward_cost, forward_closed),
+                                    (backward_heap, backward_cost, backward_closed)):
+            while heap and (heap[0][2] in closed or heap[0][1] > costs[heap[0][2]]):
+                heapq.heappop(heap)
+
+        if not forward_heap or not backward_heap:
+            break
+
+        if best is not None and max(forward_heap[0][0], backward_heap[0][0]) >= best:
+            break
+
+        is_forward = len(forward_heap) <= len(backward_heap)
+
+        if is_forward:
+            heap, parents, costs, closed, others, target = \
+                forward_heap, forward, forward_cost, forward_closed, backward_cost, goal
+        else:
+            heap, parents, costs, closed, others, target = \
+                backward_heap, backward, backward_cost, backward_closed, forward_cost, start
+
+        _, cost, cell = heapq.heappop(heap)
+        closed.add(cell)
+        statistics.expanded += 1
+        expanded_cells.append(cell)
+        cost += 1
+
+        for action, neighbour in get_moves(cell):
+            statistics.generated += 1
+
+            if neighbour in closed or cost >= costs.get(neighbour, cost + 1):
+                continue
+
+            parents[neighbour] = (cell, action) if is_forward else (cell, Direction.REVERSE[action])
+            costs[neighbour] = cost
+            heapq.heappush(heap, (cost + estimate(neighbour, target), cost, neighbour))
+
+            if neighbour in others and (best is None or cost + others[neighbour] < best):
+                best, meeting = cost + others[neighbour], neighbour
+
+        statistics.max_frontier = max(statistics.max_frontier, len(forward_heap) + len(backward_heap))
+
+    if meeting is None:
+        return _finish(problem, statistics, expanded_cells, None)
+
+    return _finish(problem, statistics, expanded_cells, _join(forward, backward, meeting))
+
+
+def jump_point_search(problem):
+    """
+    Returns the actions of a shortest path from the start to the goal, or
+    None if there is none, by A* over jump points of the 4-connected grid.
+
+    Among paths of equal length only those that move horizontally first
+    are searched: a path may turn from a horizontal move to a vertical one
+    anywhere, but only turns from vertical to horizontal where the cell that
+    would have let it turn earlier is a wall. Every shortest path can be
+    rearranged into that form, so the search stays optimal. Straight runs
+    are then scanned without being added to the frontier, and only the
+    cells where such a path may turn (the jump points) become nodes:
+    those where a vertical move has to turn, and those on a horizontal run
+    from which a vertical scan finds one.
+
+    Nodes are a cell together with the direction it was entered by, since
+    the directions a path may take next depend on it.
+    """
+    if not _is_grid_problem(problem):
+        return breadth_first_search(problem)
+
+    start, goal = problem.get_start_state(), problem.goal
+    open_cells = get_adjacency_table(problem.walls).moves
+    statistics = SearchStatistics()
+    expanded_cells = []
+
+    if start == goal:
+        return _finish(problem, statistics, expanded_cells, [])
+
+    def is_open(x, y):
+        return (x, y) in open_cells
+
+    # Every cell of a horizontal scan starts two vertical scans, and the
+    # scans of neighbouring rows cover the same columns, so their results
+    # are kept for the rest of the search.
+    vertical_jumps = {}
+
+    def jump_vertical(x, y, dy):
+        """
+        Scans from (x, y) along dy and returns the first cell that is the
+        goal or has to turn horizontally, or None if a wall comes first.
+        """
+        key = (x, y, dy)
+
+        if key in vertical_jumps:
+            return vertical_jumps[key]
+
+        jump = None
+
+        while True:
+            y += dy
+
+            if (x, y) not in open_cells:
+                break
+
+            if (x, y) == goal or \
+                    ((x + 1, y) in open_cells and (x + 1, y - dy) not in open_cells) or \
+                    ((x - 1, y) in open_cells and (x - 1, y - dy) not in open_cells):
+                jump = (x, y)
+                break
+
+        vertical_jumps[key] = jump
+        return jump
+
+    def jump_horizontal(x, y, dx):
+        """
+        Scans from (x, y) along dx and returns the first cell that is the
+        goal or from which a vertical scan finds a jump point.
+        """
+        while True:
+            x += dx
+
+            if (x, y) not in open_cells:
+                return None
+
+            if (x, y) == goal or jump_vertical(x, y, 1) is not None or jump_vertical(x, y, -1) is not None:
+                return x, y
+
+    def directions(x, y, dx, dy):
+        """
+        Returns the (dx, dy) directions a canonical path that entered (x, y)
+        moving (dx, dy) may leave it by.
+        """
+        if dx == 0 and dy == 0:
+            return [(1, 0), (-1, 0), (0, 1), (0, -1)]
+
+        if dy == 0:
+            return [(dx, 0), (0, 1), (0, -1)]
+
+        result = [(0, dy)]
+
+        for side in (1, -1):
+            if is_open(x + side, y) and not is_open(x + side, y - dy):
+                result.append((side, 0))
+
+        return result
+
+    def estimate(cell):
+        return abs(cell[0] - goal[0]) + abs(cell[1] - goal[1])
+
+    start_node = (start, 0, 0)
+    parents = {start_node: None}
+    costs = {start_node: 0}
+    closed = set()
+    heap = [(estimate(start), 0, start_node)]
+
+    while heap:
+        _, cost, node = heapq.heappop(heap)
+
+        if node in closed or cost > costs[node]:
+            continue
+
+        cell, entry_dx, entry_dy = node
+
+        if cell == goal:
+            return _finish(problem, statistics, expanded_cells, _jump_path(parents, node))
+
+        closed.add(node)
+        statistics.expanded += 1
+        expanded_cells.append(cell)
+        x, y = cell
+
+        for dx, dy in directions(x, y, entry_dx, entry_dy):
+            jump = jump_horizontal(x, y, dx) if dy == 0 else jump_vertical(x, y, dy)
+            statistics.generated += 1
+
+            if jump is None:
+                continue
+
+            successor = (jump, dx, dy)
+            successor_cost = cost + abs(jump[0] - x) + abs(jump[1] - y)
+
+            if successor in closed or successor_cost >= costs.get(successor, successor_cost + 1):
+                continue
+
+            parents[successor] = node
+            costs[successor] = successor_cost
+            heapq.heappush(heap, (successor_cost + estimate(jump), successor_cost, successor))
+
+        statistics.max_frontier = max(statistics.max_frontier, len(heap))
+
+    return _finish(problem, statistics, expanded_cells, None)
+
+
+_VECTOR_ACTIONS = dict(((dx, dy), action) for action, dx, dy in VECTORS)
+
+
+def _jump_path(parents, node):
+    """
+    Returns the actions along the straight runs between the jump points
+    that lead to node.
+    """
+    actions = []
+
+    while parents[node] is not None:
+        (x, y), dx, dy = node
+        (px, py), _, _ = parents[node]
+        actions.extend([_VECTOR_ACTIONS[(dx, dy)]] * (abs(x - px) + abs(y - py)))
+        node = parents[node]
+
+    actions.reverse()
+    return actions
+
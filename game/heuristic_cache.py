@@ -0,0 +1,202 @@
+from collections import OrderedDict
+
+from game.maze_distances import get_maze_distances
+
+# How many entries each of a HeuristicCache's tables keeps by default.
+MAX_STATE_VALUES = 200000
+MAX_DISTANCES = 100000
+MAX_SPANNING_TREES = 100000
+
+# What LRUCache.get finds for a key it does not hold, so that None can be
+# cached like any other value.
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    A bounded mapping that evicts its least recently used entry when full,
+    and counts its hits, misses and evictions.
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        entry = self.entries.get(key, _MISSING)
+
+        if entry is _MISSING:
+            self.misses += 1
+            return default
+
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        self.entries.clear()
+
+    def __str__(self):
+        return '%d hits, %d misses, %d evictions' % (self.hits, self.misses, self.evictions)
+
+
+class HeuristicCache:
+    """
+    Values worth keeping between calls of the heuristics of one search
+    problem: the value of each heuristic for each state it was asked about,
+    the maze distances between pairs of cells and the weights of minimum
+    spanning trees over sets of cells (such as the food left in a state).
+
+    Each table is an LRUCache of bounded size. The maze distance table of
+    the walls is only looked up the first time a distance is needed.
+    """
+    def __init__(self, walls, max_state_values=MAX_STATE_VALUES, max_distances=MAX_DISTANCES,
+                 max_spanning_trees=MAX_SPANNING_TREES):
+        self.walls = walls
+        self.max_state_values = max_state_values
+        self.values = {}
+        self.distances = LRUCache(max_distances)
+        self.spanning_trees = LRUCache(max_spanning_trees)
+        self._maze_distances = None
+
+    def value(self, heuristic, state, problem):
+        """
+        Returns heuristic(state, problem), computing it only the first time
+        a state is asked about. States must be hashable.
+        """
+        values = self.values.get(heuristic)
+
+        if values is None:
+            values = self.values[heuristic] = LRUCache(self.max_state_values)
+
+        value = values.get(state, _MISSING)
+
+        if value is _MISSING:
+            value = heuristic(state, problem)
+            values.put(state, value)
+
+        return value
+
+    def distance(self, position1, position2):
+        """
+        Returns the maze distance between two open cells, or None if there
+        is no path between them.
+        """
+        key = (position1, position2) if position1 <= position2 else (position2, position1)
+        distance = self.distances.get(key, _MISSING)
+
+        if distance is _MISSING:
+            if self._maze_distances is None:
+                self._maze_distances = get_maze_distances(self.walls)
+
+            distance = self._maze_distances.get_distance(position1, position2)
+            self.distances.put(key, distance)
+
+        return distance
+
+    def spanning_tree(self, cells, key=None):
+        """
+        Returns the total maze distance along the edges of a minimum spanning
+        tree of the cells, which is 0 for fewer than two cells. Since any
+        path through all of the cells covers such a tree, the weight is a
+        lower bound on the length of the path.
+
+        Cells with no path between them are left in separate trees, and
+        the weight is that of the whole forest, which is still a lower bound.
+
+        The weight is cached under key, by default a frozenset of the cells.
+        A caller that already has a cheaper key for the set, such as the
+        food bits of a FoodSearchProblem state, can pass that instead.
+        """
+        if key is None:
+            key = frozenset(cells)
+
+        weight = self.spanning_trees.get(key)
+
+        if weight is not None:
+            return weight
+
+        # Prim's algorithm on the complete graph of the cells, with no edge
+        # between cells that cannot reach each other. When the closest cell
+        # left cannot be reached, a new tree is started from it.
+        remaining = list(cells)
+        weight = 0
+        unreachable = float('inf')
+
+        if remaining:
+            last = remaining.pop()
+            closest = [self._edge(last, cell, unreachable) for cell in remaining]
+
+            while remaining:
+                i = min(range(len(remaining)), key=closest.__getitem__)
+
+                if closest[i] != unreachable:
+                    weight += closest[i]
+
+                last = remaining[i]
+
+                remaining[i] = remaining[-1]
+                closest[i] = closest[-1]
+                remaining.pop()
+                closest.pop()
+
+                for j, cell in enumerate(remaining):
+                    distance = self._edge(last, cell, unreachable)
+                    if distance < closest[j]:
+                        closest[j] = distance
+
+        self.spanning_trees.put(key, weight)
+        return weight
+
+    def _edge(self, position1, position2, unreachable):
+        distance = self.distance(position1, position2)
+        return unreachable if distance is None else distance
+
+    def __str__(self):
+        values = ', '.join('%s %s' % (getattr(heuristic, '__name__', 'heuristic'), table)
+                           for heuristic, table in self.values.items())
+
+        return 'values (%s); distances %s; spanning trees %s' % (values or 'none', self.distances,
+                                                                 self.spanning_trees)
+
+
+def get_heuristic_cache(problem):
+    """
+    Returns the HeuristicCache of a search problem, attaching one to the
+    problem the first time it is asked for.
+    """
+    cache = getattr(problem, 'heuristic_cache', None)
+
+    if cache is None:
+        cache = problem.heuristic_cache = HeuristicCache(problem.walls)
+
+    return cache
+
+
+def cached_heuristic(heuristic):
+    """
+    Wraps a heuristic so that its value for each state is computed once
+    per problem and then looked up in the problem's HeuristicCache.
+    """
+    def cached(state, problem):
+        return get_heuristic_cache(problem).value(heuristic, state, problem)
+
+    cached.__name__ = getattr(heuristic, '__name__', 'heuristic')
+    cached.__doc__ = heuristic.__doc__
+    return cached
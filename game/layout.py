@@ -1,14 +1,31 @@
+import binascii
 import os
 import random
 import logging
+import struct
 
 from .grid import Grid
+from .adjacency import get_adjacency_table
+from . import maze_distances
+from .zobrist import get_zobrist_keys
 from utilities import manhattan_distance
 
 from functools import reduce
 
 VISIBILITY_MATRIX_CACHE = {}
 
+# Parsed layouts, keyed by the absolute path and modification time of the
+# file they were loaded from. Layouts are never modified once they have been
+# loaded, so one object can be shared by every game in the process.
+LAYOUT_CACHE = {}
+
+COMPILED_LAYOUT_EXTENSION = '.layc'
+
+_COMPILED_MAGIC = b'PLAY'
+_COMPILED_VERSION = 1
+_COMPILED_HEADER = struct.Struct('<4sHHHHHIII')
+_COMPILED_POSITION = struct.Struct('<BHH')
+
 
 class Layout:
     def __init__(self, layout_text):
@@ -21,9 +38,14 @@ class Layout:
         self.num_ghosts = 0
         self.process_layout_text(layout_text)
         self.layout_text = layout_text
-        self.total_food = len(self.food.as_list())
+        self.initialize_tables()
         # self.initialize_visibility_matrix()
 
+    def initialize_tables(self):
+        self.total_food = self.food.count()
+        self.adjacency = get_adjacency_table(self.walls)
+        self.zobrist = get_zobrist_keys(self.width, self.height)
+
     def get_ghost_count(self):
         return self.num_ghosts
 
@@ -59,6 +81,14 @@ class Layout:
         else:
             self.visibility = VISIBILITY_MATRIX_CACHE[reduce(str.__add__, self.layout_text)]
 
+    def get_maze_distances(self):
+        """
+        Returns the maze distance table for this layout (see
+        maze_distances.get_maze_distances). The table is computed on first
+        use and shared by layouts with the same walls.
+        """
+        return maze_distances.get_maze_distances(self.walls)
+
     def is_wall(self, pos):
         x, col = pos
         return self.walls[x][col]
@@ -89,35 +119,39 @@ class Layout:
     def __str__(self):
         return "\n".join(self.layout_text)
 
+    def __reduce__(self):
+        # Everything in a layout is derived from its text, so that is all
+        # that needs to be pickled when a layout is sent to another process.
+        return Layout, (self.layout_text,)
+
     def deep_copy(self):
-        return Layout(self.layout_text[:])
+        # The copy gets its own grids and lists but is not parsed again. The
+        # adjacency and Zobrist tables are read-only and are shared.
+        layout = Layout.__new__(Layout)
+        layout.__dict__.update(self.__dict__)
+        layout.layout_text = self.layout_text[:]
+        layout.walls = self.walls.copy()
+        layout.food = self.food.copy()
+        layout.capsules = self.capsules[:]
+        layout.agent_positions = self.agent_positions[:]
+        return layout
 
     def process_layout_text(self, layout_text):
-        logging.debug("------")
-        logging.debug("layout.height: %i" % self.height)
-        logging.debug("layout.width: %i" % self.width)
+        logging.debug("layout.height: %i, layout.width: %i", self.height, self.width)
 
         max_y = self.height - 1
 
         for y in range(self.height):
-            logging.debug("------")
             for x in range(self.width):
-                layout_char = layout_text[max_y - y][x]
-                logging.debug("(x: %d, y: %d) || [%d][%d] || %s" % (x, y, x, max_y - y, layout_char))
-                self.process_layout_character(x, y, layout_char)
-            logging.debug("------")
+                self.process_layout_character(x, y, layout_text[max_y - y][x])
 
         self.agent_positions.sort()
         self.agent_positions = [(i == 0, pos) for i, pos in self.agent_positions]
 
-        logging.debug("Walls:")
-        logging.debug(self.walls)
-        logging.debug("Dots:")
-        logging.debug(self.food)
-        logging.debug("Pellets:")
-        logging.debug(self.capsules)
-        logging.debug("Agents:")
-        logging.debug(self.agent_positions)
+        logging.debug("Walls:\n%s", self.walls)
+        logging.debug("Dots:\n%s", self.food)
+        logging.debug("Pellets: %s", self.capsules)
+        logging.debug("Agents: %s", self.agent_positions)
 
     def process_layout_character(self, x, y, layout_character):
         if layout_character == '%':
@@ -137,36 +171,179 @@ class Layout:
 
 
 def get_layout(name, back=2):
-    logging.debug("Board Layout Name: " + name)
-
-    if name.endswith('.lay'):
-        layout = load_layout('layouts/' + name)
-        if layout is None:
-            layout = load_layout(name)
+    """
+    Finds and loads a layout by name. The layouts directory and the current
+    directory are searched, then the same places up to back directories
+    above the current one. Names ending in .layc are compiled layouts.
+    """
+    logging.debug("Board Layout Name: %s", name)
+
+    if name.endswith('.lay') or name.endswith(COMPILED_LAYOUT_EXTENSION):
+        file_names = [name]
     else:
-        layout = load_layout('layouts/' + name + '.lay')
-        if layout is None:
-            layout = load_layout(name + '.lay')
+        file_names = [name + '.lay']
 
-    if layout is None and back >= 0:
-        current_directory = os.path.abspath('.')
-        os.chdir('..')
-        layout = get_layout(name, back - 1)
-        os.chdir(current_directory)
+    for level in range(back + 2):
+        prefix = os.path.join(*(['.'] + ['..'] * level))
 
-    logging.debug("Board Layout:\n%s" % layout)
+        for file_name in file_names:
+            for fullname in [os.path.join(prefix, 'layouts', file_name), os.path.join(prefix, file_name)]:
+                layout = load_layout(fullname)
+                if layout is not None:
+                    logging.debug("Board Layout:\n%s", layout)
+                    return layout
 
-    return layout
+    return None
 
 
 def load_layout(fullname):
-    logging.debug("Board Layout File Path: " + fullname)
-    if not os.path.exists(fullname):
+    """
+    Loads a layout file, or a compiled layout file, or returns None if there
+    is no such file. Each file is only parsed once per process unless it
+    changes on disk.
+    """
+    logging.debug("Board Layout File Path: %s", fullname)
+
+    try:
+        key = (os.path.abspath(fullname), os.path.getmtime(fullname))
+    except OSError:
         return None
 
-    f = open(fullname)
+    if key in LAYOUT_CACHE:
+        return LAYOUT_CACHE[key]
+
+    if fullname.endswith(COMPILED_LAYOUT_EXTENSION):
+        layout = load_compiled_layout(fullname)
+    else:
+        f = open(fullname)
+
+        try:
+            layout = Layout([line.strip() for line in f])
+        finally:
+            f.close()
+
+    LAYOUT_CACHE[key] = layout
+    return layout
+
+
+def _int_to_bytes(value, length):
+    return binascii.unhexlify('%0*x' % (2 * length, value))
+
+
+def _bytes_to_int(data):
+    return int(binascii.hexlify(data), 16) if data else 0
+
+
+def compile_layout(layout, path, include_distances=False):
+    """
+    Writes a layout in the compiled format: a fixed header followed by the
+    layout text, the wall and food bitboards, the capsule and agent start
+    positions and, optionally, the layout's maze distance table. Loading it
+    back is a single read with no parsing of the text.
+    """
+    grid_size = (layout.width * layout.height + 7) // 8
+    text = '\n'.join(layout.layout_text).encode('utf-8')
+    distances = layout.get_maze_distances().to_bytes() if include_distances else b''
+
+    positions = [_COMPILED_POSITION.pack(0, x, y) for x, y in layout.capsules]
+    positions += [_COMPILED_POSITION.pack(int(is_pacman), x, y) for is_pacman, (x, y) in layout.agent_positions]
+
+    f = open(path, 'wb')
+
+    try:
+        f.write(_COMPILED_HEADER.pack(_COMPILED_MAGIC, _COMPILED_VERSION, layout.width, layout.height,
+                                      len(layout.capsules), len(layout.agent_positions),
+                                      len(text), grid_size, len(distances)))
+        f.write(text)
+        f.write(_int_to_bytes(layout.walls.bits, grid_size))
+        f.write(_int_to_bytes(layout.food.bits, grid_size))
+        f.write(b''.join(positions))
+        f.write(distances)
+    finally:
+        f.close()
+
+
+def load_compiled_layout(path):
+    """
+    Reads a layout written by compile_layout. A distance table stored with
+    the layout is shared with every layout that has the same walls.
+    """
+    f = open(path, 'rb')
 
     try:
-        return Layout([line.strip() for line in f])
+        data = f.read()
     finally:
         f.close()
+
+    magic, version, width, height, num_capsules, num_agents, text_size, grid_size, distances_size = \
+        _COMPILED_HEADER.unpack_from(data)
+
+    if magic != _COMPILED_MAGIC or version != _COMPILED_VERSION:
+        raise ValueError("%s is not a compiled layout" % path)
+
+    offset = _COMPILED_HEADER.size
+
+    layout = Layout.__new__(Layout)
+    layout.width = width
+    layout.height = height
+    layout.layout_text = data[offset:offset + text_size].decode('utf-8').split('\n')
+    offset += text_size
+
+    layout.walls = Grid(width, height)
+    layout.walls.bits = _bytes_to_int(data[offset:offset + grid_size])
+    offset += grid_size
+
+    layout.food = Grid(width, height)
+    layout.food.bits = _bytes_to_int(data[offset:offset + grid_size])
+    offset += grid_size
+
+    positions = []
+    for _ in range(num_capsules + num_agents):
+        positions.append(_COMPILED_POSITION.unpack_from(data, offset))
+        offset += _COMPILED_POSITION.size
+
+    layout.capsules = [(x, y) for _, x, y in positions[:num_capsules]]
+    layout.agent_positions = [(flag == 1, (x, y)) for flag, x, y in positions[num_capsules:]]
+    layout.num_ghosts = num_agents - sum(1 for is_pacman, _ in layout.agent_positions if is_pacman)
+    layout.initialize_tables()
+
+    if distances_size:
+        maze_distances.store_maze_distances(layout.walls,
+                                            data[offset:offset + distances_size])
+
+    return layout
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compiles layouts into the binary layout format")
+
+    parser.add_argument("layouts", nargs="+",
+                        help="the names of the layouts to compile")
+
+    parser.add_argument("-o", "--output", default="layouts",
+                        help="the directory to write compiled layouts to (default %(default)s)")
+
+    parser.add_argument("-d", "--distances", default=False, action="store_true",
+                        help="include the maze distance table of each layout")
+
+    options = parser.parse_args(argv)
+
+    for name in options.layouts:
+        layout = get_layout(name)
+
+        if layout is None:
+            raise Exception("The layout " + name + " cannot be found")
+
+        base_name = os.path.basename(name)
+        if base_name.endswith('.lay'):
+            base_name = base_name[:-len('.lay')]
+
+        path = os.path.join(options.output, base_name + COMPILED_LAYOUT_EXTENSION)
+        compile_layout(layout, path, options.distances)
+        print("%s -> %s (%d bytes)" % (name, path, os.path.getsize(path)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""
+Generates random layouts of any size, for measuring how the engine scales
+beyond the layouts that ship in the layouts directory.
+
+    python -m game.layout_generator --width 200 --height 200 -o layouts/generated_200.lay
+"""
+from __future__ import print_function
+
+import argparse
+import random
+
+
+def generate_layout_text(width, height, wall_density=0.3, food_density=0.5, num_capsules=4, num_ghosts=2,
+                         seed=None):
+    """
+    Returns the text (a list of rows) of a random layout.
+
+    The board starts as a maze carved by a randomized depth first search,
+    which connects every open cell, and interior walls are then knocked out
+    at random until at most wall_density of the interior is wall. Only a
+    wall next to a cell that is already open is knocked out, so every open
+    cell can still be reached. The density cannot be raised above that of
+    the maze itself, which is about one half.
+
+    Pac-Man, the ghosts and the capsules are put on random open cells, and
+    each remaining open cell holds food with probability food_density.
+    """
+    if width < 3 or height < 3:
+        raise ValueError("A layout must be at least 3 by 3")
+
+    rng = random.Random(seed)
+    cells = [['%'] * width for _ in range(height)]
+
+    # Carve the maze through the cells at odd coordinates.
+    start = (1, 1)
+    cells[1][1] = ' '
+    stack = [start]
+
+    while stack:
+        x, y = stack[-1]
+        options = [(dx, dy) for dx, dy in [(0, 2), (0, -2), (2, 0), (-2, 0)]
+                   if 0 < x + dx < width - 1 and 0 < y + dy < height - 1 and cells[y + dy][x + dx] == '%']
+
+        if not options:
+            stack.pop()
+            continue
+
+        dx, dy = rng.choice(options)
+        cells[y + dy // 2][x + dx // 2] = ' '
+        cells[y + dy][x + dx] = ' '
+        stack.append((x + dx, y + dy))
+
+    interior = [(x, y) for y in range(1, height - 1) for x in range(1, width - 1)]
+    walls = [(x, y) for x, y in interior if cells[y][x] == '%']
+    rng.shuffle(walls)
+
+    # A wall with no open neighbor would open up a cell that cannot be
+    # reached. Such walls wait for a later pass, by which time a neighbor
+    # may have been opened.
+    to_remove = len(walls) - int(wall_density * len(interior))
+
+    while to_remove > 0:
+        remaining = []
+
+        for x, y in walls:
+            if to_remove > 0 and ' ' in (cells[y - 1][x], cells[y + 1][x], cells[y][x - 1], cells[y][x + 1]):
+                cells[y][x] = ' '
+                to_remove -= 1
+            else:
+                remaining.append((x, y))
+
+        if len(remaining) == len(walls):
+            break
+
+        walls = remaining
+
+    open_cells = [(x, y) for x, y in interior if cells[y][x] == ' ']
+    rng.shuffle(open_cells)
+
+    if len(open_cells) < 1 + num_ghosts + num_capsules:
+        raise ValueError("The layout has too few open cells for its agents and capsules")
+
+    x, y = open_cells.pop()
+    cells[y][x] = 'P'
+
+    for _ in range(num_ghosts):
+        x, y = open_cells.pop()
+        cells[y][x] = 'G'
+
+    for _ in range(num_capsules):
+        x, y = open_cells.pop()
+        cells[y][x] = 'o'
+
+    for x, y in open_cells:
+        if rng.random() < food_density:
+            cells[y][x] = '.'
+
+    return [''.join(row) for row in cells]
+
+
+def write_layout(path, layout_text):
+    f = open(path, 'w')
+
+    try:
+        f.write('\n'.join(layout_text) + '\n')
+    finally:
+        f.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Random layout generator")
+
+    parser.add_argument("--width", type=int, default=100,
+                        help="width of the layout (default %(default)s)")
+
+    parser.add_argument("--height", type=int, default=100,
+                        help="height of the layout (default %(default)s)")
+
+    parser.add_argument("--walls", type=float, default=0.3,
+                        help="largest fraction of the interior that is wall (default %(default)s)")
+
+    parser.add_argument("--food", type=float, default=0.5,
+                        help="fraction of the free cells that hold food (default %(default)s)")
+
+    parser.add_argument("--capsules", type=int, default=4,
+                        help="number of capsules (default %(default)s)")
+
+    parser.add_argument("--ghosts", type=int, default=2,
+                        help="number of ghosts (default %(default)s)")
+
+    parser.add_argument("--seed", type=int, default=None,
+                        help="random seed (default %(default)s)")
+
+    parser.add_argument("-o", "--output", required=True,
+                        help="the .lay file to write")
+
+    options = parser.parse_args(argv)
+
+    layout_text = generate_layout_text(options.width, options.height, options.walls, options.food,
+                                       options.capsules, options.ghosts, options.seed)
+    write_layout(options.output, layout_text)
+    print("Wrote %dx%d layout to %s" % (options.width, options.height, options.output))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+from array import array
+from operator import mul
+
+import utilities
+
+
+class LinearQFunction:
+    """
+    A Q-function that is a weighted sum of the features a FeatureExtractor
+    gives for a state and action.
+
+    The weights are an array of floats with one entry per feature. For an
+    extractor with a schema the features of all the legal actions in a
+    state come as one matrix, and their Q-values are the product of that
+    matrix with the weights. Other extractors give a dictionary of features
+    for each action; each feature name is given the next free index in
+    the weights the first time it is seen, so the same arithmetic applies.
+
+    Features do not depend on the weights, so the features of the last few
+    states are kept. In a game the features of a state are then worked out
+    once, for choosing an action, and reused when the move is learned from.
+    """
+    def __init__(self, extractor, num_cached_states=2):
+        self.extractor = extractor
+        self.schema = extractor.schema
+        self.num_cached_states = num_cached_states
+        self.cached = []
+
+        if self.schema is not None:
+            self.feature_ids = dict((name, i) for i, name in enumerate(self.schema))
+            self.weights = array('d', [0.0]) * len(self.schema)
+        else:
+            self.feature_ids = {}
+            self.weights = array('d', [0.0]) * 16
+
+    def _feature_id(self, name):
+        feature_id = self.feature_ids.get(name)
+
+        if feature_id is None:
+            feature_id = self.feature_ids[name] = len(self.feature_ids)
+
+            if feature_id >= len(self.weights):
+                self.weights.extend(array('d', [0.0]) * len(self.weights))
+
+        return feature_id
+
+    def features(self, state, actions):
+        """
+        Returns a list holding, for each action, the features of the action
+        in the state as a pair of (feature indices, feature values).
+        """
+        for cached_state, cached_actions, rows in self.cached:
+            if cached_state is state:
+                if cached_actions == actions:
+                    return rows
+
+                if len(actions) == 1 and actions[0] in cached_actions:
+                    return [rows[cached_actions.index(actions[0])]]
+
+        if self.schema is not None:
+            width = len(self.schema)
+            indices = range(width)
+            matrix = self.extractor.get_feature_matrix(state, actions)
+            rows = [(indices, matrix[i * width:(i + 1) * width]) for i in range(len(actions))]
+        else:
+            rows = []
+
+            for action in actions:
+                features = self.extractor.get_features(state, action)
+                rows.append(([self._feature_id(name) for name in features], list(features.values())))
+
+        self.cached.append((state, list(actions), rows))
+
+        if len(self.cached) > self.num_cached_states:
+            self.cached.pop(0)
+
+        return rows
+
+    def get_q_values(self, state, actions):
+        """
+        Returns the Q-values of the actions in a state, in order.
+        """
+        weights = self.weights
+
+        if self.schema is not None:
+            return [sum(map(mul, weights, values)) for _, values in self.features(state, actions)]
+
+        return [sum([weights[i] * value for i, value in zip(ids, values)])
+                for ids, values in self.features(state, actions)]
+
+    def get_q_value(self, state, action):
+        return self.get_q_values(state, [action])[0]
+
+    def update(self, state, action, difference, alpha):
+        """
+        Moves each weight by alpha times the difference times the value of
+        its feature for the action in the state.
+        """
+        ids, values = self.features(state, [action])[0]
+        weights = self.weights
+        step = alpha * difference
+
+        for i, value in zip(ids, values):
+            weights[i] += step * value
+
+    def get_parameters(self):
+        """
+        Returns the feature indices and the weights.
+        """
+        return self.feature_ids, self.weights
+
+    def set_parameters(self, parameters):
+        feature_ids, weights = parameters
+
+        # Features kept for states refer to the old feature indices.
+        if feature_ids != self.feature_ids:
+            self.cached = []
+
+        self.feature_ids = feature_ids
+        self.weights = weights
+
+    def snapshot(self):
+        """
+        Returns copies of the feature indices and the weights, for a
+        checkpoint.
+        """
+        return {'feature_ids': dict(self.feature_ids), 'weights': array('d', self.weights)}
+
+    def get_weights(self):
+        """
+        Returns the weights as a Counter keyed on feature names.
+        """
+        weights = utilities.Counter()
+
+        for name, i in self.feature_ids.items():
+            weights[name] = self.weights[i]
+
+        return weights
@@ -0,0 +1,594 @@
+import getpass
+import hashlib
+import heapq
+import logging
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+
+from .adjacency import get_adjacency_table
+
+
+def default_cache_directory():
+    """
+    Returns the directory distance tables are kept in unless another is
+    given: one for each user in the system's temporary directory.
+    """
+    try:
+        user = getpass.getuser()
+    except (ImportError, KeyError, OSError):
+        user = 'shared'
+
+    return os.path.join(tempfile.gettempdir(), 'pacumen-distances-%s' % user)
+
+
+# Directory where distance tables are saved and loaded, keyed by a hash of
+# the walls. Tables are memory-mapped from these files, so processes that
+# use the same board share a single copy. Tables are only kept in memory
+# when this is None.
+DISTANCE_CACHE_DIRECTORY = default_cache_directory()
+
+# Boards with more open cells than this get a LandmarkDistances table rather
+# than an all-pairs MazeDistances table, whose size grows with the square of
+# the number of cells.
+MAX_ALL_PAIRS_CELLS = 4096
+
+NUM_LANDMARKS = 16
+
+MAZE_DISTANCES_CACHE = {}
+
+_FILE_MAGIC = b'PMDT'
+_FILE_HEADER = struct.Struct('<4scIII')
+
+_LANDMARK_MAGIC = b'PMDL'
+_LANDMARK_HEADER = struct.Struct('<4scIIII')
+
+
+def _typecode_for(num_cells):
+    # Distances fit in 16 bits unless the board has too many open cells.
+    return 'H' if num_cells < 0xFFFF else 'I'
+
+
+def _little_endian_bytes(values, typecode):
+    if sys.byteorder != 'little':
+        values = array(typecode, values)
+        values.byteswap()
+
+    return values.tobytes()
+
+
+def _mapped_array(path, offset, typecode, length):
+    """
+    Returns a read-only view of length integers of the given type, stored
+    in a file from the given offset, and the memory mapping that backs it.
+    The file holds little-endian integers, so this is only possible on a
+    little-endian machine; (None, None) is returned on any other.
+    """
+    if sys.byteorder != 'little':
+        return None, None
+
+    f = open(path, 'rb')
+
+    try:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    finally:
+        f.close()
+
+    view = memoryview(mapping)[offset:].cast(typecode)
+
+    if len(view) != length:
+        view.release()
+        mapping.close()
+        raise ValueError("%s is not a complete distance table" % path)
+
+    return view, mapping
+
+
+def _neighbor_ids(adjacency, cells, cell_ids):
+    return [[cell_ids[neighbor] for neighbor in adjacency.neighbors[cell] if neighbor != cell]
+            for cell in cells]
+
+
+class MazeDistances:
+    """
+    All-pairs shortest path distances between the open cells of a board.
+
+    Every open cell is given a dense integer id. The distances are computed
+    once, with a breadth first search from each cell, and are stored in a
+    flat n * n array indexed by cell id. Queries are then a dictionary
+    lookup and an array index.
+    """
+    def __init__(self, walls):
+        self.width = walls.width
+        self.height = walls.height
+        self.cells = walls.as_list(False)
+        self.cell_ids = dict((cell, i) for i, cell in enumerate(self.cells))
+
+        self.typecode = _typecode_for(len(self.cells))
+        self.unreachable = (1 << (8 * array(self.typecode).itemsize)) - 1
+        self.distances = None
+        self.mapping = None
+
+        self.adjacency = get_adjacency_table(walls)
+
+    def compute(self):
+        n = len(self.cells)
+        neighbor_ids = _neighbor_ids(self.adjacency, self.cells, self.cell_ids)
+
+        self.distances = array(self.typecode, [self.unreachable]) * (n * n)
+
+        for source in range(n):
+            row = source * n
+            self.distances[row + source] = 0
+            frontier = [source]
+            distance = 0
+
+            while frontier:
+                distance += 1
+                next_frontier = []
+
+                for cell in frontier:
+                    for neighbor in neighbor_ids[cell]:
+                        if self.distances[row + neighbor] == self.unreachable:
+                            self.distances[row + neighbor] = distance
+                            next_frontier.append(neighbor)
+
+                frontier = next_frontier
+
+        return self
+
+    def get_distance(self, position1, position2):
+        """
+        Returns the maze distance between two open cells, or None if there
+        is no path between them.
+        """
+        i = self.cell_ids[position1]
+        j = self.cell_ids[position2]
+        distance = self.distances[i * len(self.cells) + j]
+
+        if distance == self.unreachable:
+            return None
+
+        return distance
+
+    def get_closest_distance(self, position, grid):
+        """
+        Returns the maze distance from a position to the closest cell that is
+        set in the grid (such as a food grid), or None if none can be reached.
+        """
+        n = len(self.cells)
+        row = self.cell_ids[position] * n
+        distances = self.distances
+        cell_ids = self.cell_ids
+
+        closest = self.unreachable
+        for cell in grid.as_list():
+            j = cell_ids.get(cell)
+            if j is not None and distances[row + j] < closest:
+                closest = distances[row + j]
+
+        if closest == self.unreachable:
+            return None
+
+        return closest
+
+    def to_bytes(self):
+        """
+        Returns the table in the file format: a header followed by the
+        distances as little-endian integers.
+        """
+        header = _FILE_HEADER.pack(_FILE_MAGIC, self.typecode.encode('ascii'),
+                                   self.width, self.height, len(self.cells))
+
+        return header + _little_endian_bytes(self.distances, self.typecode)
+
+    def _read_header(self, data, source):
+        magic, typecode, width, height, n = _FILE_HEADER.unpack_from(data)
+
+        if magic != _FILE_MAGIC or (width, height, n) != (self.width, self.height, len(self.cells)):
+            raise ValueError("%s is not a distance table for this board" % source)
+
+        self.typecode = typecode.decode('ascii')
+        return _FILE_HEADER.size
+
+    def from_bytes(self, data, source='data'):
+        offset = self._read_header(data, source)
+
+        n = len(self.cells)
+        self.distances = array(self.typecode)
+        self.distances.frombytes(data[offset:])
+
+        if len(self.distances) != n * n:
+            raise ValueError("%s is not a complete distance table" % source)
+
+        if sys.byteorder != 'little':
+            self.distances.byteswap()
+
+        return self
+
+    def save(self, path):
+        f = open(path, 'wb')
+
+        try:
+            f.write(self.to_bytes())
+        finally:
+            f.close()
+
+    def load(self, path):
+        f = open(path, 'rb')
+
+        try:
+            data = f.read()
+        finally:
+            f.close()
+
+        return self.from_bytes(data, path)
+
+    def map(self, path):
+        """
+        Uses a saved table in place, memory-mapped, instead of reading it.
+        """
+        f = open(path, 'rb')
+
+        try:
+            offset = self._read_header(f.read(_FILE_HEADER.size), path)
+        finally:
+            f.close()
+
+        n = len(self.cells)
+        self.distances, self.mapping = _mapped_array(path, offset, self.typecode, n * n)
+
+        if self.distances is None:
+            return self.load(path)
+
+        return self
+
+
+class LandmarkDistances:
+    """
+    Maze distances for boards too large for an all-pairs table.
+
+    Only the distances from a few landmark cells to every cell are stored,
+    in a flat k * n array. By the triangle inequality these give a lower
+    bound on the distance between any two cells, and exact distances are
+    found by an A* search that uses that bound as its heuristic. Like an
+    all-pairs table, it is memory-mapped from a file (see map) when there
+    is a DISTANCE_CACHE_DIRECTORY, so that all the processes working on a
+    board share one copy.
+    """
+    def __init__(self, walls, num_landmarks=NUM_LANDMARKS):
+        self.width = walls.width
+        self.height = walls.height
+        self.cells = walls.as_list(False)
+        self.cell_ids = dict((cell, i) for i, cell in enumerate(self.cells))
+        self.num_landmarks = min(num_landmarks, len(self.cells))
+
+        self.typecode = _typecode_for(len(self.cells))
+        self.unreachable = (1 << (8 * array(self.typecode).itemsize)) - 1
+        self.landmarks = None
+        self.distances = None
+        self.mapping = None
+
+        self.adjacency = get_adjacency_table(walls)
+        self.neighbor_ids = _neighbor_ids(self.adjacency, self.cells, self.cell_ids)
+
+    def _distances_from(self, source):
+        distances = array(self.typecode, [self.unreachable]) * len(self.cells)
+        distances[source] = 0
+        frontier = [source]
+        distance = 0
+
+        while frontier:
+            distance += 1
+            next_frontier = []
+
+            for cell in frontier:
+                for neighbor in self.neighbor_ids[cell]:
+                    if distances[neighbor] == self.unreachable:
+                        distances[neighbor] = distance
+                        next_frontier.append(neighbor)
+
+            frontier = next_frontier
+
+        return distances
+
+    def compute(self):
+        """
+        Picks the landmarks by farthest point sampling: each new landmark is
+        the cell farthest from the landmarks chosen so far. A cell that no
+        landmark can reach counts as farthest of all, so every walled-off
+        part of the board gets a landmark while there are any left.
+        """
+        n = len(self.cells)
+        self.landmarks = array('I')
+        self.distances = array(self.typecode)
+
+        nearest = array('I', [0xFFFFFFFF]) * n
+        candidate = 0
+
+        for _ in range(self.num_landmarks):
+            self.landmarks.append(candidate)
+            row = self._distances_from(candidate)
+            self.distances.extend(row)
+
+            for cell in range(n):
+                if row[cell] < nearest[cell]:
+                    nearest[cell] = row[cell]
+
+            candidate = max(range(n), key=nearest.__getitem__)
+
+        return self
+
+    def lower_bound(self, i, j):
+        """
+        Returns a lower bound on the distance between two cells given by id,
+        or None if a landmark shows that there is no path between them.
+        """
+        n = len(self.cells)
+        distances = self.distances
+        unreachable = self.unreachable
+        bound = 0
+
+        for row in range(0, len(self.landmarks) * n, n):
+            di = distances[row + i]
+            dj = distances[row + j]
+
+            if (di == unreachable) != (dj == unreachable):
+                return None
+
+            if di != unreachable and abs(di - dj) > bound:
+                bound = abs(di - dj)
+
+        return bound
+
+    def get_distance(self, position1, position2):
+        """
+        Returns the maze distance between two open cells, or None if there
+        is no path between them.
+        """
+        start = self.cell_ids[position1]
+        goal = self.cell_ids[position2]
+
+        if self.lower_bound(start, goal) is None:
+            return None
+
+        # The heuristic is the best of the landmark bounds and the Manhattan
+        # distance, which is tighter on boards with few walls.
+        n = len(self.cells)
+        distances = self.distances
+        cells = self.cells
+        goal_x, goal_y = position2
+        goal_rows = [(row, distances[row + goal]) for row in range(0, len(self.landmarks) * n, n)
+                     if distances[row + goal] != self.unreachable]
+
+        def heuristic(cell):
+            x, y = cells[cell]
+            bound = abs(x - goal_x) + abs(y - goal_y)
+
+            for row, goal_distance in goal_rows:
+                difference = distances[row + cell] - goal_distance
+                if difference > bound:
+                    bound = difference
+                elif -difference > bound:
+                    bound = -difference
+
+            return bound
+
+        # Ties are broken towards the deepest node, which on open boards
+        # saves expanding every cell with the same estimate.
+        costs = {start: 0}
+        fringe = [(heuristic(start), 0, start)]
+
+        while fringe:
+            _, negative_cost, cell = heapq.heappop(fringe)
+            cost = -negative_cost
+
+            if cell == goal:
+                return cost
+
+            if cost > costs[cell]:
+                continue
+
+            for neighbor in self.neighbor_ids[cell]:
+                if neighbor not in costs or cost + 1 < costs[neighbor]:
+                    costs[neighbor] = cost + 1
+                    heapq.heappush(fringe, (cost + 1 + heuristic(neighbor), -cost - 1, neighbor))
+
+        return None
+
+    def get_closest_distance(self, position, grid):
+        """
+        Returns the maze distance from a position to the closest cell that is
+        set in the grid, or None if none can be reached. This is a breadth
+        first search out from the position, which stops at the first cell
+        found.
+        """
+        x, y = position
+        if grid[x][y]:
+            return 0
+
+        neighbors = self.adjacency.neighbors
+        seen = set([position])
+        frontier = [position]
+        distance = 0
+
+        while frontier and grid.bits:
+            distance += 1
+            next_frontier = []
+
+            for cell in frontier:
+                for neighbor in neighbors[cell]:
+                    if neighbor not in seen:
+                        if grid[neighbor[0]][neighbor[1]]:
+                            return distance
+                        seen.add(neighbor)
+                        next_frontier.append(neighbor)
+
+            frontier = next_frontier
+
+        return None
+
+    def to_bytes(self):
+        """
+        Returns the table in the file format: a header, the landmark cell
+        ids and then the distances, all as little-endian integers.
+        """
+        header = _LANDMARK_HEADER.pack(_LANDMARK_MAGIC, self.typecode.encode('ascii'), self.width, self.height,
+                                       len(self.cells), len(self.landmarks))
+
+        return header + _little_endian_bytes(self.landmarks, 'I') + \
+            _little_endian_bytes(self.distances, self.typecode)
+
+    def _read_header(self, data, source):
+        magic, typecode, width, height, n, k = _LANDMARK_HEADER.unpack_from(data)
+
+        if magic != _LANDMARK_MAGIC or (width, height, n) != (self.width, self.height, len(self.cells)):
+            raise ValueError("%s is not a landmark table for this board" % source)
+
+        self.typecode = typecode.decode('ascii')
+
+        offset = _LANDMARK_HEADER.size
+        self.landmarks = array('I')
+        self.landmarks.frombytes(data[offset:offset + 4 * k])
+
+        if sys.byteorder != 'little':
+            self.landmarks.byteswap()
+
+        return offset + 4 * k
+
+    def from_bytes(self, data, source='data'):
+        offset = self._read_header(data, source)
+
+        self.distances = array(self.typecode)
+        self.distances.frombytes(data[offset:])
+
+        if len(self.distances) != len(self.landmarks) * len(self.cells):
+            raise ValueError("%s is not a complete landmark table" % source)
+
+        if sys.byteorder != 'little':
+            self.distances.byteswap()
+
+        return self
+
+    def save(self, path):
+        f = open(path, 'wb')
+
+        try:
+            f.write(self.to_bytes())
+        finally:
+            f.close()
+
+    def load(self, path):
+        f = open(path, 'rb')
+
+        try:
+            data = f.read()
+        finally:
+            f.close()
+
+        return self.from_bytes(data, path)
+
+    def map(self, path):
+        """
+        Uses a saved table in place, memory-mapped, instead of reading it.
+        """
+        f = open(path, 'rb')
+
+        try:
+            header = f.read(_LANDMARK_HEADER.size)
+            num_landmarks = _LANDMARK_HEADER.unpack_from(header)[-1]
+            offset = self._read_header(header + f.read(4 * num_landmarks), path)
+        finally:
+            f.close()
+
+        length = len(self.landmarks) * len(self.cells)
+        self.distances, self.mapping = _mapped_array(path, offset, self.typecode, length)
+
+        if self.distances is None:
+            return self.load(path)
+
+        return self
+
+
+def walls_hash(walls):
+    return hashlib.sha1(('%d:%d:%x' % (walls.width, walls.height, walls.bits)).encode('ascii')).hexdigest()
+
+
+def _save_atomically(table, path):
+    # Several processes may build the same table at once. Each writes its
+    # own temporary file and renames it into place, so a reader never sees
+    # a partly written table.
+    directory = os.path.dirname(path)
+
+    if not os.path.isdir(directory):
+        try:
+            os.makedirs(directory, 0o700)
+        except OSError:
+            if not os.path.isdir(directory):
+                raise
+
+    temporary = '%s.%d.tmp' % (path, os.getpid())
+    table.save(temporary)
+    os.replace(temporary, path)
+    logging.info("Saved maze distances for a %dx%d board to %s", table.width, table.height, path)
+
+
+def get_maze_distances(walls):
+    """
+    Returns the distance table for a wall grid, computing it on first use.
+    Boards with the same walls share one table.
+
+    Boards with up to MAX_ALL_PAIRS_CELLS open cells get a MazeDistances
+    table and larger ones a LandmarkDistances table; both answer
+    get_distance and get_closest_distance. A table that is kept in a file
+    is memory-mapped from it rather than read into memory.
+    """
+    key = (walls.width, walls.height, walls.bits)
+
+    if key in MAZE_DISTANCES_CACHE:
+        return MAZE_DISTANCES_CACHE[key]
+
+    num_cells = walls.count(False)
+
+    if num_cells > MAX_ALL_PAIRS_CELLS:
+        distances = LandmarkDistances(walls)
+        extension = '.landmarks'
+    else:
+        distances = MazeDistances(walls)
+        extension = '.dist'
+
+    path = None
+
+    if DISTANCE_CACHE_DIRECTORY is not None:
+        path = os.path.join(DISTANCE_CACHE_DIRECTORY, walls_hash(walls) + extension)
+
+    if path is not None and os.path.exists(path):
+        distances.map(path)
+    else:
+        distances.compute()
+
+        if path is not None:
+            _save_atomically(distances, path)
+            distances.map(path)
+
+    MAZE_DISTANCES_CACHE[key] = distances
+    return distances
+
+
+def store_maze_distances(walls, data):
+    """
+    Makes a distance table that was stored elsewhere (such as in a compiled
+    layout) the shared table for a wall grid, unless it already has one.
+    """
+    key = (walls.width, walls.height, walls.bits)
+
+    if key not in MAZE_DISTANCES_CACHE:
+        if data[:len(_LANDMARK_MAGIC)] == _LANDMARK_MAGIC:
+            MAZE_DISTANCES_CACHE[key] = LandmarkDistances(walls).from_bytes(data)
+        else:
+            MAZE_DISTANCES_CACHE[key] = MazeDistances(walls).from_bytes(data)
+
+    return MAZE_DISTANCES_CACHE[key]
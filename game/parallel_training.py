@@ -0,0 +1,244 @@
+from __future__ import print_function
+
+import multiprocessing
+import os
+import pickle
+import random
+import sys
+import time
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+# How many episodes the learner applies between progress reports.
+REPORT_PERIOD = 100
+
+# How many episodes each actor may have sent that the learner has not yet
+# taken. Actors wait rather than run further ahead of the learner, which
+# bounds how stale their parameters get.
+EPISODES_IN_FLIGHT = 2
+
+
+def derive_seed(master_seed, actor_id):
+    return random.Random('%s:actor:%d' % (master_seed, actor_id)).getrandbits(32)
+
+
+class TrainingStatistics:
+    """
+    Throughput of a parallel training run. Staleness is how many parameter
+    broadcasts the learner had made since the one an episode was played
+    with, at the time the learner applied the episode.
+    """
+    def __init__(self, num_actors):
+        self.num_actors = num_actors
+        self.episodes = 0
+        self.transitions = 0
+        self.discarded_episodes = 0
+        self.broadcasts = 0
+        self.total_staleness = 0
+        self.max_staleness = 0
+        self.start_time = time.time()
+        self.elapsed = 0.0
+
+    def record(self, num_transitions, staleness):
+        self.episodes += 1
+        self.transitions += num_transitions
+        self.total_staleness += staleness
+        self.max_staleness = max(self.max_staleness, staleness)
+        self.elapsed = time.time() - self.start_time
+
+    def episodes_per_second(self):
+        return self.episodes / self.elapsed if self.elapsed else 0.0
+
+    def transitions_per_second(self):
+        return self.transitions / self.elapsed if self.elapsed else 0.0
+
+    def mean_staleness(self):
+        return self.total_staleness / float(self.episodes) if self.episodes else 0.0
+
+    def __str__(self):
+        return ('%d episodes, %d transitions in %.1fs with %d actors: %.1f episodes/sec, %.0f transitions/sec, '
+                'staleness mean %.2f max %d, %d broadcasts, %d episodes discarded' %
+                (self.episodes, self.transitions, self.elapsed, self.num_actors, self.episodes_per_second(),
+                 self.transitions_per_second(), self.mean_staleness(), self.max_staleness, self.broadcasts,
+                 self.discarded_episodes))
+
+
+def run_actor(actor_id, agent, board, ghosts, timeout, seed, parameter_queue, transition_queue, stop):
+    """
+    Plays training games in an actor process until told to stop.
+
+    The agent only acts, with the parameters of the latest broadcast that
+    has arrived, and records the transitions it observes instead of
+    learning from them. Each episode is sent to the learner as one message,
+    tagged with the version of the parameters it was played with.
+    """
+    from displays import textual
+    from rules.game_rules import GameRules
+
+    # The learner reports progress; the agents' own reports are dropped.
+    sys.stdout = open(os.devnull, 'w')
+    random.seed(seed)
+
+    rules = GameRules(timeout)
+    rules.quiet = True
+    epsilon = agent.epsilon
+    version = -1
+
+    try:
+        while not stop.is_set():
+            # Apply every broadcast waiting, in order, blocking only until
+            # the first one arrives. The first holds all of the parameters
+            # and the rest only what changed since the one before.
+            try:
+                message = parameter_queue.get(block=version < 0, timeout=1)
+
+                while message is not None:
+                    version, episodes, parameters = pickle.loads(message)
+
+                    if version == 0:
+                        agent.set_parameters(parameters)
+                    else:
+                        agent.apply_parameter_changes(parameters)
+
+                    agent.episodes_so_far = episodes
+
+                    try:
+                        message = parameter_queue.get_nowait()
+                    except queue.Empty:
+                        message = None
+            except queue.Empty:
+                if version < 0:
+                    continue
+
+            agent.epsilon = epsilon
+            agent.transition_log = []
+
+            # Learning agents do not modify the states they are given, and
+            # shared states keep one layout for the whole episode, which
+            # makes the episode cheap to send.
+            game = rules.new_game(board, agent, ghosts, textual.NullGraphics(), True, trusted_agents=True)
+            game.run()
+
+            transition_queue.put((actor_id, version, agent.transition_log))
+    finally:
+        transition_queue.put((actor_id, None, None))
+
+
+def train_in_parallel(agent, board, ghosts, num_training, num_actors, sync_period=10, timeout=30, seed=None,
+                      output=sys.stdout, checkpointer=None, context=None):
+    """
+    Trains a ReinforcementAgent for num_training episodes, played by
+    num_actors actor processes while this process learns.
+
+    Each actor plays with a frozen copy of the agent's parameters. This
+    process, the learner, applies the episodes the actors send in the order
+    they arrive: it calls observe_transition for every transition of an
+    episode and then stop_episode, just as the game loop does, so the agent
+    learns exactly as it would have from those episodes in a single process
+    (including any experience replay). Every sync_period episodes the
+    learner broadcasts to the actors what it has learned since the last
+    broadcast (see ReinforcementAgent.get_parameter_changes).
+
+    Unlike training in the game loop, the parameters an actor plays with do
+    not change during an episode and may be some broadcasts behind; the
+    returned TrainingStatistics say by how much. Episodes that arrive after
+    the last one needed are discarded.
+
+    A Checkpointer, if given, is told as each episode is learned.
+
+    The processes and queues come from context, a multiprocessing context,
+    or by default from the default one. Unless the context forks, the
+    agent, the board and the ghosts are pickled to start each actor.
+    """
+    if context is None:
+        context = multiprocessing
+
+    transition_queue = context.Queue(EPISODES_IN_FLIGHT * num_actors)
+    parameter_queues = [context.Queue() for _ in range(num_actors)]
+    stop = context.Event()
+    statistics = TrainingStatistics(num_actors)
+    version = 0
+
+    def broadcast():
+        parameters = agent.get_parameters() if version == 0 else agent.get_parameter_changes()
+
+        # Queues pickle what they are given in a background thread, while
+        # this process goes on learning; the parameters must be pickled as
+        # they are now, and are pickled once for all the actors.
+        message = pickle.dumps((version, agent.episodes_so_far, parameters), pickle.HIGHEST_PROTOCOL)
+
+        for parameter_queue in parameter_queues:
+            parameter_queue.put(message)
+
+    # The actors' copies of the agent must not replay experience of their
+    # own, so they are made without the learner's replay buffer.
+    replay, agent.replay = agent.replay, None
+    actors = []
+
+    try:
+        for actor_id in range(num_actors):
+            actor = context.Process(target=run_actor,
+                                    args=(actor_id, agent, board, ghosts, timeout, derive_seed(seed, actor_id),
+                                          parameter_queues[actor_id], transition_queue, stop))
+            actor.daemon = True
+            actor.start()
+            actors.append(actor)
+    finally:
+        agent.replay = replay
+
+    # The first broadcast holds all of the parameters, and every later one
+    # what was learned since the one before.
+    agent.start_tracking_changes()
+    broadcast()
+    running = num_actors
+
+    try:
+        while running:
+            actor_id, actor_version, transitions = transition_queue.get()
+
+            if transitions is None:
+                running -= 1
+                continue
+
+            if statistics.episodes >= num_training:
+                statistics.discarded_episodes += 1
+                continue
+
+            agent.start_episode()
+
+            for state, action, next_state, reward in transitions:
+                agent.observe_transition(state, action, next_state, reward)
+
+            agent.stop_episode()
+            statistics.record(len(transitions), version - actor_version)
+
+            if checkpointer is not None:
+                checkpointer.after_episode()
+
+            if statistics.episodes % REPORT_PERIOD == 0:
+                output.write('Learned %d of %d episodes: %s\n' % (statistics.episodes, num_training, statistics))
+                output.flush()
+
+            if statistics.episodes >= num_training:
+                stop.set()
+            elif statistics.episodes % sync_period == 0:
+                version += 1
+                statistics.broadcasts += 1
+                broadcast()
+    finally:
+        stop.set()
+
+        # Broadcasts the actors stopped before reading must not keep this
+        # process waiting to flush them when it exits.
+        for parameter_queue in parameter_queues:
+            parameter_queue.cancel_join_thread()
+
+        for actor in actors:
+            actor.join(5)
+            if actor.is_alive():
+                actor.terminate()
+
+    return statistics
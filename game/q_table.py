@@ -0,0 +1,243 @@
+from array import array
+
+# Rows and columns a table starts with before it first has to grow.
+INITIAL_STATES = 1024
+INITIAL_ACTIONS = 8
+
+
+class QTable:
+    """
+    A table of Q-values for tabular learning agents.
+
+    States and actions are interned: each is given a dense integer id the
+    first time a value is stored for it, so a lookup hashes the state once
+    and then indexes a flat array of doubles holding one row per state and
+    one column per action. The array is allocated ahead of use and doubles
+    in size when it runs out of rows or columns, so the cost of growing is
+    spread across the stores that fill it.
+
+    A pair that has never been stored has the value 0.0. Reading does not
+    intern anything, so states that are only looked up take no space.
+    """
+    def __init__(self, initial_states=INITIAL_STATES, initial_actions=INITIAL_ACTIONS):
+        self.state_ids = {}
+        self.action_ids = {}
+        self.states = []
+        self.actions = []
+        self.state_capacity = initial_states
+        self.action_capacity = initial_actions
+        self.values = array('d', [0.0]) * (initial_states * initial_actions)
+        self.changed = None
+
+    def _grow(self, state_capacity, action_capacity):
+        values = array('d', [0.0]) * (state_capacity * action_capacity)
+        width = self.action_capacity
+
+        if action_capacity == width:
+            values[:len(self.values)] = self.values
+        else:
+            for row in range(len(self.states)):
+                values[row * action_capacity:row * action_capacity + width] = \
+                    self.values[row * width:(row + 1) * width]
+
+        self.values = values
+        self.state_capacity = state_capacity
+        self.action_capacity = action_capacity
+
+    def state_id(self, state):
+        """
+        Returns the id of a state, interning it if it has none yet.
+        """
+        state_id = self.state_ids.get(state)
+
+        if state_id is None:
+            state_id = self.state_ids[state] = len(self.states)
+            self.states.append(state)
+
+            if state_id >= self.state_capacity:
+                self._grow(self.state_capacity * 2, self.action_capacity)
+
+        return state_id
+
+    def action_id(self, action):
+        """
+        Returns the id of an action, interning it if it has none yet.
+        """
+        action_id = self.action_ids.get(action)
+
+        if action_id is None:
+            action_id = self.action_ids[action] = len(self.actions)
+            self.actions.append(action)
+
+            if action_id >= self.action_capacity:
+                self._grow(self.state_capacity, self.action_capacity * 2)
+
+        return action_id
+
+    def get(self, state, action):
+        state_id = self.state_ids.get(state)
+        action_id = self.action_ids.get(action)
+
+        if state_id is None or action_id is None:
+            return 0.0
+
+        return self.values[state_id * self.action_capacity + action_id]
+
+    def set(self, state, action, value):
+        state_id = self.state_id(state)
+        action_id = self.action_id(action)
+        self.values[state_id * self.action_capacity + action_id] = value
+
+        if self.changed is not None:
+            self.changed.add((state_id, action_id))
+
+    def update(self, state, action, target, alpha):
+        """
+        Moves the value of a pair a fraction alpha of the way towards the
+        target, and returns the new value.
+        """
+        state_id = self.state_id(state)
+        action_id = self.action_id(action)
+        index = state_id * self.action_capacity + action_id
+        value = self.values[index] = (1 - alpha) * self.values[index] + alpha * target
+
+        if self.changed is not None:
+            self.changed.add((state_id, action_id))
+
+        return value
+
+    def track_changes(self):
+        """
+        Starts (or restarts) recording which pairs are stored to, for
+        take_changes.
+        """
+        self.changed = set()
+
+    def take_changes(self):
+        """
+        Returns (state, action, value) for every pair stored to since
+        changes were last taken or tracking started, and starts again.
+        """
+        width = self.action_capacity
+        changes = [(self.states[state_id], self.actions[action_id], self.values[state_id * width + action_id])
+                   for state_id, action_id in self.changed]
+        self.changed = set()
+        return changes
+
+    def __getstate__(self):
+        # Copies sent to other processes do not record changes.
+        state = self.__dict__.copy()
+        state['changed'] = None
+        return state
+
+    def snapshot(self):
+        """
+        Returns the states, the actions and a copy of the rows of values in
+        use, for a checkpoint. Interned states and actions are never changed,
+        so the lists of them are copied but not the objects in them.
+        """
+        return {'q_states': self.states[:], 'q_actions': self.actions[:], 'q_width': self.action_capacity,
+                'q_values': self.values[:len(self.states) * self.action_capacity]}
+
+    def copy(self):
+        """
+        Returns a copy of the table that learns apart from it and does not
+        record changes. Like a snapshot, it shares the interned states and
+        actions themselves.
+        """
+        table = QTable.__new__(QTable)
+        table.__dict__.update(self.__dict__)
+        table.state_ids = dict(self.state_ids)
+        table.action_ids = dict(self.action_ids)
+        table.states = self.states[:]
+        table.actions = self.actions[:]
+        table.values = self.values[:]
+        table.changed = None
+        return table
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """
+        Returns a table holding the values of a snapshot. The snapshot is
+        left as it was, so it can be restored again.
+        """
+        states, actions = list(snapshot['q_states']), list(snapshot['q_actions'])
+        table = cls()
+
+        while table.state_capacity < len(states):
+            table.state_capacity *= 2
+
+        table.action_capacity = snapshot['q_width']
+        table.states = states
+        table.actions = actions
+        table.state_ids = dict(zip(states, range(len(states))))
+        table.action_ids = dict(zip(actions, range(len(actions))))
+        table.values = array('d', snapshot['q_values'])
+        table.values.extend(array('d', [0.0]) * ((table.state_capacity - len(states)) * table.action_capacity))
+        return table
+
+    def row_values(self, state, actions):
+        """
+        Returns the values of the given actions in a state, in order.
+        """
+        state_id = self.state_ids.get(state)
+
+        if state_id is None:
+            return [0.0] * len(actions)
+
+        base = state_id * self.action_capacity
+        values = self.values
+        action_ids = self.action_ids
+        return [values[base + action_ids[action]] if action in action_ids else 0.0 for action in actions]
+
+    def max_value(self, state, actions):
+        """
+        Returns the largest value among the given actions in a state, or 0.0
+        when there are none.
+        """
+        if not actions:
+            return 0.0
+
+        return max(self.row_values(state, actions))
+
+    def best_actions(self, state, actions):
+        """
+        Returns the actions whose values in a state equal the largest value
+        among the given actions, in the order they were given.
+        """
+        values = self.row_values(state, actions)
+
+        if not values:
+            return []
+
+        best = max(values)
+        return [action for action, value in zip(actions, values) if value == best]
+
+    def argmax(self, state, actions):
+        """
+        Returns the first of the given actions with the largest value in a
+        state, or None when there are none.
+        """
+        values = self.row_values(state, actions)
+
+        if not values:
+            return None
+
+        return actions[values.index(max(values))]
+
+    def __len__(self):
+        return len(self.states)
+
+    def __contains__(self, state):
+        return state in self.state_ids
+
+    def items(self):
+        """
+        Yields ((state, action), value) for every interned pair, including
+        pairs whose value is still 0.0.
+        """
+        width = self.action_capacity
+
+        for state_id, state in enumerate(self.states):
+            for action_id, action in enumerate(self.actions):
+                yield (state, action), self.values[state_id * width + action_id]
@@ -0,0 +1,427 @@
+import mmap
+import os
+import random
+import struct
+import tempfile
+from array import array
+
+from .agent_state import AgentState
+from .configuration import intern_configuration
+from .direction import Direction
+from .game_state import GameState
+from .grid import Grid
+
+# Buffers with room for more transitions than this keep their arrays in a
+# memory-mapped temporary file rather than in memory.
+MAX_IN_MEMORY_TRANSITIONS = 1 << 20
+
+# The arrays of a buffer, their typecodes and how many items each
+# transition takes, for states kept in a StateTable and for states encoded
+# by a GameStateCodec. The 8 byte types come first so that every array in a
+# memory-mapped file is aligned.
+TABLE_FIELDS = [('state_ids', 'q', 1), ('next_state_ids', 'q', 1), ('rewards', 'd', 1), ('action_ids', 'b', 1)]
+CODEC_FIELDS = [('rewards', 'd', 1), ('states', 'B', None), ('next_states', 'B', None), ('action_ids', 'b', 1)]
+
+DIRECTIONS = [Direction.NORTH, Direction.SOUTH, Direction.EAST, Direction.WEST, Direction.STOP]
+DIRECTION_IDS = dict((direction, i) for i, direction in enumerate(DIRECTIONS))
+
+
+class StateTable:
+    """
+    Interns states into integer ids for a replay buffer. A state is kept
+    only while some transition in the buffer refers to it; ids of states
+    that are dropped are handed out again.
+    """
+    def __init__(self):
+        self.ids = {}
+        self.states = []
+        self.references = []
+        self.free_ids = []
+
+    def acquire(self, state):
+        state_id = self.ids.get(state)
+
+        if state_id is None:
+            if self.free_ids:
+                state_id = self.free_ids.pop()
+                self.states[state_id] = state
+                self.references[state_id] = 0
+            else:
+                state_id = len(self.states)
+                self.states.append(state)
+                self.references.append(0)
+
+            self.ids[state] = state_id
+
+        self.references[state_id] += 1
+        return state_id
+
+    def release(self, state_id):
+        self.references[state_id] -= 1
+
+        if self.references[state_id] == 0:
+            del self.ids[self.states[state_id]]
+            self.states[state_id] = None
+            self.free_ids.append(state_id)
+
+    def __getitem__(self, state_id):
+        return self.states[state_id]
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class GameStateCodec:
+    """
+    Encodes the GameStates of one layout as records of a fixed number of
+    bytes, much as VectorPacmanEnv keeps its games: the score, whether the
+    game is won or lost, each agent's position (in half cells, as ghosts
+    can stop between cells), direction and scared timer, and bitmasks of
+    the capsules and food left.
+
+    A state is rebuilt from its record only when it is asked for. It equals
+    and hashes as the state that was encoded, and shares the layout of the
+    first state the codec was given.
+    """
+    def __init__(self, state):
+        data = state.data
+        self.layout = data.layout
+        self.walls = data.layout.walls.bits
+        self.agents = [(agent_state.start, agent_state.is_pacman) for agent_state in data.agent_states]
+        self.capsules = list(data.layout.capsules)
+        self.capsule_ids = dict((capsule, i) for i, capsule in enumerate(self.capsules))
+        self.capsule_bytes = (len(self.capsules) + 7) // 8
+        self.food_bytes = (data.layout.width * data.layout.height + 7) // 8
+        self.record = struct.Struct('<dB' + 'iiBi' * len(self.agents) +
+                                    '%ds%ds' % (self.capsule_bytes, self.food_bytes))
+        self.size = self.record.size
+
+    def encode(self, state):
+        """
+        Returns the record of a state.
+        """
+        data = state.data
+
+        if data.layout.walls.bits != self.walls or len(data.agent_states) != len(self.agents):
+            raise ValueError("A replay buffer holds the states of one layout")
+
+        values = [data.score, int(data._win) | int(data._lose) << 1]
+
+        for agent_state in data.agent_states:
+            x, y = agent_state.configuration.get_position()
+
+            if 2 * x != int(2 * x) or 2 * y != int(2 * y):
+                raise ValueError("A replay buffer holds agents that stand on whole or half cells")
+
+            values.extend([int(2 * x), int(2 * y), DIRECTION_IDS[agent_state.configuration.get_direction()],
+                           agent_state.scared_timer])
+
+        capsules = 0
+
+        for capsule in data.capsules:
+            capsules |= 1 << self.capsule_ids[capsule]
+
+        values.append(capsules.to_bytes(self.capsule_bytes, 'little'))
+        values.append(data.food.bits.to_bytes(self.food_bytes, 'little'))
+        return self.record.pack(*values)
+
+    def decode(self, buffer, offset):
+        """
+        Rebuilds the state whose record is at an offset in a buffer.
+        """
+        values = self.record.unpack_from(buffer, offset)
+        state = GameState()
+        data = state.data
+
+        score = values[0]
+        data.score = int(score) if score.is_integer() else score
+        data._win = bool(values[1] & 1)
+        data._lose = bool(values[1] & 2)
+
+        data.agent_states = []
+
+        for i, (start, is_pacman) in enumerate(self.agents):
+            x2, y2, direction_id, scared_timer = values[2 + 4 * i:6 + 4 * i]
+            agent_state = AgentState(start, is_pacman)
+            agent_state.configuration = intern_configuration((x2 / 2.0, y2 / 2.0), DIRECTIONS[direction_id])
+            agent_state.scared_timer = scared_timer
+            data.agent_states.append(agent_state)
+
+        capsules = int.from_bytes(values[-2], 'little')
+        data.capsules = [capsule for i, capsule in enumerate(self.capsules) if capsules >> i & 1]
+
+        data.food = Grid(self.layout.width, self.layout.height)
+        data.food.bits = int.from_bytes(values[-1], 'little')
+        data.layout = self.layout
+        data._eaten = [False] * len(self.agents)
+        return state
+
+
+class SumTree:
+    """
+    A binary tree over a fixed number of non-negative priorities in which
+    every node holds the sum of its children, so that an index can be drawn
+    with probability proportional to its priority in O(log n).
+    """
+    def __init__(self, capacity):
+        self.size = 1
+
+        while self.size < capacity:
+            self.size *= 2
+
+        self.tree = array('d', [0.0]) * (2 * self.size)
+
+    def __getitem__(self, index):
+        return self.tree[self.size + index]
+
+    def __setitem__(self, index, priority):
+        node = self.size + index
+        change = priority - self.tree[node]
+
+        while node:
+            self.tree[node] += change
+            node //= 2
+
+    def total(self):
+        return self.tree[1]
+
+    def find(self, mass):
+        """
+        Returns the index at which the running sum of the priorities first
+        exceeds mass.
+        """
+        tree = self.tree
+        node = 1
+
+        while node < self.size:
+            left = 2 * node
+
+            if mass < tree[left] or tree[left + 1] <= 0:
+                node = left
+            else:
+                mass -= tree[left]
+                node = left + 1
+
+        return node - self.size
+
+
+class ReplayBuffer:
+    """
+    A fixed-capacity store of transitions (state, action, reward, next
+    state) for experience replay, with the oldest transition overwritten
+    once the buffer is full.
+
+    Each field is a preallocated array used as a ring buffer, allocated
+    when the first transition is added, and actions are kept as ids of one
+    byte. GameStates are kept as fixed-size records (see GameStateCodec),
+    in the arrays with the rest of each transition, and are rebuilt only
+    when a transition is asked for. Other states are kept as ids into a
+    StateTable, which holds them in memory, once each however many
+    transitions share them. Buffers with room for more than
+    MAX_IN_MEMORY_TRANSITIONS transitions, or given a directory, keep the
+    arrays in a memory-mapped file there instead, which the operating
+    system pages out as needed.
+
+    Sampling is uniform by default. A prioritized buffer draws transitions
+    with probability proportional to priority ** alpha, new transitions
+    getting the largest priority so far, and weights each one sampled by
+    (size * probability) ** -beta, scaled so that the largest weight in
+    the batch is 1, to correct for the bias of the prioritized draws.
+
+    A memory-mapped buffer's file is removed as soon as it is mapped, and
+    the space is given back when the buffer is closed, which a with block
+    does on leaving it.
+    """
+    def __init__(self, capacity, prioritized=False, alpha=0.6, beta=0.4, epsilon=1e-3, directory=None, seed=None):
+        if capacity < 1:
+            raise ValueError("A replay buffer needs room for at least one transition")
+
+        self.capacity = capacity
+        self.prioritized = prioritized
+        self.alpha = alpha
+        self.beta = beta
+        self.epsilon = epsilon
+        self.random = random.Random(seed)
+
+        self.directory = directory
+        self.fields = None
+        self.state_table = None
+        self.codec = None
+        self.action_table = {}
+        self.actions = []
+
+        self.size = 0
+        self.next_index = 0
+        self.max_priority = 1.0
+        self.priorities = SumTree(capacity) if prioritized else None
+
+        self.path = None
+        self.file = None
+        self.mapping = None
+
+    def _allocate(self, state):
+        """
+        Allocates the arrays for the kind of state the buffer is first
+        given.
+        """
+        if isinstance(state, GameState):
+            self.codec = GameStateCodec(state)
+            self.fields = [(name, typecode, width or self.codec.size) for name, typecode, width in CODEC_FIELDS]
+        else:
+            self.state_table = StateTable()
+            self.fields = TABLE_FIELDS
+
+        if self.directory is not None or self.capacity > MAX_IN_MEMORY_TRANSITIONS:
+            self._map_arrays(self.directory)
+        else:
+            for name, typecode, width in self.fields:
+                setattr(self, name, array(typecode, [0]) * (self.capacity * width))
+
+    def _map_arrays(self, directory):
+        record_size = sum(array(typecode).itemsize * width for _, typecode, width in self.fields)
+        descriptor, self.path = tempfile.mkstemp(suffix='.replay', dir=directory)
+        self.file = os.fdopen(descriptor, 'r+b')
+        self.file.truncate(self.capacity * record_size)
+        self.mapping = mmap.mmap(self.file.fileno(), self.capacity * record_size)
+
+        # The mapping keeps the data, so the file can go at once and is not
+        # left behind by a buffer that is never closed. Windows does not
+        # remove open files; there it goes when the buffer is closed.
+        try:
+            os.remove(self.path)
+            self.path = None
+        except OSError:
+            pass
+
+        view = memoryview(self.mapping)
+        offset = 0
+
+        for name, typecode, width in self.fields:
+            length = self.capacity * width * array(typecode).itemsize
+            setattr(self, name, view[offset:offset + length].cast(typecode))
+            offset += length
+
+    def _action_id(self, action):
+        action_id = self.action_table.get(action)
+
+        if action_id is None:
+            if len(self.actions) > 127:
+                raise ValueError("A replay buffer holds at most 128 distinct actions")
+
+            action_id = self.action_table[action] = len(self.actions)
+            self.actions.append(action)
+
+        return action_id
+
+    def add(self, state, action, reward, next_state):
+        if self.fields is None:
+            self._allocate(state)
+
+        index = self.next_index
+        action_id = self._action_id(action)
+
+        if self.codec is not None:
+            # Both records are encoded before either is written, so a state
+            # that cannot be encoded leaves the buffer as it was.
+            records = self.codec.encode(state), self.codec.encode(next_state)
+            start, end = index * self.codec.size, (index + 1) * self.codec.size
+            memoryview(self.states)[start:end] = records[0]
+            memoryview(self.next_states)[start:end] = records[1]
+        else:
+            if self.size == self.capacity:
+                self.state_table.release(self.state_ids[index])
+                self.state_table.release(self.next_state_ids[index])
+
+            self.state_ids[index] = self.state_table.acquire(state)
+            self.next_state_ids[index] = self.state_table.acquire(next_state)
+
+        if self.size < self.capacity:
+            self.size += 1
+
+        self.action_ids[index] = action_id
+        self.rewards[index] = reward
+
+        if self.priorities is not None:
+            self.priorities[index] = self.max_priority ** self.alpha
+
+        self.next_index = (index + 1) % self.capacity
+
+    def transition(self, index):
+        """
+        Returns the (state, action, reward, next_state) stored at an index.
+        """
+        if self.codec is not None:
+            offset = index * self.codec.size
+            return (self.codec.decode(self.states, offset), self.actions[self.action_ids[index]],
+                    self.rewards[index], self.codec.decode(self.next_states, offset))
+
+        return (self.state_table[self.state_ids[index]], self.actions[self.action_ids[index]],
+                self.rewards[index], self.state_table[self.next_state_ids[index]])
+
+    def sample(self, batch_size):
+        """
+        Returns a minibatch of batch_size (index, weight) pairs, drawn with
+        replacement. The weights are all 1 for uniform sampling.
+        """
+        if not self.size:
+            return []
+
+        if self.priorities is None:
+            return [(self.random.randrange(self.size), 1.0) for _ in range(batch_size)]
+
+        total = self.priorities.total()
+        segment = total / batch_size
+        indices = []
+
+        # Draw one index from each of batch_size equal slices of the total
+        # priority, which spreads a batch across the priorities.
+        for i in range(batch_size):
+            index = self.priorities.find(min((i + self.random.random()) * segment, total * (1 - 1e-12)))
+            indices.append(min(index, self.size - 1))
+
+        # The weights are scaled by the largest in the batch, which comes
+        # from the smallest probability among the transitions drawn.
+        weights = [(self.size * self.priorities[index] / total) ** -self.beta for index in indices]
+        largest = max(weights)
+        return [(index, weight / largest) for index, weight in zip(indices, weights)]
+
+    def update_priorities(self, indices, errors):
+        """
+        Sets the priorities of sampled transitions from the size of the
+        errors they were last learned with.
+        """
+        if self.priorities is None:
+            return
+
+        for index, error in zip(indices, errors):
+            priority = abs(error) + self.epsilon
+            self.max_priority = max(self.max_priority, priority)
+            self.priorities[index] = priority ** self.alpha
+
+    def __len__(self):
+        return self.size
+
+    def close(self):
+        """
+        Releases a memory-mapped buffer's file. A buffer held in memory
+        needs no closing.
+        """
+        if self.mapping is None:
+            return
+
+        for name, _, _ in self.fields:
+            getattr(self, name).release()
+
+        self.mapping.close()
+        self.file.close()
+
+        if self.path is not None:
+            os.remove(self.path)
+
+        self.mapping = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,295 @@
+import random
+from array import array
+
+from .actions import Actions
+from .direction import Direction
+from .grid import popcount
+
+# Action ids, in the order used by Actions.
+ACTIONS = [Direction.NORTH, Direction.SOUTH, Direction.EAST, Direction.WEST, Direction.STOP]
+ACTION_IDS = dict((action, i) for i, action in enumerate(ACTIONS))
+STOP = ACTION_IDS[Direction.STOP]
+REVERSE = [ACTION_IDS[Direction.REVERSE[action]] for action in ACTIONS]
+VECTORS = [Actions.directions[action] for action in ACTIONS]
+
+RANDOM_GHOSTS = 'random'
+DIRECTIONAL_GHOSTS = 'directional'
+
+
+class VectorPacmanEnv:
+    """
+    Many Pac-Man games on one layout, stepped together.
+
+    The state of all games is kept in flat arrays with one slot per game
+    (or per game and ghost): Pac-Man's cell, ghost positions, directions and
+    scared timers, scores, and an integer bitmask of the remaining food and
+    capsules of each game. One call to step() moves Pac-Man in every game
+    and then every ghost, following the same movement, eating, capsule and
+    collision rules as PacmanRules and GhostRules.
+
+    Open cells are numbered and the legal moves from each cell are looked up
+    in tables built once from the layout's adjacency table. Pac-Man always
+    stands on a cell; ghosts can stop half way between cells while scared,
+    so ghost positions are kept in half-cell units.
+
+    Ghosts follow either RandomGhost or DirectionalGhost behavior. A game
+    that ends is recorded in finished_games and restarted from the layout.
+    """
+    SCARED_TIME = 40
+    FOOD_SCORE = 10
+    WIN_SCORE = 500
+    LOSE_SCORE = 500
+    EAT_GHOST_SCORE = 200
+    TIME_PENALTY = 1
+
+    def __init__(self, layout, num_envs, num_ghosts=None, ghost_policy=RANDOM_GHOSTS,
+                 prob_attack=0.8, prob_scared_flee=0.8, seed=None):
+        self.layout = layout
+        self.num_envs = num_envs
+        self.ghost_policy = ghost_policy
+        self.prob_attack = prob_attack
+        self.prob_scared_flee = prob_scared_flee
+        self.random = random.Random(seed)
+
+        self._build_tables(layout)
+
+        ghost_starts = [pos for is_pacman, pos in layout.agent_positions if not is_pacman]
+        pacman_start = [pos for is_pacman, pos in layout.agent_positions if is_pacman][0]
+
+        if num_ghosts is not None:
+            ghost_starts = ghost_starts[:num_ghosts]
+
+        self.num_ghosts = len(ghost_starts)
+        self.pacman_start = self.cell_ids[pacman_start]
+        self.ghost_starts = [(2 * x, 2 * y) for x, y in ghost_starts]
+        self.start_food = self._mask(layout.food.as_list())
+        self.start_capsules = self._mask(layout.capsules)
+
+        n, g = num_envs, self.num_ghosts
+        self.pacman_cells = array('i', [self.pacman_start]) * n
+        self.pacman_directions = array('b', [STOP]) * n
+        self.ghost_x2 = array('i', [0]) * (n * g)
+        self.ghost_y2 = array('i', [0]) * (n * g)
+        self.ghost_directions = array('b', [STOP]) * (n * g)
+        self.ghost_actions = array('b', [STOP]) * (n * g)
+        self.scared_timers = array('i', [0]) * (n * g)
+        self.scores = array('i', [0]) * n
+        self.food = [self.start_food] * n
+        self.capsules = [self.start_capsules] * n
+        self.finished_games = []
+
+        for env in range(n):
+            self.reset(env)
+
+    def _build_tables(self, layout):
+        adjacency = layout.adjacency
+        self.cells = sorted(adjacency.actions.keys())
+        self.cell_ids = dict((cell, i) for i, cell in enumerate(self.cells))
+
+        # moves[cell][action] is the cell reached by taking the action, or -1.
+        self.moves = []
+        for cell in self.cells:
+            moves = [-1] * len(ACTIONS)
+            for action, (dx, dy) in zip(ACTIONS, VECTORS):
+                if action in adjacency.actions[cell]:
+                    moves[ACTION_IDS[action]] = self.cell_ids[(cell[0] + dx, cell[1] + dy)]
+            self.moves.append(moves)
+
+        # ghost_actions[cell][direction] lists the actions a ghost standing
+        # on the cell and facing the direction may take (GhostRules).
+        self.ghost_legal = []
+        for moves in self.moves:
+            by_direction = []
+            for direction in range(len(ACTIONS)):
+                legal = [a for a in range(len(ACTIONS)) if a != STOP and moves[a] != -1]
+                if REVERSE[direction] in legal and len(legal) > 1:
+                    legal.remove(REVERSE[direction])
+                by_direction.append(legal)
+            self.ghost_legal.append(by_direction)
+
+    def _mask(self, positions):
+        mask = 0
+        for position in positions:
+            mask |= 1 << self.cell_ids[position]
+        return mask
+
+    def reset(self, env):
+        self.pacman_cells[env] = self.pacman_start
+        self.pacman_directions[env] = STOP
+        self.scores[env] = 0
+        self.food[env] = self.start_food
+        self.capsules[env] = self.start_capsules
+
+        for ghost, (x2, y2) in enumerate(self.ghost_starts):
+            slot = env * self.num_ghosts + ghost
+            self.ghost_x2[slot] = x2
+            self.ghost_y2[slot] = y2
+            self.ghost_directions[slot] = STOP
+            self.scared_timers[slot] = 0
+
+    def get_legal_actions(self, env):
+        """
+        Returns the ids of the actions Pac-Man may take in a game.
+        """
+        moves = self.moves[self.pacman_cells[env]]
+        return [a for a in range(len(ACTIONS)) if moves[a] != -1]
+
+    def get_pacman_position(self, env):
+        return self.cells[self.pacman_cells[env]]
+
+    def get_ghost_position(self, env, ghost):
+        slot = env * self.num_ghosts + ghost
+        return self.ghost_x2[slot] / 2.0, self.ghost_y2[slot] / 2.0
+
+    def get_num_food(self, env):
+        return popcount(self.food[env])
+
+    def step(self, actions):
+        """
+        Moves Pac-Man in every game by the given action ids (one per game),
+        then moves every ghost. Returns the reward (score change) of each
+        game and whether it ended; games that ended have been restarted.
+        """
+        rewards = array('i', [0]) * self.num_envs
+        dones = [False] * self.num_envs
+
+        for env in range(self.num_envs):
+            before = self.scores[env]
+            result = self._step_env(env, actions[env])
+
+            rewards[env] = self.scores[env] - before
+
+            if result is not None:
+                dones[env] = True
+                self.finished_games.append((self.scores[env], result))
+                self.reset(env)
+
+        return rewards, dones
+
+    def _step_env(self, env, action):
+        # Pac-Man moves and eats (PacmanRules.apply_action and consume).
+        cell = self.moves[self.pacman_cells[env]][action]
+        if cell == -1:
+            raise Exception("Illegal action " + str(ACTIONS[action]))
+
+        self.pacman_cells[env] = cell
+        if action != STOP:
+            self.pacman_directions[env] = action
+
+        score_change = -self.TIME_PENALTY
+        win = lose = False
+        bit = 1 << cell
+
+        if self.food[env] & bit:
+            self.food[env] ^= bit
+            score_change += self.FOOD_SCORE
+            if not self.food[env]:
+                score_change += self.WIN_SCORE
+                win = True
+
+        first_slot = env * self.num_ghosts
+
+        if self.capsules[env] & bit:
+            self.capsules[env] ^= bit
+            for slot in range(first_slot, first_slot + self.num_ghosts):
+                self.scared_timers[slot] = self.SCARED_TIME
+
+        # Any ghost can collide with Pac-Man after he moves.
+        px2, py2 = 2 * self.cells[cell][0], 2 * self.cells[cell][1]
+        for ghost in range(self.num_ghosts):
+            change, died = self._check_collision(first_slot + ghost, px2, py2, win)
+            score_change += change
+            lose = lose or died
+
+        self.scores[env] += score_change
+
+        if win or lose:
+            return 'win' if win else 'lose'
+
+        # Each ghost moves in turn (GhostRules), colliding as it goes.
+        for ghost in range(self.num_ghosts):
+            slot = first_slot + ghost
+            self._move_ghost(slot, px2, py2)
+
+            change, died = self._check_collision(slot, px2, py2, False)
+            self.scores[env] += change
+
+            if died:
+                return 'lose'
+
+        return None
+
+    def _check_collision(self, slot, px2, py2, win):
+        # A distance of 0.7 or less is a collision; in half-cell units that
+        # means the same point or half a cell apart.
+        if abs(self.ghost_x2[slot] - px2) + abs(self.ghost_y2[slot] - py2) > 1:
+            return 0, False
+
+        if self.scared_timers[slot] > 0:
+            x2, y2 = self.ghost_starts[slot % self.num_ghosts]
+            self.ghost_x2[slot] = x2
+            self.ghost_y2[slot] = y2
+            self.ghost_directions[slot] = STOP
+            self.scared_timers[slot] = 0
+            return self.EAT_GHOST_SCORE, False
+
+        if win:
+            return 0, False
+
+        return -self.LOSE_SCORE, True
+
+    def _move_ghost(self, slot, px2, py2):
+        x2, y2 = self.ghost_x2[slot], self.ghost_y2[slot]
+        direction = self.ghost_directions[slot]
+
+        if x2 % 2 == 0 and y2 % 2 == 0:
+            legal = self.ghost_legal[self.cell_ids[(x2 // 2, y2 // 2)]][direction]
+        else:
+            # Between cells a ghost can only carry on.
+            legal = [direction]
+
+        scared = self.scared_timers[slot] > 0
+        step = 1 if scared else 2
+
+        if self.ghost_policy == DIRECTIONAL_GHOSTS:
+            action = self._directional_action(legal, x2, y2, step, px2, py2, scared)
+        else:
+            action = legal[int(self.random.random() * len(legal))]
+
+        dx, dy = VECTORS[action]
+        x2 += dx * step
+        y2 += dy * step
+
+        if action != STOP:
+            self.ghost_directions[slot] = action
+        self.ghost_actions[slot] = action
+
+        timer = self.scared_timers[slot]
+        if timer == 1:
+            # Snap back onto a cell once the ghost is no longer scared.
+            x2 += x2 % 2
+            y2 += y2 % 2
+        self.scared_timers[slot] = max(0, timer - 1)
+
+        self.ghost_x2[slot] = x2
+        self.ghost_y2[slot] = y2
+
+    def _directional_action(self, legal, x2, y2, step, px2, py2, scared):
+        distances = [abs(x2 + VECTORS[a][0] * step - px2) + abs(y2 + VECTORS[a][1] * step - py2) for a in legal]
+
+        if scared:
+            best_distance, best_prob = max(distances), self.prob_scared_flee
+        else:
+            best_distance, best_prob = min(distances), self.prob_attack
+
+        best = [a for a, distance in zip(legal, distances) if distance == best_distance]
+        probabilities = [(1 - best_prob) / len(legal) + (best_prob / len(best) if a in best else 0.0)
+                         for a in legal]
+
+        choice = self.random.random() * sum(probabilities)
+        for a, probability in zip(legal, probabilities):
+            choice -= probability
+            if choice < 0:
+                return a
+
+        return legal[-1]
@@ -0,0 +1,93 @@
+import random
+
+from .direction import Direction
+
+# Seed for the key tables. Keys only depend on this seed and on the board
+# size, so every process derives the same hash for the same state.
+ZOBRIST_SEED = 'pacumen'
+
+# Scared timers up to this value get a key from the precomputed table.
+MAX_TABLED_TIMER = 64
+
+ZOBRIST_KEYS_CACHE = {}
+
+_DIRECTIONS = [Direction.NORTH, Direction.SOUTH, Direction.EAST, Direction.WEST, Direction.STOP]
+
+
+class ZobristKeys:
+    """
+    Random 64-bit keys for the parts of a game state on a board of a given
+    size. The hash of a state is the XOR of the keys of its parts: one key
+    per agent for its position, direction and scared timer, one per food
+    dot and one per capsule. Changing one part of a state then only needs
+    the old key and the new key of that part to be XORed into the hash.
+    """
+    def __init__(self, width, height, seed=ZOBRIST_SEED):
+        self.width = width
+        self.height = height
+        self.seed = seed
+
+        rng = random.Random('%s:%d:%d' % (seed, width, height))
+        self.food_keys = [rng.getrandbits(64) for _ in range(width * height)]
+        self.capsule_keys = [rng.getrandbits(64) for _ in range(width * height)]
+        self.agent_tables = []
+
+    def _agent_table(self, agent_index):
+        while len(self.agent_tables) <= agent_index:
+            index = len(self.agent_tables)
+            rng = random.Random('%s:%d:%d:%d' % (self.seed, self.width, self.height, index))
+
+            # Agents can stop half way between cells, so positions are keyed
+            # on a grid twice as fine as the board.
+            positions = [rng.getrandbits(64) for _ in range(4 * self.width * self.height)]
+            directions = dict((direction, rng.getrandbits(64)) for direction in _DIRECTIONS)
+            timers = [rng.getrandbits(64) for _ in range(MAX_TABLED_TIMER + 1)]
+            self.agent_tables.append((positions, directions, timers))
+
+        return self.agent_tables[agent_index]
+
+    def _extra_key(self, *parts):
+        return random.Random(':'.join([str(self.seed)] + [str(part) for part in parts])).getrandbits(64)
+
+    def agent_key(self, agent_index, agent_state):
+        configuration = agent_state.configuration
+        if configuration is None:
+            return 0
+
+        positions, directions, timers = self._agent_table(agent_index)
+        x, y = configuration.pos
+        x2, y2 = x * 2, y * 2
+
+        if x2 == int(x2) and y2 == int(y2) and 0 <= x2 < 2 * self.width and 0 <= y2 < 2 * self.height:
+            key = positions[int(x2) * 2 * self.height + int(y2)]
+        else:
+            key = self._extra_key(agent_index, 'position', x, y)
+
+        direction = configuration.direction
+        key ^= directions[direction] if direction in directions else self._extra_key(agent_index, direction)
+
+        timer = agent_state.scared_timer
+        key ^= timers[timer] if 0 <= timer <= MAX_TABLED_TIMER else self._extra_key(agent_index, 'timer', timer)
+
+        return key
+
+    def food_key(self, position):
+        x, y = position
+        return self.food_keys[x * self.height + y]
+
+    def capsule_key(self, position):
+        x, y = position
+        return self.capsule_keys[x * self.height + y]
+
+
+def get_zobrist_keys(width, height):
+    """
+    Returns the key tables for a board size. Every layout of the same size
+    uses the same keys, so copies of a layout hash states identically.
+    """
+    key = (width, height)
+
+    if key not in ZOBRIST_KEYS_CACHE:
+        ZOBRIST_KEYS_CACHE[key] = ZobristKeys(width, height)
+
+    return ZOBRIST_KEYS_CACHE[key]
@@ -98,6 +98,19 @@ def process_commands(argv):
     parser.add_argument("-x", "--numTraining", dest="numTraining", type=int, default=0,
                         help="number of training episodes (suppresses output); (default %(default)s)")
 
+    parser.add_argument("--actors", dest="actors", type=int, default=0,
+                        help="play the training episodes in this many actor processes while this process "
+                             "learns from them (default %(default)s)")
+
+    parser.add_argument("--syncPeriod", dest="syncPeriod", type=int, default=10,
+                        help="episodes learned between sending parameters to the actors (default %(default)s)")
+
+    parser.add_argument("--checkpoint", dest="checkpoint", default=None, metavar="FILE",
+                        help="save the learning agent to FILE while it trains, resuming from FILE if it exists")
+
+    parser.add_argument("--checkpointPeriod", dest="checkpointPeriod", type=int, default=100,
+                        help="training episodes between checkpoints (default %(default)s)")
+
     parser.add_argument("--timeout", dest="timeout", type=int, default=30,
                         help="maximum time agents can spend computing in a single game (default %(default)s)")
 
@@ -115,10 +128,20 @@ def process_commands(argv):
     parser.add_argument("--replay", dest="gameToReplay", default=None,
                         help="a recorded game file (pickle) to replay")
 
+    parser.add_argument("--distanceCache", dest="distanceCache", default=None,
+                        metavar="DIRECTORY",
+                        help="save and reuse layout maze distance tables in DIRECTORY, or keep them only in "
+                             "memory if it is empty (default: a directory for each user in the temporary directory)")
+
     parser.add_argument("-c", "--catchExceptions", dest='catchExceptions', default=False,
                         action='store_true',
                         help="turns on exception handling and timeouts during games (default %(default)s)")
 
+    parser.add_argument("--trustAgents", dest='trustAgents', default=False,
+                        action='store_true',
+                        help="hand agents shared states instead of copies; agents must not modify them "
+                             "(default %(default)s)")
+
     options = parser.parse_args(argv)
 
     logging.basicConfig(level=logging.getLevelName(options.log_level), format="%(message)s")
@@ -128,6 +151,10 @@ def process_commands(argv):
     if options.fixRandomSeed:
         random.seed('cs188')
 
+    if options.distanceCache is not None:
+        from game import maze_distances
+        maze_distances.DISTANCE_CACHE_DIRECTORY = options.distanceCache or None
+
     args['layout'] = layout.get_layout(options.layout)
 
     if args['layout'] is None:
@@ -171,6 +198,11 @@ def process_commands(argv):
     args['record'] = options.record
     args['catchExceptions'] = options.catchExceptions
     args['timeout'] = options.timeout
+    args['trustAgents'] = options.trustAgents
+    args['actors'] = options.actors
+    args['syncPeriod'] = options.syncPeriod
+    args['checkpoint'] = options.checkpoint
+    args['checkpointPeriod'] = options.checkpointPeriod
 
     # Special case: recorded games don't use the run_game method or args structure.
     if options.gameToReplay is not None:
@@ -244,12 +276,37 @@ def replay_game(layout, actions, display):
     display.finish()
 
 
-def run_game(layout, pacman, ghosts, display, numGames, record, numTraining=0, catchExceptions=False, timeout=30):
+def run_game(layout, pacman, ghosts, display, numGames, record, numTraining=0, catchExceptions=False, timeout=30,
+             trustAgents=False, actors=0, syncPeriod=10, checkpoint=None, checkpointPeriod=100):
     import __main__
     __main__.__dict__['_display'] = display
 
     rules = GameRules(timeout)
     games = []
+    checkpointer = None
+
+    if checkpoint is not None:
+        from game.checkpoint import Checkpointer
+        checkpointer = Checkpointer(pacman, checkpoint, checkpointPeriod)
+
+        # Training episodes the checkpoint was saved after are not played
+        # again.
+        if os.path.exists(checkpoint):
+            checkpointer.restore()
+            resumed = min(pacman.episodes_so_far, numTraining)
+            print('Resuming from %s after %d episodes' % (checkpoint, pacman.episodes_so_far))
+            numGames -= min(resumed, numGames)
+            numTraining -= resumed
+
+    # Training games played by actor processes are not played here.
+    if actors > 0 and numTraining > 0:
+        from game.parallel_training import train_in_parallel
+        print('Beginning %d episodes of training with %d actors' % (numTraining, actors))
+        statistics = train_in_parallel(pacman, layout, ghosts, numTraining, actors, syncPeriod, timeout,
+                                       random.random(), checkpointer=checkpointer)
+        print('Training done: %s' % statistics)
+        numGames -= min(numTraining, numGames)
+        numTraining = 0
 
     for i in range(numGames):
         be_quiet = i < numTraining
@@ -262,11 +319,14 @@ def run_game(layout, pacman, ghosts, display, numGames, record, numTraining=0, c
             game_display = display
             rules.quiet = False
 
-        game = rules.new_game(layout, pacman, ghosts, game_display, be_quiet, catchExceptions)
+        game = rules.new_game(layout, pacman, ghosts, game_display, be_quiet, catchExceptions,
+                              trusted_agents=trustAgents)
         game.run()
 
         if not be_quiet:
             games.append(game)
+        elif checkpointer is not None:
+            checkpointer.after_episode()
 
         if record:
             import time
@@ -284,14 +344,19 @@ def run_game(layout, pacman, ghosts, display, numGames, record, numTraining=0, c
     if (numGames - numTraining) > 0:
         scores = [game.state.get_score() for game in games]
         wins = [game.state.is_win() for game in games]
-        win_rate = wins.count(True) / float(len(wins))
-        print('Average Score:', sum(scores) / float(len(scores)))
-        print('Scores:       ', ', '.join([str(score) for score in scores]))
-        print('Win Rate:      %d/%d (%.2f)' % (wins.count(True), len(wins), win_rate))
-        print('Record:       ', ', '.join([['Loss', 'Win'][int(w)] for w in wins]))
+        print_summary(scores, wins)
 
     return games
 
+
+def print_summary(scores, wins):
+    win_rate = wins.count(True) / float(len(wins))
+    print('Average Score:', sum(scores) / float(len(scores)))
+    print('Scores:       ', ', '.join([str(score) for score in scores]))
+    print('Win Rate:      %d/%d (%.2f)' % (wins.count(True), len(wins), win_rate))
+    print('Record:       ', ', '.join([['Loss', 'Win'][int(w)] for w in wins]))
+
+
 if __name__ == '__main__':
     kwargs = process_commands(sys.argv[1:])
     run_game(**kwargs)
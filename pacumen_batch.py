@@ -0,0 +1,186 @@
+from __future__ import print_function
+
+import argparse
+import multiprocessing
+import random
+import sys
+import textwrap
+import time
+
+from game import layout, maze_distances
+from rules.game_rules import GameRules
+from pacumen import load_agent, parse_agent_args, print_summary
+
+
+def derive_seed(master_seed, game_index):
+    """
+    Returns the seed for one game. It depends only on the master seed and
+    the game's index, so a batch gives the same results however its games
+    are spread over the worker processes.
+    """
+    return random.Random('%s:%d' % (master_seed, game_index)).getrandbits(32)
+
+
+def start_worker(distance_cache):
+    """
+    Sets up a worker process. Module settings are not inherited by workers
+    that are spawned rather than forked, so they are set again here.
+    """
+    maze_distances.DISTANCE_CACHE_DIRECTORY = distance_cache
+
+
+def play_game(task):
+    """
+    Plays one quiet game in a worker process and returns its result. The
+    agents are created afresh for every game.
+    """
+    from displays import textual
+
+    game_index, seed, options = task
+    random.seed(seed)
+
+    board = options['layout']
+    pacman = load_agent(options['pacman'], True)(**options['agent_opts'])
+    ghost_type = load_agent(options['ghost'], True)
+    ghosts = [ghost_type(i + 1) for i in range(options['num_ghosts'])]
+
+    rules = GameRules(options['timeout'])
+    game = rules.new_game(board, pacman, ghosts, textual.NullGraphics(), True, options['catch_exceptions'],
+                          trusted_agents=options['trust_agents'])
+
+    start_time = time.time()
+    game.run()
+
+    return {
+        'index': game_index,
+        'seed': seed,
+        'score': game.state.get_score(),
+        'win': game.state.is_win(),
+        'moves': len(game.move_history),
+        'agent_times': game.total_agent_times,
+        'time': time.time() - start_time,
+    }
+
+
+def run_batch(options, num_games, workers, master_seed, output=sys.stdout):
+    """
+    Plays num_games games over a pool of worker processes. Each result is
+    written to output as soon as its game finishes. The results are returned
+    in game order.
+    """
+    tasks = [(i, derive_seed(master_seed, i), options) for i in range(num_games)]
+    results = []
+
+    pool = multiprocessing.Pool(workers, start_worker, (options['distance_cache'],))
+
+    try:
+        for result in pool.imap_unordered(play_game, tasks):
+            results.append(result)
+            output.write('Game %4d: %-4s score %7.1f  moves %5d  agent times %s\n' %
+                         (result['index'] + 1, ['Loss', 'Win'][int(result['win'])], result['score'],
+                          result['moves'], ', '.join(['%.2fs' % t for t in result['agent_times']])))
+            output.flush()
+    finally:
+        pool.close()
+        pool.join()
+
+    results.sort(key=lambda r: r['index'])
+    return results
+
+
+def process_commands(argv):
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description="Pacumen Batch Runner",
+        epilog=textwrap.dedent(
+            """
+            Plays many quiet games over a pool of processes, without graphics.
+            Each game gets its own random seed derived from the master seed.
+
+            EXAMPLES:
+                (1) python pacumen_batch.py -p GreedyAgent -n 1000
+                (2) python pacumen_batch.py -p AlphaBetaAgent -a depth=2 -l small_classic -n 200 -w 8
+            """
+        )
+    )
+
+    parser.add_argument("-l", "--layout", dest="layout", default="medium_classic",
+                        metavar='LAYOUT FILE',
+                        help="provide a map LAYOUT FILE (default %(default)s)")
+
+    parser.add_argument("-p", "--pacman", dest="pacman", default="GreedyAgent",
+                        metavar="TYPE",
+                        help="the agent TYPE to use for Pac-Man (default %(default)s)")
+
+    parser.add_argument("-g", "--ghosts", dest="ghost", default="RandomGhost",
+                        metavar="TYPE",
+                        help="the agent TYPE to use for the ghost(s) (default %(default)s)")
+
+    parser.add_argument("-a", "--agentArgs", dest="agentArgs",
+                        help='comma separated values sent to agent; e.g. "opt1=val1,opt2,opt3=val3"')
+
+    parser.add_argument("-n", "--numGames", dest="numGames", type=int, default=100,
+                        metavar="GAMES",
+                        help="the number of GAMES to play (default %(default)s)")
+
+    parser.add_argument("-k", "--numGhosts", dest="numGhosts", type=int, default=4,
+                        help="the maximum number of ghosts to use (default %(default)s)")
+
+    parser.add_argument("-w", "--workers", dest="workers", type=int, default=multiprocessing.cpu_count(),
+                        help="the number of worker processes (default %(default)s)")
+
+    parser.add_argument("-s", "--seed", dest="seed", default="cs188",
+                        help="the master random seed (default %(default)s)")
+
+    parser.add_argument("--timeout", dest="timeout", type=int, default=30,
+                        help="maximum time agents can spend computing in a single game (default %(default)s)")
+
+    parser.add_argument("--distanceCache", dest="distanceCache", default=maze_distances.DISTANCE_CACHE_DIRECTORY,
+                        metavar="DIRECTORY",
+                        help="save and reuse layout maze distance tables in DIRECTORY, shared by the workers, or "
+                             "keep them only in memory if it is empty (default %(default)s)")
+
+    parser.add_argument("-c", "--catchExceptions", dest='catchExceptions', default=False,
+                        action='store_true',
+                        help="turns on exception handling and timeouts during games (default %(default)s)")
+
+    parser.add_argument("--trustAgents", dest='trustAgents', default=False,
+                        action='store_true',
+                        help="hand agents shared states instead of copies; agents must not modify them "
+                             "(default %(default)s)")
+
+    options = parser.parse_args(argv)
+
+    board = layout.get_layout(options.layout)
+
+    if board is None:
+        raise Exception("The layout " + options.layout + " cannot be found")
+
+    # Fail early, in this process, if an agent cannot be found.
+    load_agent(options.pacman, True)
+    load_agent(options.ghost, True)
+
+    game_options = {
+        'layout': board,
+        'pacman': options.pacman,
+        'agent_opts': parse_agent_args(options.agentArgs),
+        'ghost': options.ghost,
+        'num_ghosts': options.numGhosts,
+        'timeout': options.timeout,
+        'catch_exceptions': options.catchExceptions,
+        'trust_agents': options.trustAgents,
+        'distance_cache': options.distanceCache or None,
+    }
+
+    return game_options, options.numGames, options.workers, options.seed
+
+
+if __name__ == '__main__':
+    game_options, num_games, num_workers, seed = process_commands(sys.argv[1:])
+
+    start = time.time()
+    batch = run_batch(game_options, num_games, num_workers, seed)
+    elapsed = time.time() - start
+
+    print_summary([r['score'] for r in batch], [r['win'] for r in batch])
+    print('Games/sec:     %.2f (%d games in %.1f seconds)' % (len(batch) / elapsed, len(batch), elapsed))
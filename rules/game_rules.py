@@ -6,11 +6,15 @@ class GameRules:
     def __init__(self, timeout=30):
         self.timeout = timeout
 
-    def new_game(self, layout, pacman_agent, ghost_agents, display, quiet=False, catch_exceptions=False):
+    def new_game(self, layout, pacman_agent, ghost_agents, display, quiet=False, catch_exceptions=False,
+                 explorer=None, trusted_agents=False):
         agents = [pacman_agent] + ghost_agents[:layout.get_ghost_count()]
         init_state = GameState()
         init_state.initialize(layout, len(ghost_agents))
-        game = Game(agents, display, self, catch_exceptions=catch_exceptions)
+
+        if explorer is not None:
+            init_state.set_explorer(explorer)
+        game = Game(agents, display, self, catch_exceptions=catch_exceptions, trusted_agents=trusted_agents)
         game.state = init_state
         self.initial_state = init_state.deep_copy()
         self.quiet = quiet
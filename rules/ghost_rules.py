@@ -1,5 +1,6 @@
 from game.direction import Direction
 from game.actions import Actions
+from game.configuration import intern_configuration
 from utilities import nearest_point, manhattan_distance
 
 
@@ -15,7 +16,7 @@ class GhostRules:
         reach a dead end, but can turn 90 degrees at intersections.
         """
         conf = state.get_ghost_state(ghost_index).configuration
-        possible_actions = Actions.get_possible_actions(conf, state.data.layout.walls)
+        possible_actions = state.data.layout.adjacency.get_possible_actions(conf)
         reverse = Actions.reverse_direction(conf.direction)
 
         if Direction.STOP in possible_actions:
@@ -34,7 +35,7 @@ class GhostRules:
         if action not in legal:
             raise Exception("Illegal ghost action " + str(action))
 
-        ghost_state = state.data.agent_states[ghost_index]
+        ghost_state = state.data.writable_agent_state(ghost_index)
         speed = GhostRules.GHOST_SPEED
 
         if ghost_state.scared_timer > 0:
@@ -49,7 +50,8 @@ class GhostRules:
         timer = ghost_state.scared_timer
 
         if timer == 1:
-            ghost_state.configuration.pos = nearest_point(ghost_state.configuration.pos)
+            configuration = ghost_state.configuration
+            ghost_state.configuration = intern_configuration(nearest_point(configuration.pos), configuration.direction)
 
         ghost_state.scared_timer = max(0, timer - 1)
 
@@ -77,10 +79,12 @@ class GhostRules:
 
     def collide(state, ghost_state, agent_index):
         if ghost_state.scared_timer > 0:
+            ghost_state = state.data.writable_agent_state(agent_index)
             state.data.score_change += 200
             GhostRules.place_ghost(state, ghost_state)
             ghost_state.scared_timer = 0
             # Added for first-person.
+            state.data._eaten = state.data._eaten[:]
             state.data._eaten[agent_index] = True
         else:
             if not state.data._win:
@@ -12,7 +12,7 @@ class PacmanRules:
         """
         Returns a list of possible actions.
         """
-        return Actions.get_possible_actions(state.get_pacman_state().configuration, state.data.layout.walls)
+        return state.data.layout.adjacency.get_possible_actions(state.data.agent_states[0].configuration)
 
     get_legal_actions = staticmethod(get_legal_actions)
 
@@ -25,7 +25,7 @@ class PacmanRules:
         if action not in legal:
             raise Exception("Illegal action " + str(action))
 
-        pacman_state = state.data.agent_states[0]
+        pacman_state = state.data.writable_agent_state(0)
 
         # Update Configuration
         vector = Actions.direction_to_vector(action, PacmanRules.PACMAN_SPEED)
@@ -60,10 +60,10 @@ class PacmanRules:
 
         # Eat capsule.
         if position in state.get_capsules():
-            state.data.capsules.remove(position)
+            state.data.writable_capsules().remove(position)
             state.data._capsule_eaten = position
             # Reset all ghosts' scared timers.
             for index in range(1, len(state.data.agent_states)):
-                state.data.agent_states[index].scared_timer = PacmanRules.SCARED_TIME
+                state.data.writable_agent_state(index).scared_timer = PacmanRules.SCARED_TIME
 
     consume = staticmethod(consume)
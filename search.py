@@ -1,4 +1,4 @@
-import utilities
+from game import graph_search, grid_search
 
 
 def null_heuristic(state, problem=None):
@@ -6,19 +6,31 @@ def null_heuristic(state, problem=None):
 
 
 def depth_first_search(problem):
-    utilities.raise_not_defined()
+    return graph_search.depth_first_search(problem)
 
 
 def breadth_first_search(problem):
-    utilities.raise_not_defined()
+    return graph_search.breadth_first_search(problem)
 
 
 def uniform_cost_search(problem):
-    utilities.raise_not_defined()
+    return graph_search.uniform_cost_search(problem)
 
 
 def astar_search(problem, heuristic=null_heuristic):
-    utilities.raise_not_defined()
+    return graph_search.astar_search(problem, heuristic)
+
+
+def bidirectional_breadth_first_search(problem):
+    return grid_search.bidirectional_breadth_first_search(problem)
+
+
+def bidirectional_astar_search(problem):
+    return grid_search.bidirectional_astar_search(problem)
+
+
+def jump_point_search(problem):
+    return grid_search.jump_point_search(problem)
 
 
 # Abbreviations
@@ -26,3 +38,6 @@ bfs = breadth_first_search
 dfs = depth_first_search
 astar = astar_search
 ucs = uniform_cost_search
+bibfs = bidirectional_breadth_first_search
+biastar = bidirectional_astar_search
+jps = jump_point_search
@@ -0,0 +1,67 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from agents_ghosts import RandomGhost
+from agents_q_learning import ApproximateQAgent, PacmanQAgent
+from displays import textual
+from game import layout
+from game.checkpoint import load_checkpoint, save_checkpoint
+from rules.game_rules import GameRules
+
+
+def train(agent, board_name, num_games):
+    board = layout.get_layout(board_name)
+    ghosts = [RandomGhost(i + 1) for i in range(board.get_ghost_count())]
+    rules = GameRules()
+    rules.quiet = True
+
+    for _ in range(num_games):
+        rules.new_game(board, agent, ghosts, textual.NullGraphics(), True).run()
+
+
+class CheckpointTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'agent.ckpt')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_q_table_with_game_state_keys_round_trips(self):
+        agent = PacmanQAgent(numTraining=10)
+        train(agent, 'small_grid', 3)
+        save_checkpoint(agent, self.path)
+
+        loaded = load_checkpoint(PacmanQAgent(numTraining=10), self.path)
+
+        self.assertEqual(loaded.episodes_so_far, 3)
+        self.assertEqual(loaded.epsilon, agent.epsilon)
+        self.assertEqual(len(loaded.q_values), len(agent.q_values))
+
+        for state in agent.q_values.states:
+            for action in agent.q_values.actions:
+                self.assertEqual(loaded.get_q_value(state, action), agent.get_q_value(state, action))
+
+        # Every state had its own copy of the layout; the loaded states
+        # share one.
+        self.assertEqual(len(set(id(state.data.layout) for state in loaded.q_values.states)), 1)
+
+    def test_weights_round_trip(self):
+        agent = ApproximateQAgent(extractor='SimpleExtractor', numTraining=10)
+        train(agent, 'small_grid', 2)
+        save_checkpoint(agent, self.path)
+
+        loaded = load_checkpoint(ApproximateQAgent(extractor='SimpleExtractor', numTraining=10), self.path)
+
+        self.assertEqual(loaded.get_weights(), agent.get_weights())
+
+    def test_a_checkpoint_of_another_class_is_refused(self):
+        save_checkpoint(PacmanQAgent(), self.path)
+
+        self.assertRaises(ValueError, load_checkpoint, ApproximateQAgent(), self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
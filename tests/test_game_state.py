@@ -0,0 +1,25 @@
+import unittest
+
+from game import layout
+from game.game_state import GameState
+
+
+class GameStateViewTest(unittest.TestCase):
+    def test_a_view_keeps_what_the_last_move_did(self):
+        state = GameState()
+        state.initialize(layout.get_layout('small_classic'), 2)
+
+        # Play until Pac-Man eats something, so every field is set.
+        while state.data._food_eaten is None:
+            state = state.generate_successor(0, state.get_legal_actions(0)[0])
+
+        view, copy = state.view(), state.deep_copy()
+
+        for field in ['_agent_moved', '_food_eaten', '_food_added', '_capsule_eaten', '_win', '_lose']:
+            self.assertEqual(getattr(view.data, field), getattr(copy.data, field), field)
+
+        self.assertEqual(view, copy)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,29 @@
+import unittest
+
+from game.grid import Grid
+
+
+class GridColumnTest(unittest.TestCase):
+    def setUp(self):
+        self.grid = Grid(3, 4)
+        self.grid[1][3] = True
+
+    def test_negative_rows_count_from_the_top(self):
+        self.assertTrue(self.grid[1][-1])
+        self.assertFalse(self.grid[1][-4])
+
+    def test_reading_past_the_column_raises(self):
+        for y in (4, 5, -5):
+            self.assertRaises(IndexError, lambda: self.grid[0][y])
+
+    def test_writing_past_the_column_raises(self):
+        for x in range(3):
+            for y in (4, 7, -5):
+                self.assertRaises(IndexError, self.grid[x].__setitem__, y, True)
+
+        self.assertEqual(self.grid.count(), 1)
+        self.assertEqual(self.grid.as_list(), [(1, 3)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+
+from game.heuristic_cache import HeuristicCache, LRUCache
+from game.layout import Layout
+
+
+class LRUCacheTest(unittest.TestCase):
+    def test_a_cached_none_is_a_hit(self):
+        cache = LRUCache(2)
+        cache.put('key', None)
+
+        self.assertIsNone(cache.get('key', 'missing'))
+        self.assertEqual(cache.get('other', 'missing'), 'missing')
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+
+class HeuristicCacheTest(unittest.TestCase):
+    def setUp(self):
+        # Two corridors with no path between them.
+        board = Layout(['%%%%%%%',
+                        '%P..%.%',
+                        '%%%%%.%',
+                        '%%%%%%%'])
+        self.cache = HeuristicCache(board.walls)
+
+    def test_values_of_none_are_computed_once(self):
+        calls = []
+
+        def heuristic(state, problem):
+            calls.append(state)
+            return None
+
+        for _ in range(3):
+            self.assertIsNone(self.cache.value(heuristic, 'state', None))
+
+        self.assertEqual(calls, ['state'])
+
+    def test_unreachable_cells_have_no_distance(self):
+        self.assertIsNone(self.cache.distance((1, 2), (5, 1)))
+        self.assertEqual(self.cache.distance((1, 2), (3, 2)), 2)
+
+    def test_spanning_tree_of_separate_regions_is_a_forest(self):
+        self.assertEqual(self.cache.spanning_tree([(1, 2), (3, 2), (5, 2), (5, 1)]), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
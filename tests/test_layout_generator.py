@@ -0,0 +1,44 @@
+import unittest
+
+from game.layout_generator import generate_layout_text
+
+
+def reachable_cells(text, start):
+    seen = set([start])
+    frontier = [start]
+
+    while frontier:
+        x, y = frontier.pop()
+
+        for nx, ny in [(x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)]:
+            if text[ny][nx] != '%' and (nx, ny) not in seen:
+                seen.add((nx, ny))
+                frontier.append((nx, ny))
+
+    return seen
+
+
+class GenerateLayoutTextTest(unittest.TestCase):
+    def test_every_open_cell_is_reachable(self):
+        for width, height in [(5, 5), (6, 6), (9, 12), (10, 10), (15, 15), (20, 20), (31, 18)]:
+            for wall_density in (0.0, 0.1, 0.3):
+                for seed in range(40):
+                    text = generate_layout_text(width, height, wall_density=wall_density, num_capsules=1,
+                                                num_ghosts=1, seed=seed)
+                    open_cells = set((x, y) for y, row in enumerate(text) for x, c in enumerate(row) if c != '%')
+                    start = next((x, y) for y, row in enumerate(text) for x, c in enumerate(row) if c == 'P')
+
+                    self.assertEqual(reachable_cells(text, start), open_cells,
+                                     "%dx%d board with seed %d and wall density %s" %
+                                     (width, height, seed, wall_density))
+
+    def test_the_border_is_wall(self):
+        text = generate_layout_text(12, 9, wall_density=0.0, seed=0)
+
+        self.assertEqual(text[0], '%' * 12)
+        self.assertEqual(text[-1], '%' * 12)
+        self.assertTrue(all(row[0] == '%' and row[-1] == '%' for row in text))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import multiprocessing
+import os
+import unittest
+
+from agents_ghosts import RandomGhost
+from agents_q_learning import ApproximateQAgent, PacmanQAgent
+from game import layout
+from game.parallel_training import train_in_parallel
+
+
+class RecordingQAgent(PacmanQAgent):
+    """
+    Records how many pairs each broadcast of changes holds, against how
+    many the table has.
+    """
+    def __init__(self, **args):
+        PacmanQAgent.__init__(self, **args)
+        self.broadcasts = []
+
+    def get_parameter_changes(self):
+        changes = PacmanQAgent.get_parameter_changes(self)
+        self.broadcasts.append((len(changes), len(self.q_values) * len(self.q_values.actions)))
+        return changes
+
+
+class TrainInParallelTest(unittest.TestCase):
+    def train(self, agent, board_name):
+        board = layout.get_layout(board_name)
+        ghosts = [RandomGhost(i + 1) for i in range(board.get_ghost_count())]
+        output = open(os.devnull, 'w')
+
+        try:
+            return train_in_parallel(agent, board, ghosts, agent.numTraining, 2, sync_period=2, seed=0,
+                                     output=output, context=multiprocessing.get_context('spawn'))
+        finally:
+            output.close()
+
+    def test_tabular_agent_trains_in_spawned_actors(self):
+        agent = PacmanQAgent(numTraining=6)
+        statistics = self.train(agent, 'small_grid')
+
+        self.assertEqual(statistics.episodes, 6)
+        self.assertEqual(agent.episodes_so_far, 6)
+        self.assertTrue(len(agent.q_values) > 0)
+
+    def test_later_broadcasts_hold_only_what_changed(self):
+        agent = RecordingQAgent(numTraining=10)
+        agent.q_values.set('unvisited', 'Stop', 1.0)
+        self.train(agent, 'small_grid')
+
+        self.assertTrue(agent.broadcasts)
+        for changed, entries in agent.broadcasts:
+            self.assertLess(changed, entries)
+
+    def test_approximate_agent_trains_in_spawned_actors(self):
+        agent = ApproximateQAgent(extractor='SimpleExtractor', numTraining=4)
+        statistics = self.train(agent, 'small_classic')
+
+        self.assertEqual(statistics.episodes, 4)
+        self.assertNotEqual(list(agent.get_weights().values()), [0.0] * 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
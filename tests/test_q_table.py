@@ -0,0 +1,53 @@
+import unittest
+
+from agents_q_learning import QLearningAgent
+from game.q_table import QTable
+
+
+class QTableTest(unittest.TestCase):
+    def test_restoring_a_snapshot_leaves_it_as_it_was(self):
+        table = QTable()
+        table.set('a', 'North', 1.0)
+        snapshot = table.snapshot()
+        values = snapshot['q_values'][:]
+
+        restored = QTable.from_snapshot(snapshot)
+        restored.set('b', 'South', 2.0)
+
+        self.assertEqual(snapshot['q_states'], ['a'])
+        self.assertEqual(snapshot['q_values'], values)
+        self.assertEqual(QTable.from_snapshot(snapshot).get('a', 'North'), 1.0)
+
+    def test_a_copy_learns_apart_from_the_table(self):
+        table = QTable()
+        table.set('a', 'North', 1.0)
+        table.track_changes()
+
+        copy = table.copy()
+        copy.set('a', 'North', 3.0)
+        copy.set('b', 'South', 2.0)
+
+        self.assertEqual(table.get('a', 'North'), 1.0)
+        self.assertNotIn('b', table)
+        self.assertEqual(table.take_changes(), [])
+
+
+class QLearningAgentParametersTest(unittest.TestCase):
+    def test_parameters_are_copies(self):
+        agent = QLearningAgent()
+        agent.q_values.set('a', 'North', 1.0)
+
+        parameters = agent.get_parameters()
+        self.assertIsNone(agent.q_values.changed)
+
+        agent.q_values.set('a', 'North', 2.0)
+        self.assertEqual(parameters.get('a', 'North'), 1.0)
+
+        other = QLearningAgent()
+        other.set_parameters(parameters)
+        parameters.set('a', 'North', 5.0)
+        self.assertEqual(other.get_q_value('a', 'North'), 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
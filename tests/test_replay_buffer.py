@@ -0,0 +1,117 @@
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+
+from agents_ghosts import RandomGhost
+from agents_q_learning import PacmanQAgent
+from displays import textual
+from game import layout
+from game.replay_buffer import ReplayBuffer
+from rules.game_rules import GameRules
+
+
+class RecordingAgent(PacmanQAgent):
+    """
+    Keeps the transitions it observes.
+    """
+    def __init__(self, **args):
+        PacmanQAgent.__init__(self, **args)
+        self.transitions = []
+
+    def observe_transition(self, state, action, next_state, delta_reward):
+        self.transitions.append((state, action, delta_reward, next_state))
+        PacmanQAgent.observe_transition(self, state, action, next_state, delta_reward)
+
+
+def play_games(board_name, num_games):
+    board = layout.get_layout(board_name)
+    ghosts = [RandomGhost(i + 1) for i in range(board.get_ghost_count())]
+    agent = RecordingAgent(numTraining=num_games, epsilon=1.0)
+    rules = GameRules()
+    rules.quiet = True
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+
+    try:
+        for _ in range(num_games):
+            rules.new_game(board, agent, ghosts, textual.NullGraphics(), True).run()
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+    return agent.transitions
+
+
+class ReplayBufferTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_a_mapped_buffer_leaves_no_file(self):
+        buffer = ReplayBuffer(100, directory=self.directory)
+
+        for i in range(150):
+            buffer.add(i % 7, 'North', float(i), (i + 1) % 7)
+
+        self.assertEqual(os.listdir(self.directory), [])
+        self.assertEqual(buffer.transition(0), (2, 'North', 100.0, 3))
+        buffer.close()
+
+    def test_leaving_a_with_block_closes_the_buffer(self):
+        with ReplayBuffer(10, directory=self.directory) as buffer:
+            buffer.add('a', 'East', 1.0, 'b')
+
+        self.assertIsNone(buffer.mapping)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_game_states_are_rebuilt_equal_to_those_stored(self):
+        # These games end, and have scared ghosts between cells.
+        random.seed(3)
+        transitions = play_games('small_classic', 3)
+
+        for directory in [None, self.directory]:
+            with ReplayBuffer(len(transitions), directory=directory) as buffer:
+                for state, action, reward, next_state in transitions:
+                    buffer.add(state, action, reward, next_state)
+
+                self.assertIsNone(buffer.state_table)
+
+                for index, transition in enumerate(transitions):
+                    stored = buffer.transition(index)
+
+                    self.assertEqual(stored, transition)
+                    self.assertEqual([hash(state) for state in stored[::3]],
+                                     [hash(state) for state in transition[::3]])
+                    self.assertEqual(stored[3].is_win(), transition[3].is_win())
+                    self.assertEqual(stored[3].is_lose(), transition[3].is_lose())
+                    self.assertEqual(stored[0].get_legal_actions(), transition[0].get_legal_actions())
+
+    def test_a_state_of_another_layout_leaves_the_buffer_as_it_was(self):
+        random.seed(0)
+        transition = play_games('small_classic', 1)[0]
+        other = play_games('small_grid', 1)[0]
+        buffer = ReplayBuffer(1)
+        buffer.add(*transition)
+
+        self.assertRaises(ValueError, buffer.add, *other)
+        self.assertEqual(buffer.transition(0), transition)
+
+    def test_prioritized_weights_are_scaled_by_the_largest_in_the_batch(self):
+        buffer = ReplayBuffer(8, prioritized=True, seed=0)
+
+        for i in range(8):
+            buffer.add(i, 'West', 0.0, i + 1)
+
+        buffer.update_priorities(range(8), [float(i) for i in range(8)])
+        weights = [weight for _, weight in buffer.sample(4)]
+
+        self.assertEqual(max(weights), 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
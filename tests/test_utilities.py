@@ -0,0 +1,119 @@
+import heapq
+import random
+import unittest
+
+from utilities import BucketQueue, PriorityQueue
+
+
+class ScanningPriorityQueue:
+    """
+    The priority queue as it was before it kept an index of its entries,
+    finding an item to update by scanning the heap. Of an item in the heap
+    more than once, it lowers the entry that would be popped first.
+    """
+    def __init__(self):
+        self.heap = []
+        self.count = 0
+
+    def push(self, item, priority):
+        heapq.heappush(self.heap, (priority, self.count, item))
+        self.count += 1
+
+    def pop(self):
+        return heapq.heappop(self.heap)[2]
+
+    def is_empty(self):
+        return len(self.heap) == 0
+
+    def update(self, item, priority):
+        entries = [entry for entry in self.heap if entry[2] == item]
+
+        if not entries:
+            self.push(item, priority)
+            return
+
+        p, c, i = min(entries)
+
+        if p > priority:
+            self.heap.remove((p, c, i))
+            self.heap.append((priority, c, item))
+            heapq.heapify(self.heap)
+
+
+def drain(queue):
+    items = []
+
+    while not queue.is_empty():
+        items.append(queue.pop())
+
+    return items
+
+
+class PriorityQueueTest(unittest.TestCase):
+    def test_update_lowers_the_entry_left_by_a_pop(self):
+        queue = PriorityQueue()
+        queue.push('a', 1)
+        queue.push('a', 5)
+        queue.push('b', 4)
+
+        self.assertEqual(queue.pop(), 'a')
+
+        queue.update('a', 3)
+        self.assertEqual(drain(queue), ['a', 'b'])
+
+    def test_update_lowers_the_best_of_several_entries(self):
+        queue = PriorityQueue()
+        queue.push('a', 5)
+        queue.push('a', 2)
+        queue.push('b', 3)
+
+        queue.update('a', 1)
+        self.assertEqual(drain(queue), ['a', 'b', 'a'])
+
+    def test_update_of_unhashable_items(self):
+        queue = PriorityQueue()
+        queue.push(['a'], 1)
+        queue.push(['a'], 5)
+        queue.push(['b'], 4)
+        queue.pop()
+
+        queue.update(['a'], 3)
+        self.assertEqual(drain(queue), [['a'], ['b']])
+
+    def test_matches_the_scanning_queue(self):
+        rng = random.Random(0)
+
+        for _ in range(200):
+            queue, expected = PriorityQueue(), ScanningPriorityQueue()
+
+            for _ in range(40):
+                choice = rng.random()
+                item, priority = rng.randrange(5), rng.randrange(10)
+
+                if choice < 0.4:
+                    queue.push(item, priority)
+                    expected.push(item, priority)
+                elif choice < 0.7:
+                    queue.update(item, priority)
+                    expected.update(item, priority)
+                elif not expected.is_empty():
+                    self.assertEqual(queue.pop(), expected.pop())
+
+            self.assertEqual(drain(queue), drain(expected))
+
+
+class BucketQueueTest(unittest.TestCase):
+    def test_update_lowers_the_entry_left_by_a_pop(self):
+        queue = BucketQueue()
+        queue.push('a', 1)
+        queue.push('a', 5)
+        queue.push('b', 4)
+
+        self.assertEqual(queue.pop(), 'a')
+
+        queue.update('a', 3)
+        self.assertEqual(drain(queue), ['a', 'b'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,6 +4,7 @@ import sys
 import inspect
 import heapq
 import random
+from collections import deque
 
 
 class FixedRandom:
@@ -124,13 +125,13 @@ class Queue:
     A container with a first-in-first-out (FIFO) queuing policy.
     """
     def __init__(self):
-        self.list = []
+        self.list = deque()
 
     def push(self, item):
-        self.list.insert(0, item)
+        self.list.append(item)
 
     def pop(self):
-        return self.list.pop()
+        return self.list.popleft()
 
     def is_empty(self):
         return len(self.list) == 0
@@ -141,34 +142,214 @@ class PriorityQueue:
     Works just like a queue, but each inserted item has a priority associated
     with it and anything using this approach is usually interested in quick
     retrieval of the lowest-priority item in the queue.
+
+    This is an indexed binary heap. Each heap entry is a list of
+    [priority, count, item, slot], where count breaks ties in the order the
+    items were pushed and slot is the entry's position in the heap. Items
+    that can be hashed are also kept in a map to the entries they have in
+    the heap, which lets update() find an item and lower its priority in
+    O(log n) time.
     """
     def __init__(self):
         self.heap = []
+        self.entries = {}
         self.count = 0
 
     def push(self, item, priority):
-        entry = (priority, self.count, item)
-        heapq.heappush(self.heap, entry)
+        entry = [priority, self.count, item, len(self.heap)]
         self.count += 1
+        self.heap.append(entry)
+        self._sift_up(entry)
+
+        try:
+            entries = self.entries.get(item)
+        except TypeError:
+            return
+
+        if entries is None:
+            self.entries[item] = [entry]
+        else:
+            entries.append(entry)
 
     def pop(self):
-        (_, _, item) = heapq.heappop(self.heap)
+        heap = self.heap
+        entry = heap[0]
+        last = heap.pop()
+
+        if heap:
+            heap[0] = last
+            last[3] = 0
+            self._sift_down(last)
+
+        item = entry[2]
+        try:
+            entries = self.entries.get(item)
+        except TypeError:
+            return item
+
+        if len(entries) == 1:
+            del self.entries[item]
+        else:
+            entries.remove(entry)
+
         return item
 
     def is_empty(self):
         return len(self.heap) == 0
 
     def update(self, item, priority):
-        for index, (p, c, i) in enumerate(self.heap):
-            if i == item:
-                if p <= priority:
-                    break
-                del self.heap[index]
-                self.heap.append((priority, c, item))
-                heapq.heapify(self.heap)
+        """
+        Lowers the priority of an item that is in the queue, or pushes the
+        item if it is not. An item that already has a priority as low as
+        the given one is left alone. Of an item pushed more than once, the
+        entry that would be popped first is the one lowered.
+        """
+        try:
+            entries = self.entries.get(item)
+        except TypeError:
+            entries = [candidate for candidate in self.heap if candidate[2] == item]
+
+        entry = min(entries) if entries else None
+
+        if entry is None:
+            self.push(item, priority)
+        elif priority < entry[0]:
+            entry[0] = priority
+            self._sift_up(entry)
+
+    def _sift_up(self, entry):
+        heap = self.heap
+        slot = entry[3]
+
+        while slot > 0:
+            parent_slot = (slot - 1) >> 1
+            parent = heap[parent_slot]
+
+            if not entry < parent:
                 break
+
+            heap[slot] = parent
+            parent[3] = slot
+            slot = parent_slot
+
+        heap[slot] = entry
+        entry[3] = slot
+
+    def _sift_down(self, entry):
+        heap = self.heap
+        size = len(heap)
+        slot = entry[3]
+        child_slot = 2 * slot + 1
+
+        while child_slot < size:
+            child = heap[child_slot]
+            right_slot = child_slot + 1
+
+            if right_slot < size and heap[right_slot] < child:
+                child_slot = right_slot
+                child = heap[right_slot]
+
+            if not child < entry:
+                break
+
+            heap[slot] = child
+            child[3] = slot
+            slot = child_slot
+            child_slot = 2 * slot + 1
+
+        heap[slot] = entry
+        entry[3] = slot
+
+
+class BucketQueue:
+    """
+    A priority queue for small non-negative integer priorities, such as the
+    path costs of a search on a grid. There is one FIFO bucket per priority,
+    so pushing is O(1) and popping only has to step past empty buckets.
+    Items of equal priority come out in the order they were pushed, with an
+    update() counting as a push.
+
+    An update() leaves the item's old entry in its bucket but marks it dead,
+    and dead entries are skipped when they reach the front.
+    """
+    def __init__(self):
+        self.buckets = []
+        self.entries = {}
+        self.minimum = 0
+        self.size = 0
+
+    def push(self, item, priority):
+        if priority < 0:
+            raise ValueError("BucketQueue priorities must be non-negative integers")
+
+        while len(self.buckets) <= priority:
+            self.buckets.append(deque())
+
+        entry = [item, True]
+        self.buckets[priority].append(entry)
+        self.size += 1
+
+        if priority < self.minimum:
+            self.minimum = priority
+
+        try:
+            entries = self.entries.get(item)
+        except TypeError:
+            return
+
+        if entries is None:
+            self.entries[item] = [(priority, entry)]
         else:
-            self.push(item, priority)
+            entries.append((priority, entry))
+
+    def pop(self):
+        if self.size == 0:
+            raise IndexError("pop from an empty BucketQueue")
+
+        while True:
+            bucket = self.buckets[self.minimum]
+
+            while bucket:
+                entry = bucket.popleft()
+
+                if entry[1]:
+                    self.size -= 1
+                    item = entry[0]
+                    try:
+                        entries = self.entries.get(item)
+                    except TypeError:
+                        return item
+
+                    if len(entries) == 1:
+                        del self.entries[item]
+                    else:
+                        entries[:] = [pair for pair in entries if pair[1] is not entry]
+                    return item
+
+            self.minimum += 1
+
+    def is_empty(self):
+        return self.size == 0
+
+    def update(self, item, priority):
+        """
+        Lowers the priority of an item that is in the queue, or pushes the
+        item if it is not. Items must be hashable. Of an item pushed more
+        than once, the entry that would be popped first is the one lowered.
+        """
+        entries = self.entries.get(item)
+
+        if entries:
+            current = min(entries, key=lambda pair: pair[0])
+
+            if current[0] <= priority:
+                return
+
+            entries[:] = [pair for pair in entries if pair is not current]
+            current[1][1] = False
+            self.size -= 1
+
+        self.push(item, priority)
 
 
 class PriorityQueueWithFunction(PriorityQueue):